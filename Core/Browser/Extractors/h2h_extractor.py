@@ -14,9 +14,10 @@ from playwright.async_api import Page, TimeoutError, ElementHandle
 import re
 from typing import Dict, Any, List
 from Core.Intelligence.intelligence import get_selector_auto, get_selector
-from Data.Access.db_helpers import save_schedule_entry
+from datetime import datetime as dt
+from Data.Access.db_helpers import batch_upsert, SCHEDULES_CSV, files_and_headers
 from Core.Browser.site_helpers import fs_universal_popup_dismissal
-import asyncio
+from Core.Browser.waits import wait_for_count_stable
 
 async def activate_h2h_tab(page: Page) -> bool:
     """
@@ -34,7 +35,8 @@ async def activate_h2h_tab(page: Page) -> bool:
         if await page.locator(tab_selector).is_visible(timeout=5000):
             await page.click(tab_selector)
             await page.wait_for_load_state("domcontentloaded")
-            await asyncio.sleep(5.0)
+            # Ready once the H2H rows have rendered and stopped growing
+            await wait_for_count_stable(page, get_selector("fs_h2h_tab", "h2h_row_general") or ".h2h__row")
             await fs_universal_popup_dismissal(page, "fs_h2h_tab") # Use specific context popup dismissal if needed, or generic
             return True
         else:
@@ -45,10 +47,14 @@ async def activate_h2h_tab(page: Page) -> bool:
         return False
 
 
-async def extract_h2h_data(page: Page, home_team_main: str, away_team_main: str, context: str = "fs_h2h_tab") -> Dict[str, Any]:
+async def extract_h2h_data(page: Page, home_team_main: str, away_team_main: str, context: str = "fs_h2h_tab",
+                           expand_rounds: int = 0) -> Dict[str, Any]:
     """
     Extracts H2H data from the page using AI-generated selectors from knowledge base.
     Eliminates hardcoded CSS classes for robust scraping.
+    A single page.evaluate waits for the rows, clicks every visible "show more"
+    button expand_rounds times (letting the rows settle after each round) and
+    returns the whole payload.
     """
     print("      [Extractor] Extracting H2H tab...")
 
@@ -72,15 +78,41 @@ async def extract_h2h_data(page: Page, home_team_main: str, away_team_main: str,
         "h2h_badge_loss": get_selector(context, "h2h_badge_loss") or ".h2h__icon--lost",
         "meta_breadcrumb_country": get_selector(context, "meta_breadcrumb_country") or ".tournamentHeader__country",
         "meta_breadcrumb_league": get_selector(context, "meta_breadcrumb_league") or ".tournamentHeader__league a",
+        "h2h_show_more_button": get_selector(context, "h2h_show_more_button") or ".h2h__showMore",
     }
 
     from Core.Utils.constants import WAIT_FOR_LOAD_STATE_TIMEOUT
-    await page.wait_for_selector(selectors['h2h_row_general'], timeout=WAIT_FOR_LOAD_STATE_TIMEOUT)
 
-    js_code = r"""(data) => {
-        const { selectors, home_team_main, away_team_main } = data;
+    js_code = r"""async (data) => {
+        const { selectors, home_team_main, away_team_main, expand_rounds, timeout_ms } = data;
         const getText = (el, sel) => el ? el.querySelector(sel)?.innerText.trim() || '' : '';
-        const getAttribute = (el, sel, attr) => el?.querySelector(sel)?.[attr] || null;
+        const rowCount = () => document.querySelectorAll(selectors.h2h_row_general).length;
+
+        // Resolves once the row count has held for settleMs (or at timeoutMs)
+        const settle = (minCount, settleMs, timeoutMs) => new Promise(resolve => {
+            const start = performance.now();
+            let last = -1, since = start;
+            const tick = () => {
+                const n = rowCount(), now = performance.now();
+                if (n !== last) { last = n; since = now; }
+                if ((n >= minCount && now - since >= settleMs) || now - start >= timeoutMs) return resolve(n);
+                setTimeout(tick, 100);
+            };
+            tick();
+        });
+
+        if (await settle(1, 0, timeout_ms) === 0) {
+            return { timed_out: true };
+        }
+
+        // Expand "show more" in-page: every visible button per round
+        for (let round = 0; round < expand_rounds; round++) {
+            const buttons = [...document.querySelectorAll(selectors.h2h_show_more_button)]
+                .filter(b => b.offsetParent !== null);
+            if (!buttons.length) break;
+            buttons.forEach(b => { try { b.click(); } catch (e) {} });
+            await settle(1, 300, 3000);
+        }
 
         const results = {
             home_last_10_matches: [],
@@ -254,9 +286,13 @@ async def extract_h2h_data(page: Page, home_team_main: str, away_team_main: str,
     data_object = {
         "selectors": selectors,
         "home_team_main": home_team_main,
-        "away_team_main": away_team_main
+        "away_team_main": away_team_main,
+        "expand_rounds": expand_rounds,
+        "timeout_ms": WAIT_FOR_LOAD_STATE_TIMEOUT,
     }
     evaluation_result = await page.evaluate(js_code, data_object)
+    if evaluation_result.get("timed_out"):
+        raise TimeoutError(f"No H2H rows ('{selectors['h2h_row_general']}') within {WAIT_FOR_LOAD_STATE_TIMEOUT}ms")
 
     if (evaluation_result.get("parsing_errors")):
         print(f"      [Extractor Warning] Encountered {len(evaluation_result['parsing_errors'])} parsing errors.")
@@ -265,10 +301,11 @@ async def extract_h2h_data(page: Page, home_team_main: str, away_team_main: str,
     return evaluation_result
 
 
-async def save_extracted_h2h_to_schedules(h2h_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+def save_extracted_h2h_to_schedules(h2h_data: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
-    Saves historical matches found during extraction to the schedules.csv file.
-    Returns a list of the newly saved match dictionaries for further processing.
+    Saves historical matches found during extraction to the schedules.csv file
+    (one batch upsert). Returns a list of the saved match dictionaries for further processing.
+    Synchronous so the analysis pipeline can run it on its writer thread.
     """
     from Data.Access.db_helpers import save_team_entry
 
@@ -279,6 +316,7 @@ async def save_extracted_h2h_to_schedules(h2h_data: Dict[str, Any]) -> List[Dict
     )
 
     saved_matches = []
+    last_updated = dt.now().isoformat()
     for match in all_past_matches:
         if not match or not match.get('date') or not match.get('score'):
             continue
@@ -304,11 +342,11 @@ async def save_extracted_h2h_to_schedules(h2h_data: Dict[str, Any]) -> List[Dict
             'home_score': score_parts[0].strip() if len(score_parts) > 1 else 'N/A',
             'away_score': score_parts[1].strip() if len(score_parts) > 1 else 'N/A',
             'match_status': 'finished',
-            'match_link': match_link
+            'match_link': match_link,
+            'league_id': '',
+            'last_updated': last_updated
         }
 
-        save_schedule_entry(entry_to_save)
-
         # Save team entries
         if home_team_id:
             home_team_url = f"https://www.flashscore.com/team/{home_team.lower().replace(' ', '-')}/{home_team_id}/"
@@ -319,4 +357,5 @@ async def save_extracted_h2h_to_schedules(h2h_data: Dict[str, Any]) -> List[Dict
 
         saved_matches.append(entry_to_save)
 
+    batch_upsert(SCHEDULES_CSV, saved_matches, files_and_headers[SCHEDULES_CSV], 'fixture_id')
     return saved_matches
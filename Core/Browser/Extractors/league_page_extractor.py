@@ -3,11 +3,13 @@
 #
 # Functions: extract_league_match_urls(), get_active_leagues_from_main(), extract_league_metadata()
 
-import asyncio
 from typing import List, Dict, Any
 from playwright.async_api import Page, TimeoutError
 from Core.Intelligence.intelligence import get_selector
 from Core.Browser.site_helpers import fs_universal_popup_dismissal
+from Core.Browser.waits import wait_for_count_stable
+
+MATCH_ROW_SELECTOR = '[id^="g_1_"]'
 
 async def extract_league_match_urls(page: Page, league_url: str, mode: str = "results") -> List[str]:
     """
@@ -30,7 +32,7 @@ async def extract_league_match_urls(page: Page, league_url: str, mode: str = "re
     
     try:
         await page.goto(target_url, wait_until="domcontentloaded", timeout=60000)
-        await asyncio.sleep(2)
+        await wait_for_count_stable(page, MATCH_ROW_SELECTOR)
         await fs_universal_popup_dismissal(page)
         
         # 1. Expand all matches ("Show more matches")
@@ -44,7 +46,7 @@ async def extract_league_match_urls(page: Page, league_url: str, mode: str = "re
                 if await show_more_btn.is_visible(timeout=5000):
                     print(f"      [League Extractor] Clicking 'Show more matches' (Attempt {expansions + 1})...")
                     await show_more_btn.click()
-                    await asyncio.sleep(2)
+                    await wait_for_count_stable(page, MATCH_ROW_SELECTOR)
                     expansions += 1
                 else:
                     break
@@ -9,7 +9,7 @@ import re
 from typing import Dict, Any, List
 from Core.Intelligence.intelligence import get_selector_auto, get_selector
 from Core.Browser.site_helpers import fs_universal_popup_dismissal
-import asyncio
+from Core.Browser.waits import wait_for_dom_quiet
 
 async def activate_standings_tab(page: Page) -> bool:
     """
@@ -65,9 +65,10 @@ async def activate_standings_tab(page: Page) -> bool:
 async def _post_activation_prep(page: Page):
     """Wait for content and dismiss popups after tab activation."""
     await page.wait_for_load_state("domcontentloaded")
-    await asyncio.sleep(2.0)
+    await wait_for_dom_quiet(page)  # Tab content rendered
     await fs_universal_popup_dismissal(page, "fs_standings_tab")
-    await asyncio.sleep(3.0)
+    # extract_standings_data() waits for the rows themselves; only let the popup close settle
+    await wait_for_dom_quiet(page, quiet_ms=250, timeout_ms=2000)
 
 async def extract_standings_data(page: Page, context: str = "fs_standings_tab") -> Dict[str, Any]:
     """
@@ -92,9 +93,9 @@ async def extract_standings_data(page: Page, context: str = "fs_standings_tab")
     }
 
     from Core.Utils.constants import WAIT_FOR_LOAD_STATE_TIMEOUT
-    await page.wait_for_selector(selectors['standings_row'], timeout=WAIT_FOR_LOAD_STATE_TIMEOUT)
 
-    js_code = r"""(selectors) => {
+    # One round trip: wait for the rows in-page, then parse the whole table
+    js_code = r"""async ([selectors, timeoutMs]) => {
         const getText = (el, sel) => {
             const elem = el?.querySelector(sel);
             return elem ? elem.innerText?.trim() : null;
@@ -111,9 +112,13 @@ async def extract_standings_data(page: Page, context: str = "fs_standings_tab")
 
         const table = [];
 
+        const start = performance.now();
+        while (!document.querySelector(selectors.standings_row) && performance.now() - start < timeoutMs) {
+            await new Promise(r => setTimeout(r, 100));
+        }
         const rows = document.querySelectorAll(selectors.standings_row);
         if (rows.length === 0) {
-            return { standings: [], region_league: 'Unknown', parsing_errors: ['No table rows found'] };
+            return { timed_out: true, standings: [], region_league: 'Unknown', parsing_errors: ['No table rows found'] };
         }
 
         rows.forEach((row, index) => {
@@ -172,7 +177,9 @@ async def extract_standings_data(page: Page, context: str = "fs_standings_tab")
         };
     }"""
 
-    evaluation_result = await page.evaluate(js_code, selectors)
+    evaluation_result = await page.evaluate(js_code, [selectors, WAIT_FOR_LOAD_STATE_TIMEOUT])
+    if evaluation_result.get("timed_out"):
+        raise TimeoutError(f"No standings rows ('{selectors['standings_row']}') within {WAIT_FOR_LOAD_STATE_TIMEOUT}ms")
 
     team_count = len(evaluation_result.get('standings', []))
     league_name = evaluation_result.get('region_league', 'Unknown League')
@@ -0,0 +1,85 @@
+# resource_router.py: Shared request-routing policy that blocks heavy resources and trackers.
+# Part of LeoBook Core — Browser Automation
+#
+# Functions: resolve_policy(), apply_resource_policy()
+# Called by: fs_processor.py, manager.py, fs_live_streamer.py, outcome_reviewer.py, fb_session.py, enrich_all_schedules.py
+
+"""
+Resource Router
+One routing policy for every Playwright context (or page). Each flow is mapped
+to a named policy that aborts requests by resource type and by domain:
+  - data:   DOM/text scraping (Flashscore). Blocks images, fonts, media and trackers.
+  - visual: flows that take screenshots for AIGO selector healing (Football.com).
+            Keeps images and fonts, blocks media and trackers.
+  - off:    no routing at all.
+
+Per-flow override: ROUTE_POLICY_<FLOW>=data|visual|off (e.g. ROUTE_POLICY_FB_SESSION=off),
+or allow_types/allow_domains at the call site. BROWSER_ROUTING=0 disables routing globally.
+"""
+
+import os
+from typing import Dict, Iterable, Set
+from urllib.parse import urlsplit
+
+ROUTING_ENABLED = os.getenv("BROWSER_ROUTING", "1") != "0"
+
+# Ad/analytics hosts (suffix match); none of them carry data the scrapers read
+TRACKER_DOMAINS = {
+    "doubleclick.net", "googlesyndication.com", "googletagmanager.com", "google-analytics.com",
+    "googletagservices.com", "adservice.google.com", "amazon-adsystem.com", "facebook.net",
+    "scorecardresearch.com", "criteo.com", "criteo.net", "taboola.com", "outbrain.com",
+    "hotjar.com", "adnxs.com", "rubiconproject.com", "pubmatic.com", "casalemedia.com",
+}
+
+ROUTE_POLICIES: Dict[str, Dict[str, Set[str]]] = {
+    "data": {"types": {"image", "font", "media"}, "domains": TRACKER_DOMAINS},
+    "visual": {"types": {"media"}, "domains": TRACKER_DOMAINS},
+    "off": {"types": set(), "domains": set()},
+}
+
+# Default policy per flow; anything unlisted gets "data"
+FLOW_POLICIES = {
+    "fs_processor": "data",
+    "fs_schedule": "data",
+    "enrichment": "data",
+    "live_streamer": "data",
+    "outcome_review": "data",
+    "fb_session": "visual",
+}
+
+
+def resolve_policy(flow: str) -> str:
+    """Policy name for a flow after the global switch and the ROUTE_POLICY_<FLOW> override."""
+    if not ROUTING_ENABLED:
+        return "off"
+    name = os.getenv(f"ROUTE_POLICY_{flow.upper()}", FLOW_POLICIES.get(flow, "data")).lower()
+    return name if name in ROUTE_POLICIES else "data"
+
+
+def _blocked_host(url: str, domains: Iterable[str]) -> bool:
+    host = urlsplit(url).hostname or ""
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+async def apply_resource_policy(target, flow: str, allow_types: Iterable[str] = (),
+                                allow_domains: Iterable[str] = ()) -> str:
+    """
+    Install the flow's policy on a BrowserContext or Page (before its first navigation).
+    Returns the applied policy name.
+    """
+    name = resolve_policy(flow)
+    policy = ROUTE_POLICIES[name]
+    block_types = policy["types"] - set(allow_types)
+    block_domains = tuple(policy["domains"] - set(allow_domains))
+    if not (block_types or block_domains):
+        return "off"
+
+    async def handler(route):
+        request = route.request
+        if request.resource_type in block_types or _blocked_host(request.url, block_domains):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await target.route("**/*", handler)
+    return name
@@ -0,0 +1,282 @@
+# supervisor.py: Browser process supervisor with memory ceilings, proactive recycling and metrics export.
+# Part of LeoBook Core — Browser Automation
+#
+# Classes: BrowserSupervisor
+# Functions: export_metrics()
+# Called by: fs_live_streamer.py, enrich_all_schedules.py, fb_manager.py
+
+"""
+Browser Supervisor
+Owns one long-lived Chromium (a Browser, or a persistent BrowserContext) and the
+OS processes it spawned. Callers run their work as usual and, at points where no
+page is in use, call maybe_recycle(). The browser is closed and relaunched there
+when its process tree RSS reaches BROWSER_MAX_RSS_MB or it has served
+BROWSER_MAX_PAGES pages (counted with note_pages()). After True the caller
+re-opens its pages and restores page state (tabs, expanded leagues, login check).
+Persistent contexts keep their login through the profile directory; their
+cookies are also snapshotted before the close and re-added after the relaunch.
+
+Per-flow overrides: BROWSER_MAX_RSS_MB_<NAME> / BROWSER_MAX_PAGES_<NAME>
+(e.g. BROWSER_MAX_PAGES_LIVE_STREAMER=2000). BROWSER_RECYCLE=0 only tracks.
+
+Metrics: Data/Logs/browser_metrics.json holds the latest RSS / pages / recycles of
+every supervised browser, and Data/Logs/browser_recycles.csv one row per recycle.
+Closing kills only this browser's leftover processes, never other Chrome instances.
+The browser process is the child of this process's Playwright driver that was
+started with --remote-debugging-pipe (and, for persistent contexts, the profile's
+--user-data-dir); its subtree holds the renderers. If a launch cannot be told apart
+from a concurrent one, RSS is not tracked for it rather than measuring the wrong tree.
+RSS tracking and leftover cleanup need psutil; without it only the page limit applies.
+"""
+
+import asyncio
+import csv
+import json
+import os
+import time
+from datetime import datetime as dt
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+METRICS_FILE = PROJECT_ROOT / "Data" / "Logs" / "browser_metrics.json"
+RECYCLE_LOG = PROJECT_ROOT / "Data" / "Logs" / "browser_recycles.csv"
+STORAGE_DIR = PROJECT_ROOT / "Data" / "Auth"
+RECYCLE_HEADERS = ["timestamp", "browser", "reason", "rss_mb", "pages", "uptime_s"]
+
+RECYCLE_ENABLED = os.getenv("BROWSER_RECYCLE", "1") != "0"
+DEFAULT_MAX_RSS_MB = float(os.getenv("BROWSER_MAX_RSS_MB", "1500"))
+DEFAULT_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "400"))
+CLOSE_TIMEOUT = 30  # seconds before a hung close() falls back to killing the tree
+
+# One launch at a time, so the processes that appear during a launch belong to it
+_LAUNCH_LOCK = asyncio.Lock()
+_registry: Dict[str, "BrowserSupervisor"] = {}
+
+
+def _limit(kind: str, name: str, default: float) -> float:
+    return float(os.getenv(f"BROWSER_{kind}_{name.upper()}", default))
+
+
+def _browser_processes(user_data_dir: Optional[str] = None) -> set:
+    """Pids of the browsers launched by this process's Playwright drivers (not their --type= children)."""
+    found = set()
+    try:
+        drivers = psutil.Process().children()  # Pool workers etc. are direct children too, but not drivers
+    except psutil.Error:
+        return found
+    for driver in drivers:
+        try:
+            if "run-driver" not in " ".join(driver.cmdline()):
+                continue
+            for child in driver.children():
+                cmd = child.cmdline()
+                if "--remote-debugging-pipe" not in cmd or any(a.startswith("--type=") for a in cmd):
+                    continue
+                if user_data_dir and f"--user-data-dir={user_data_dir}" not in cmd:
+                    continue
+                found.add(child.pid)
+        except psutil.Error:
+            continue
+    return found
+
+
+def export_metrics():
+    """Write the current state of every supervised browser to METRICS_FILE."""
+    try:
+        METRICS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = METRICS_FILE.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": dt.now().isoformat(),
+                       "browsers": {name: s.metrics() for name, s in _registry.items()}}, f, indent=2)
+        os.replace(tmp, METRICS_FILE)
+    except Exception as e:
+        print(f"    [Supervisor] Could not export metrics: {e}")
+
+
+class BrowserSupervisor:
+    """Launches, measures, recycles and closes one Browser / persistent BrowserContext."""
+
+    def __init__(self, name: str, launch: Callable[[], Awaitable[Any]],
+                 max_rss_mb: Optional[float] = None, max_pages: Optional[int] = None,
+                 user_data_dir: Optional[Path] = None):
+        self.name = name
+        self.launch = launch
+        self.user_data_dir = str(Path(user_data_dir).absolute()) if user_data_dir else None
+        self.max_rss_mb = max_rss_mb if max_rss_mb is not None else _limit("MAX_RSS_MB", name, DEFAULT_MAX_RSS_MB)
+        self.max_pages = int(max_pages if max_pages is not None else _limit("MAX_PAGES", name, DEFAULT_MAX_PAGES))
+        self.browser = None
+        self.pages = 0          # Since the last (re)launch
+        self.total_pages = 0
+        self.recycles = 0
+        self.rss_mb = 0.0
+        self.peak_rss_mb = 0.0
+        self.last_recycle: Optional[Dict[str, Any]] = None
+        self._roots: List[int] = []  # Browser process id of the current launch (empty if unknown)
+        self._launched_at = 0.0
+        _registry[name] = self
+
+    # ── Lifecycle ────────────────────────────────────
+
+    async def start(self):
+        """Launch the browser and remember which processes it spawned. Returns the Browser/BrowserContext."""
+        async with _LAUNCH_LOCK:
+            before = _browser_processes(self.user_data_dir) if HAS_PSUTIL else set()
+            self.browser = await self.launch()
+            if HAS_PSUTIL:
+                new = _browser_processes(self.user_data_dir) - before
+                self._roots = list(new) if len(new) == 1 else []
+                if len(new) > 1:
+                    print(f"    [Supervisor:{self.name}] {len(new)} browsers appeared during launch; "
+                          f"RSS not tracked for this launch.")
+        self.pages = 0
+        self._launched_at = time.monotonic()
+        export_metrics()
+        return self.browser
+
+    def _tree(self) -> List[Any]:
+        procs = []
+        for pid in self._roots:
+            try:
+                root = psutil.Process(pid)
+                procs.append(root)
+                procs.extend(root.children(recursive=True))
+            except psutil.Error:
+                continue
+        return procs
+
+    def _is_context(self) -> bool:
+        return hasattr(self.browser, "storage_state")  # Persistent context rather than a Browser
+
+    async def close(self):
+        """Close gracefully; kill whatever this browser leaves behind (only its own processes)."""
+        if self.browser is None:
+            return
+        leftovers = self._tree() if HAS_PSUTIL else []
+        try:
+            await asyncio.wait_for(self.browser.close(), CLOSE_TIMEOUT)
+        except Exception as e:
+            print(f"    [Supervisor:{self.name}] Close failed ({e}); killing its processes.")
+        self.browser = None
+        alive = [p for p in leftovers if p.is_running()]
+        for proc in alive:
+            try:
+                proc.terminate()
+            except psutil.Error:
+                pass
+        if alive:
+            _, still_alive = await asyncio.to_thread(psutil.wait_procs, alive, 3)
+            for proc in still_alive:
+                try:
+                    proc.kill()
+                except psutil.Error:
+                    pass
+        self._roots = []
+        export_metrics()
+
+    # ── Measurement ──────────────────────────────────
+
+    def note_pages(self, count: int = 1):
+        """Count pages (navigations / scans) served since the last launch."""
+        self.pages += count
+        self.total_pages += count
+
+    def sample(self) -> float:
+        """Current RSS of the browser's process tree in MB (0 without psutil)."""
+        if not HAS_PSUTIL:
+            return 0.0
+        rss = 0
+        for proc in self._tree():
+            try:
+                rss += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        self.rss_mb = rss / (1024 * 1024)
+        self.peak_rss_mb = max(self.peak_rss_mb, self.rss_mb)
+        return self.rss_mb
+
+    def recycle_reason(self) -> Optional[str]:
+        rss = self.sample()
+        if self.max_rss_mb and rss >= self.max_rss_mb:
+            return f"rss {rss:.0f}MB >= {self.max_rss_mb:.0f}MB"
+        if self.max_pages and self.pages >= self.max_pages:
+            return f"{self.pages} pages >= {self.max_pages}"
+        return None
+
+    # ── Recycling ────────────────────────────────────
+
+    async def maybe_recycle(self) -> bool:
+        """Recycle if a threshold is reached. Call only while no page is in use; True means re-open pages."""
+        reason = self.recycle_reason()
+        export_metrics()
+        if reason is None or not RECYCLE_ENABLED:
+            return False
+        await self.recycle(reason)
+        return True
+
+    async def recycle(self, reason: str):
+        """Close and relaunch, carrying cookies over for persistent contexts."""
+        print(f"    [Supervisor:{self.name}] Recycling browser: {reason}")
+        self.last_recycle = {
+            "timestamp": dt.now().isoformat(), "browser": self.name, "reason": reason,
+            "rss_mb": round(self.rss_mb, 1), "pages": self.pages,
+            "uptime_s": round(time.monotonic() - self._launched_at),
+        }
+        storage = None
+        if self._is_context():
+            storage = STORAGE_DIR / f"{self.name}_storage.json"
+            try:
+                STORAGE_DIR.mkdir(parents=True, exist_ok=True)
+                await self.browser.storage_state(path=str(storage))
+            except Exception as e:
+                print(f"    [Supervisor:{self.name}] Could not snapshot storage: {e}")
+                storage = None
+
+        await self.close()
+        await self.start()
+        self.recycles += 1
+        self._log_recycle()
+
+        if storage is not None:
+            try:
+                with open(storage, "r", encoding="utf-8") as f:
+                    await self.browser.add_cookies(json.load(f).get("cookies", []))
+            except Exception as e:
+                print(f"    [Supervisor:{self.name}] Could not restore cookies: {e}")
+        export_metrics()
+
+    def _log_recycle(self):
+        try:
+            RECYCLE_LOG.parent.mkdir(parents=True, exist_ok=True)
+            is_new = not RECYCLE_LOG.exists()
+            with open(RECYCLE_LOG, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=RECYCLE_HEADERS)
+                if is_new:
+                    writer.writeheader()
+                writer.writerow(self.last_recycle)
+        except Exception as e:
+            print(f"    [Supervisor:{self.name}] Could not log recycle: {e}")
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "running": self.browser is not None,
+            "rss_mb": round(self.rss_mb, 1),
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            "max_rss_mb": self.max_rss_mb,
+            "pages": self.pages,
+            "total_pages": self.total_pages,
+            "max_pages": self.max_pages,
+            "recycles": self.recycles,
+            "last_recycle": self.last_recycle,
+            "pids": list(self._roots),
+        }
+
+    def summary(self) -> str:
+        return (f"{self.total_pages} pages, {self.recycles} recycles, "
+                f"RSS {self.rss_mb:.0f}MB (peak {self.peak_rss_mb:.0f}MB)")
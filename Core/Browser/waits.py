@@ -0,0 +1,133 @@
+# waits.py: Condition-based waits that replace fixed sleeps in the scrape paths.
+# Part of LeoBook Core — Browser Automation
+#
+# Functions: wait_until(), wait_for_count_stable(), wait_for_dom_quiet(), wait_for_network_idle()
+# Called by: h2h_extractor.py, standings_extractor.py, league_page_extractor.py, fs_processor.py, booking_code.py, fs_extractor.py, FootballCom extractor.py + navigator.py
+
+"""
+Wait Toolkit
+Every wait returns as soon as its readiness signal is seen and gives up at its
+timeout without raising, so a slow page degrades to the old fixed-sleep
+behaviour instead of failing:
+  - wait_until:            an async predicate becomes truthy (polled).
+  - wait_for_count_stable: a selector's match count stops changing (list/table loaded).
+  - wait_for_dom_quiet:    no DOM mutations for a while (tab switch / SPA render done).
+  - wait_for_network_idle: no in-flight requests matching a URL pattern for a while.
+The DOM waits run as one page.evaluate each (no per-poll round trips).
+"""
+
+import asyncio
+import re
+from typing import Any, Awaitable, Callable, Optional
+
+DEFAULT_TIMEOUT_MS = 5000
+
+_COUNT_STABLE_JS = r"""([sel, settleMs, timeoutMs, minCount]) => new Promise(resolve => {
+    const start = performance.now();
+    let last = -1, since = start;
+    const tick = () => {
+        const n = document.querySelectorAll(sel).length;
+        const now = performance.now();
+        if (n !== last) { last = n; since = now; }
+        if ((n >= minCount && now - since >= settleMs) || now - start >= timeoutMs) return resolve(n);
+        setTimeout(tick, 100);
+    };
+    tick();
+})"""
+
+_DOM_QUIET_JS = r"""([rootSel, quietMs, timeoutMs]) => new Promise(resolve => {
+    const root = (rootSel && document.querySelector(rootSel)) || document.documentElement;
+    let quietTimer = null, capTimer = null;
+    const done = (quiet) => {
+        observer.disconnect(); clearTimeout(quietTimer); clearTimeout(capTimer); resolve(quiet);
+    };
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => done(true), quietMs);
+    });
+    observer.observe(root, {childList: true, subtree: true, attributes: true, characterData: true});
+    quietTimer = setTimeout(() => done(true), quietMs);
+    capTimer = setTimeout(() => done(false), timeoutMs);
+})"""
+
+
+async def wait_until(condition: Callable[[], Awaitable[Any]], timeout_ms: int = DEFAULT_TIMEOUT_MS,
+                     interval_ms: int = 100) -> bool:
+    """Poll an async predicate until it is truthy. Errors count as not ready."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_ms / 1000
+    while True:
+        try:
+            if await condition():
+                return True
+        except Exception:
+            pass
+        if loop.time() >= deadline:
+            return False
+        await asyncio.sleep(interval_ms / 1000)
+
+
+async def wait_for_count_stable(page, selector: str, settle_ms: int = 400, timeout_ms: int = DEFAULT_TIMEOUT_MS,
+                                min_count: int = 1) -> int:
+    """
+    Wait until at least min_count elements match and the count has not changed
+    for settle_ms. Returns the final count. Works on a Page or a Frame.
+    """
+    try:
+        return await page.evaluate(_COUNT_STABLE_JS, [selector, settle_ms, timeout_ms, min_count])
+    except Exception:
+        return 0  # Navigated away or detached mid-wait
+
+
+async def wait_for_dom_quiet(page, quiet_ms: int = 400, timeout_ms: int = DEFAULT_TIMEOUT_MS,
+                             root_selector: Optional[str] = None) -> bool:
+    """Wait until the DOM (or root_selector's subtree) has had no mutations for quiet_ms."""
+    try:
+        return await page.evaluate(_DOM_QUIET_JS, [root_selector, quiet_ms, timeout_ms])
+    except Exception:
+        return False
+
+
+async def wait_for_network_idle(page, url_pattern: Optional[str] = None, idle_ms: int = 500,
+                                timeout_ms: int = DEFAULT_TIMEOUT_MS) -> bool:
+    """
+    Wait until no request whose URL matches url_pattern (regex; any request if None)
+    has been in flight for idle_ms. Only requests started after the call are tracked,
+    so call it right before (or right after) the action that triggers them.
+    """
+    pattern = re.compile(url_pattern) if url_pattern else None
+    inflight = set()
+    changed = asyncio.Event()
+
+    def on_request(request):
+        if pattern is None or pattern.search(request.url):
+            inflight.add(request)
+            changed.set()
+
+    def on_done(request):
+        if request in inflight:
+            inflight.discard(request)
+            changed.set()
+
+    page.on("request", on_request)
+    page.on("requestfinished", on_done)
+    page.on("requestfailed", on_done)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_ms / 1000
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            changed.clear()
+            wait = min(idle_ms / 1000, remaining) if not inflight else remaining
+            try:
+                await asyncio.wait_for(changed.wait(), wait)
+            except asyncio.TimeoutError:
+                if not inflight:
+                    return True  # Idle for idle_ms
+                return False
+    finally:
+        page.remove_listener("request", on_request)
+        page.remove_listener("requestfinished", on_done)
+        page.remove_listener("requestfailed", on_done)
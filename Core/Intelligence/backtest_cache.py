@@ -0,0 +1,142 @@
+# backtest_cache.py: Content-addressed cache of per-fixture backtest predictions.
+# Part of LeoBook Core — Intelligence (AI Engine)
+#
+# Classes: BacktestCache
+# Called by: progressive_backtester.py, Modules/Flashscore/fs_offline.py
+
+"""
+Backtest Cache
+Stores RuleEngine results per fixture, keyed on (fixture_id, data version, config deps).
+An entry only depends on the RuleConfig fields that actually influenced it: the
+always-read parameters plus the weights listed in the result's 'rules_fired'.
+Changing an unrelated weight therefore keeps the entry valid. Confidence
+calibration (learned levels and fitted probability maps) is re-applied on every
+hit, so it is not part of the key. The H2H lookback window is anchored on the
+fixture's own date (RuleEngine reads vision_data["match_date"]), so a result does
+not drift as days pass and the fixture's data version fully determines it.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .rule_config import RuleConfig
+from .rule_engine import RuleEngine
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+CACHE_FILE = PROJECT_ROOT / "Data" / "Store" / "backtest_cache.json"
+
+# Bump when the cached result shape or RuleEngine logic changes incompatibly.
+CACHE_SCHEMA = 3
+
+# Config fields read on every analyze() call, regardless of which rules fire.
+ALWAYS_DEPENDS_ON = (
+    "h2h_lookback_days", "min_form_matches", "risk_preference",
+    "scope_type", "scope_leagues", "scope_teams",
+)
+
+# Only the fields consumers of a backtest read are kept.
+RESULT_FIELDS = (
+    "type", "market_prediction", "market_type", "confidence",
+    "xg_home", "xg_away", "reason", "rules_fired",
+    "confidence_score", "confidence_capped", "calibration_market", "region_league",
+)
+
+# Entries kept per fixture (several engines/configs share one cache file).
+MAX_ENTRIES_PER_FIXTURE = 8
+
+
+class BacktestCache:
+    """Persistent per-fixture prediction cache shared by every backtest entry point."""
+
+    def __init__(self, path: Path = CACHE_FILE):
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+                if raw.get("schema") == CACHE_SCHEMA:
+                    self._entries = raw.get("entries", {})
+            except Exception as e:
+                print(f"   [BacktestCache] Ignoring unreadable cache: {e}")
+
+    @staticmethod
+    def data_version(*parts: Any) -> str:
+        """Stable digest of the inputs a prediction was computed from."""
+        payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _deps(config: RuleConfig, rules: List[str]) -> Dict[str, Any]:
+        fields = set(ALWAYS_DEPENDS_ON) | set(rules or [])
+        return {f: getattr(config, f) for f in sorted(fields)}
+
+    def get(
+        self,
+        config: RuleConfig,
+        fixture_id: str,
+        data_version: str,
+        calibration: Optional[Dict[str, float]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached result for this fixture/data, or None if any dependency changed."""
+        entries = self._entries.get(str(fixture_id), [])
+        for i, entry in enumerate(entries):
+            if entry["v"] != data_version:
+                continue
+            deps = entry["deps"]
+            if all(getattr(config, k, None) == v for k, v in deps.items()):
+                if i:
+                    entries.insert(0, entries.pop(i))
+                    self._dirty = True
+                self.hits += 1
+                result = dict(entry["result"])
+                if calibration is not None and "confidence_score" in result and not result.get("confidence_capped"):
+                    result["confidence"] = RuleEngine.calibrate_confidence(
+                        result["confidence_score"], calibration,
+                        result.get("calibration_market"), result.get("region_league"),
+                    )
+                return result
+        self.misses += 1
+        return None
+
+    def put(self, config: RuleConfig, fixture_id: str, data_version: str, prediction: Dict[str, Any]):
+        """Record a freshly computed result for this fixture/data."""
+        deps = self._deps(config, prediction.get("rules_fired", []))
+        entry = {
+            "v": data_version,
+            "deps": json.loads(json.dumps(deps, default=str)),
+            "result": {k: prediction[k] for k in RESULT_FIELDS if k in prediction},
+        }
+        key = str(fixture_id)
+        entries = [
+            e for e in self._entries.get(key, [])
+            if not (e["v"] == data_version and e["deps"] == entry["deps"])
+        ]
+        entries.insert(0, entry)
+        self._entries[key] = entries[:MAX_ENTRIES_PER_FIXTURE]
+        self._dirty = True
+
+    def save(self):
+        """Write the cache back to disk (atomic replace) if anything changed."""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"schema": CACHE_SCHEMA, "entries": self._entries}, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except Exception as e:
+            print(f"   [BacktestCache] Failed to save cache: {e}")
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0
+        return f"{self.hits}/{total} cached ({rate:.0f}%)"
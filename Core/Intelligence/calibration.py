@@ -0,0 +1,270 @@
+# calibration.py: Per-market/league probability calibration (isotonic + Platt).
+# Part of LeoBook Core — Intelligence (AI Engine)
+#
+# Classes: ProbabilityCalibrator
+# Called by: rule_engine.py, backtest_cache.py, outcome_reviewer.py, prediction_accuracy.py
+
+"""
+Probability Calibration
+Maps the raw market confidence score produced by BettingMarkets to an observed
+hit probability, per (market option, league) with market-wide and global fallbacks.
+
+Resolved predictions are accumulated as fixed-width score histograms (sufficient
+statistics), so new outcomes are folded in incrementally and only the touched
+keys are refit. Each key is fitted with isotonic regression (PAV over the bins)
+once it has enough samples, Platt scaling below that, and nothing under the
+minimum. Fitted maps are stored as compact arrays; apply() is a bisect, O(log n).
+
+Already-ingested fixtures are remembered only inside a rolling window: match days
+up to SEEN_WINDOW_DAYS before the latest ingested day are closed (the "closed_through"
+high-water mark), rows on closed days are skipped outright, and their ids are
+dropped, so the state stays bounded (one ingested count per closed day remains).
+An outcome resolved after its day closed is not ingested; rows on a closed day
+beyond that day's ingested count are reported as such on every ingest.
+"""
+
+import json
+import math
+import os
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+CALIBRATION_DB = "Data/Store/calibration_models.json"
+
+N_BINS = 20              # Score histogram resolution on [0, 1]
+MIN_SAMPLES_PLATT = 30   # Below this a key has no model (fallback is used)
+MIN_SAMPLES_ISOTONIC = 200
+PROB_FLOOR = 0.01        # Keeps log-loss finite
+SEEN_WINDOW_DAYS = 14    # Match days still open for late-resolved outcomes
+GLOBAL = "GLOBAL"
+
+
+class ProbabilityCalibrator:
+    """Fits, stores and applies calibration maps. State lives in CALIBRATION_DB."""
+
+    _state: Optional[Dict[str, Any]] = None
+    _state_mtime: Optional[float] = None
+
+    # ── Storage ──────────────────────────────────────
+
+    @staticmethod
+    def _load() -> Dict[str, Any]:
+        """Load state, re-reading only when the file changed (cheap per prediction)."""
+        try:
+            mtime = os.path.getmtime(CALIBRATION_DB)
+        except OSError:
+            mtime = None
+        cls = ProbabilityCalibrator
+        if cls._state is None or mtime != cls._state_mtime:
+            state = {"stats": {}, "models": {}, "seen": {}, "closed_through": "", "closed_counts": {}}
+            if mtime is not None:
+                try:
+                    with open(CALIBRATION_DB, "r") as f:
+                        state.update(json.load(f))
+                except Exception as e:
+                    print(f"    [Calibration] Ignoring unreadable models: {e}")
+            if isinstance(state["seen"], list):  # Pre-window format: days are filled in on the next ingest
+                state["seen"] = dict.fromkeys(state["seen"], "")
+            cls._state, cls._state_mtime = state, mtime
+        return cls._state
+
+    @staticmethod
+    def _save(state: Dict[str, Any]):
+        os.makedirs(os.path.dirname(CALIBRATION_DB), exist_ok=True)
+        tmp = CALIBRATION_DB + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, CALIBRATION_DB)
+        ProbabilityCalibrator._state_mtime = os.path.getmtime(CALIBRATION_DB)
+
+    @staticmethod
+    def _day(date_str: str) -> str:
+        """Match date (DD.MM.YYYY or YYYY-MM-DD) as a sortable YYYY-MM-DD, '' if unparseable."""
+        for fmt in ("%d.%m.%Y", "%Y-%m-%d"):
+            try:
+                return datetime.strptime(date_str or "", fmt).strftime("%Y-%m-%d")
+            except ValueError:
+                continue
+        return ""
+
+    @staticmethod
+    def _keys(market: str, league: str) -> List[str]:
+        """Most specific first: market+league, market-wide, global."""
+        return [f"{market}|{league or GLOBAL}", f"{market}|{GLOBAL}", f"{GLOBAL}|{GLOBAL}"]
+
+    # ── Fitting ──────────────────────────────────────
+
+    @staticmethod
+    def _fit_isotonic(counts: np.ndarray, positives: np.ndarray) -> Dict[str, Any]:
+        """Pool-adjacent-violators over the histogram; returns block upper edges and rates."""
+        blocks: List[List[float]] = []  # [positives, count, upper_edge]
+        for i in np.nonzero(counts)[0]:
+            blocks.append([float(positives[i]), float(counts[i]), (i + 1) / N_BINS])
+            while len(blocks) > 1 and blocks[-2][0] / blocks[-2][1] > blocks[-1][0] / blocks[-1][1]:
+                p, c, edge = blocks.pop()
+                blocks[-1][0] += p
+                blocks[-1][1] += c
+                blocks[-1][2] = edge
+        xs = [round(b[2], 4) for b in blocks]
+        xs[-1] = 1.0
+        ys = [round(min(max(b[0] / b[1], PROB_FLOOR), 1 - PROB_FLOOR), 4) for b in blocks]
+        return {"m": "iso", "x": xs, "y": ys}
+
+    @staticmethod
+    def _fit_platt(counts: np.ndarray, positives: np.ndarray) -> Dict[str, Any]:
+        """Weighted logistic fit p = sigmoid(a*s + b) on bin centres (Newton / IRLS)."""
+        centres = (np.arange(N_BINS) + 0.5) / N_BINS
+        n_pos, n_neg = positives.sum(), counts.sum() - positives.sum()
+        # Platt's smoothed targets guard against over-confident maps on small samples
+        t_hi, t_lo = (n_pos + 1) / (n_pos + 2), 1 / (n_neg + 2)
+        X = np.column_stack([centres, np.ones(N_BINS)])
+        # Each bin contributes its positives at t_hi and its negatives at t_lo
+        w = counts.astype(float)
+        t = np.divide(positives * t_hi + (counts - positives) * t_lo, counts,
+                      out=np.full(N_BINS, 0.5), where=counts > 0)
+        theta = np.zeros(2)
+        for _ in range(25):
+            p = 1 / (1 + np.exp(-X @ theta))
+            grad = X.T @ (w * (p - t))
+            hess = X.T @ (X * (w * p * (1 - p))[:, None]) + 1e-6 * np.eye(2)
+            step = np.linalg.solve(hess, grad)
+            theta -= step
+            if np.abs(step).max() < 1e-6:
+                break
+        return {"m": "platt", "a": round(float(theta[0]), 5), "b": round(float(theta[1]), 5)}
+
+    @staticmethod
+    def _fit(stat: Dict[str, List[int]]) -> Optional[Dict[str, Any]]:
+        counts = np.asarray(stat["n"])
+        positives = np.asarray(stat["p"])
+        total = int(counts.sum())
+        if total < MIN_SAMPLES_PLATT:
+            return None
+        model = (ProbabilityCalibrator._fit_isotonic(counts, positives) if total >= MIN_SAMPLES_ISOTONIC
+                 else ProbabilityCalibrator._fit_platt(counts, positives))
+        model["n"] = total
+        return model
+
+    @staticmethod
+    def ingest(observations: Iterable[Tuple[str, str, str, float, bool, str]]) -> int:
+        """
+        Fold resolved predictions (fixture_id, market, league, raw_score, correct, match_date)
+        into the histograms and refit only the keys they touched.
+        Fixtures already ingested or on closed days are skipped. Returns the number of new observations.
+        """
+        state = ProbabilityCalibrator._load()
+        seen: Dict[str, str] = state["seen"]
+        closed = state["closed_through"]
+        closed_counts: Dict[str, int] = state["closed_counts"]
+        dirty = set()
+        added = 0
+        changed = False
+        on_closed: Dict[str, int] = {}
+        for fixture_id, market, league, score, correct, date in observations:
+            day = ProbabilityCalibrator._day(date)
+            if day and closed and day <= closed:
+                on_closed[day] = on_closed.get(day, 0) + 1
+                continue
+            if fixture_id in seen:
+                if day and not seen[fixture_id]:
+                    seen[fixture_id] = day  # Id from the pre-window format: learn its day so it can be dropped
+                    changed = True
+                continue
+            seen[fixture_id] = day
+            b = min(int(max(score, 0.0) * N_BINS), N_BINS - 1)
+            for key in ProbabilityCalibrator._keys(market, league):
+                stat = state["stats"].setdefault(key, {"n": [0] * N_BINS, "p": [0] * N_BINS})
+                stat["n"][b] += 1
+                stat["p"][b] += int(bool(correct))
+                dirty.add(key)
+            added += 1
+
+        # Advance the high-water mark and forget the ids on the days it closed
+        days = [d for d in seen.values() if d]
+        if days:
+            through = (datetime.strptime(max(days), "%Y-%m-%d") - timedelta(days=SEEN_WINDOW_DAYS)).strftime("%Y-%m-%d")
+            if through > closed:
+                state["closed_through"] = through
+                for fixture_id in [f for f, d in seen.items() if d and d <= through]:
+                    closed_day = seen.pop(fixture_id)
+                    closed_counts[closed_day] = closed_counts.get(closed_day, 0) + 1  # What each closed day ingested
+                changed = True
+
+        # Rows on a closed day beyond what that day ingested were resolved after it closed
+        # (days closed before the counts were kept have no entry and are not judged)
+        late = sum(max(n - closed_counts[day], 0) for day, n in on_closed.items() if day in closed_counts)
+        if late:
+            print(f"    [Calibration] Skipped {late} outcomes resolved after their day closed (through {closed}).")
+        if not (added or changed):
+            return 0
+        for key in dirty:
+            model = ProbabilityCalibrator._fit(state["stats"][key])
+            if model:
+                state["models"][key] = model
+        ProbabilityCalibrator._save(state)
+        if added:
+            print(f"    [Calibration] Ingested {added} outcomes, refit {len(dirty)} maps.")
+        return added
+
+    @staticmethod
+    def ingest_predictions(rows: Iterable[Dict[str, Any]]) -> int:
+        """Ingest resolved predictions.csv rows that carry a raw confidence_score."""
+        from Data.Access.prediction_accuracy import get_market_option
+
+        def observations():
+            for row in rows:
+                if row.get("outcome_correct") not in ("True", "False"):
+                    continue
+                try:
+                    score = float(row.get("confidence_score") or "")
+                except ValueError:
+                    continue
+                market = get_market_option(row.get("prediction", ""), row.get("home_team", ""), row.get("away_team", ""))
+                yield (row.get("fixture_id"), market, row.get("region_league", GLOBAL), score,
+                       row.get("outcome_correct") == "True", row.get("date", ""))
+        return ProbabilityCalibrator.ingest(observations())
+
+    # ── Application ──────────────────────────────────
+
+    @staticmethod
+    def _eval(model: Dict[str, Any], score: float) -> float:
+        if model["m"] == "iso":
+            xs = model["x"]
+            return model["y"][min(bisect_left(xs, score), len(xs) - 1)]
+        z = model["a"] * score + model["b"]
+        return 1 / (1 + math.exp(-z))
+
+    @staticmethod
+    def apply(market: str, league: str, score: float) -> Optional[float]:
+        """Calibrated probability for a raw score, or None if no map covers this market."""
+        models = ProbabilityCalibrator._load()["models"]
+        for key in ProbabilityCalibrator._keys(market, league):
+            model = models.get(key)
+            if model:
+                return ProbabilityCalibrator._eval(model, score)
+        return None
+
+    # ── Diagnostics ──────────────────────────────────
+
+    @staticmethod
+    def evaluate(samples: List[Tuple[float, bool]], n_bins: int = 10) -> Dict[str, Any]:
+        """Brier score, log-loss and reliability bins for (probability, outcome) pairs."""
+        if not samples:
+            return {"n": 0, "brier": None, "log_loss": None, "bins": []}
+        probs = np.clip(np.array([s[0] for s in samples], dtype=float), PROB_FLOOR, 1 - PROB_FLOOR)
+        outcomes = np.array([1.0 if s[1] else 0.0 for s in samples])
+        brier = float(np.mean((probs - outcomes) ** 2))
+        log_loss = float(-np.mean(outcomes * np.log(probs) + (1 - outcomes) * np.log(1 - probs)))
+        idx = np.minimum((probs * n_bins).astype(int), n_bins - 1)
+        bins = []
+        for b in range(n_bins):
+            mask = idx == b
+            if mask.any():
+                bins.append({
+                    "lo": b / n_bins, "hi": (b + 1) / n_bins, "n": int(mask.sum()),
+                    "predicted": float(probs[mask].mean()), "observed": float(outcomes[mask].mean()),
+                })
+        return {"n": len(samples), "brier": brier, "log_loss": log_loss, "bins": bins}
@@ -11,7 +11,7 @@ checks outcomes, updates learning weights, and tracks accuracy evolution.
 """
 
 import csv
-import os
+import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from pathlib import Path
@@ -19,6 +19,7 @@ from collections import defaultdict
 
 from Core.Intelligence.rule_engine_manager import RuleEngineManager
 from Core.Intelligence.learning_engine import LearningEngine
+from Core.Intelligence.backtest_cache import BacktestCache
 from Data.Access.db_helpers import get_all_schedules, get_standings
 from Data.Access.prediction_evaluator import evaluate_prediction
 
@@ -93,6 +94,7 @@ def _build_vision_data(
             "region_league": region_league,
         },
         "standings": standings_cache[region_league],
+        "match_date": match.get("date", ""),
     }
 
 
@@ -162,6 +164,18 @@ async def run_progressive_backtest(
     finished.sort(key=lambda x: x["_parsed_date"])
     print(f"   Total finished matches: {len(finished)}")
 
+    matches_by_day: Dict[Any, List[Dict]] = defaultdict(list)
+    for m in finished:
+        matches_by_day[m["_parsed_date"].date()].append(m)
+
+    # Cached results are reused when the history before the day and the
+    # league's standings are unchanged (see BacktestCache).
+    cache = BacktestCache()
+    history_hash = hashlib.sha1()
+    hist_idx = 0
+    standings_cache: Dict[str, List[Dict]] = {}
+    standings_version: Dict[str, str] = {}
+
     # Set up output CSV
     backtest_csv = DATA_DIR / f"backtest_{engine_id}.csv"
     csv_headers = [
@@ -188,13 +202,19 @@ async def run_progressive_backtest(
             day_str = current_day.strftime("%Y-%m-%d")
 
             # Matches ON this day (with results)
-            today_matches = [m for m in finished if m["_parsed_date"].date() == current_day.date()]
+            today_matches = matches_by_day.get(current_day.date(), [])
 
             # Historical matches BEFORE this day (available for prediction)
-            historical = [m for m in finished if m["_parsed_date"] < current_day]
-            historical.sort(key=lambda x: x["_parsed_date"], reverse=True)
-
-            standings_cache: Dict[str, List[Dict]] = {}
+            while hist_idx < len(finished) and finished[hist_idx]["_parsed_date"] < current_day:
+                h = finished[hist_idx]
+                history_hash.update(
+                    f"{h.get('date')}|{h.get('home_team')}|{h.get('away_team')}|"
+                    f"{h.get('home_score')}|{h.get('away_score')}\n".encode("utf-8")
+                )
+                hist_idx += 1
+            historical = finished[:hist_idx][::-1]
+            day_version = history_hash.hexdigest()
+            calibration_cache: Dict[str, Any] = {}
 
             for match in today_matches:
                 home, away = match.get("home_team", ""), match.get("away_team", "")
@@ -212,13 +232,28 @@ async def run_progressive_backtest(
                     skipped += 1
                     continue
 
-                # Build vision data and predict
-                vision = _build_vision_data(match, historical[:500], standings_cache)
-                try:
-                    prediction = RuleEngine.analyze(vision, config=config)
-                except Exception:
-                    skipped += 1
-                    continue
+                league = match.get("region_league", "Unknown")
+                if league not in standings_version:
+                    standings_version[league] = BacktestCache.data_version(
+                        sorted(map(str, get_standings(league)))
+                    )
+                if league not in calibration_cache:
+                    calibration_cache[league] = LearningEngine.load_weights(
+                        league, engine_id=config.id
+                    ).get("confidence_calibration", {})
+                data_version = BacktestCache.data_version(day_version, standings_version[league])
+
+                # Build vision data and predict (unless an identical run is cached)
+                fixture_id = match.get("fixture_id") or f"{day_str}|{home}|{away}"
+                prediction = cache.get(config, fixture_id, data_version, calibration_cache[league])
+                if prediction is None:
+                    vision = _build_vision_data(match, historical[:500], standings_cache)
+                    try:
+                        prediction = RuleEngine.analyze(vision, config=config)
+                    except Exception:
+                        skipped += 1
+                        continue
+                    cache.put(config, fixture_id, data_version, prediction)
 
                 if prediction.get("type") == "SKIP":
                     skipped += 1
@@ -266,6 +301,8 @@ async def run_progressive_backtest(
 
             current_day += timedelta(days=1)
 
+    cache.save()
+
     # Final summary
     win_rate = (correct / total * 100) if total > 0 else 0
     period_str = f"{start_dt.strftime('%Y-%m-%d')} → {end_dt.strftime('%Y-%m-%d')}"
@@ -275,6 +312,7 @@ async def run_progressive_backtest(
     print(f"   Period: {period_str}")
     print(f"   Predictions: {total} | Correct: {correct} | Skipped: {skipped}")
     print(f"   Win Rate: {win_rate:.1f}%")
+    print(f"   Cache: {cache.summary()}")
     print(f"   Results: {backtest_csv}\n")
 
     # Update engine accuracy
@@ -20,8 +20,37 @@ from .goal_predictor import GoalPredictor
 from .betting_markets import BettingMarkets
 
 from .rule_config import RuleConfig
+from .calibration import ProbabilityCalibrator
+from Data.Access.prediction_accuracy import get_market_option
 
 class RuleEngine:
+    @staticmethod
+    def calibrate_confidence(raw_conf: float, confidence_calibration: Dict[str, float],
+                             market: str = None, league: str = None) -> str:
+        """
+        Map a raw market confidence score to a label. A fitted per-market/league
+        probability map (ProbabilityCalibrator) is preferred; otherwise the league's
+        coarse per-level calibration from LearningEngine is used.
+        """
+        calibrated_score = ProbabilityCalibrator.apply(market, league, raw_conf) if market else None
+        if calibrated_score is not None:
+            return RuleEngine._confidence_label(calibrated_score)
+
+        if raw_conf > 0.8: base_conf = "Very High"
+        elif raw_conf > 0.65: base_conf = "High"
+        elif raw_conf > 0.5: base_conf = "Medium"
+        else: base_conf = "Low"
+
+        calibrated_score = confidence_calibration.get(base_conf, raw_conf) # Use calibrated expectation if available
+        return RuleEngine._confidence_label(calibrated_score)
+
+    @staticmethod
+    def _confidence_label(calibrated_score: float) -> str:
+        if calibrated_score > 0.75: return "Very High"
+        elif calibrated_score > 0.60: return "High"
+        elif calibrated_score > 0.45: return "Medium"
+        return "Low"
+
     @staticmethod
     def analyze(vision_data: Dict[str, Any], config: RuleConfig = None) -> Dict[str, Any]:
         """
@@ -48,8 +77,16 @@ class RuleEngine:
         away_form = [m for m in h2h_data.get("away_last_10_matches", []) if m][:10]
         h2h_raw = h2h_data.get("head_to_head", [])
 
-        # Filter H2H based on config
-        cutoff = datetime.now() - timedelta(days=config.h2h_lookback_days)
+        # Filter H2H based on config, looking back from the fixture's own date when the caller
+        # supplies it (backtests: deterministic per fixture, so cached results stay valid)
+        anchor = datetime.now()
+        for fmt in ("%d.%m.%Y", "%Y-%m-%d"):
+            try:
+                anchor = datetime.strptime(vision_data.get("match_date") or "", fmt)
+                break
+            except ValueError:
+                continue
+        cutoff = anchor - timedelta(days=config.h2h_lookback_days)
         h2h = []
         for m in h2h_raw:
             if not m:
@@ -90,15 +127,23 @@ class RuleEngine:
         home_score = away_score = draw_score = over25_score = 0
         reasoning = []
 
+        # Track which config weights actually contributed, so cached backtest
+        # results can be invalidated only when one of those weights changes.
+        fired = set()
+
+        def vote(rule: str) -> float:
+            fired.add(rule)
+            return getattr(config, rule)
+
         # Incorporate xG into voting
         if home_xg > away_xg + 0.5:
-            home_score += config.xg_advantage
+            home_score += vote("xg_advantage")
             reasoning.append(f"{home_team} has xG advantage")
         elif away_xg > home_xg + 0.5:
-            away_score += config.xg_advantage
+            away_score += vote("xg_advantage")
             reasoning.append(f"{away_team} has xG advantage")
         elif abs(home_xg - away_xg) < 0.3:
-            draw_score += config.xg_draw
+            draw_score += vote("xg_draw")
             reasoning.append("Close xG suggests draw")
 
         home_slug = home_team.replace(" ", "_").upper()
@@ -106,45 +151,45 @@ class RuleEngine:
 
         # H2H signals
         if any(t.startswith(f"{home_slug}_WINS_H2H") for t in h2h_tags):
-            home_score += config.h2h_home_win; reasoning.append(f"{home_team} strong in H2H")
+            home_score += vote("h2h_home_win"); reasoning.append(f"{home_team} strong in H2H")
         if any(t.startswith(f"{away_slug}_WINS_H2H") for t in h2h_tags):
-            away_score += config.h2h_away_win; reasoning.append(f"{away_team} strong in H2H")
+            away_score += vote("h2h_away_win"); reasoning.append(f"{away_team} strong in H2H")
         if any(t.startswith("H2H_D") for t in h2h_tags):
-            draw_score += config.h2h_draw; reasoning.append("H2H suggests Draw")
+            draw_score += vote("h2h_draw"); reasoning.append("H2H suggests Draw")
         if any(t in h2h_tags for t in ["H2H_O25", "H2H_O25_third"]):
-            over25_score += config.h2h_over25
+            over25_score += vote("h2h_over25")
 
         # Standings signals
         if f"{home_slug}_TOP3" in standings_tags and f"{away_slug}_BOTTOM5" in standings_tags:
-            home_score += config.standings_top_vs_bottom; reasoning.append(f"Top ({home_team}) vs Bottom ({away_team})")
+            home_score += vote("standings_top_vs_bottom"); reasoning.append(f"Top ({home_team}) vs Bottom ({away_team})")
         if f"{away_slug}_TOP3" in standings_tags and f"{home_slug}_BOTTOM5" in standings_tags:
-            away_score += config.standings_top_vs_bottom; reasoning.append(f"Top ({away_team}) vs Bottom ({home_team})")
+            away_score += vote("standings_top_vs_bottom"); reasoning.append(f"Top ({away_team}) vs Bottom ({home_team})")
         
-        if f"{home_slug}_TABLE_ADV8+" in standings_tags: home_score += config.standings_table_advantage
-        if f"{away_slug}_TABLE_ADV8+" in standings_tags: away_score += config.standings_table_advantage
+        if f"{home_slug}_TABLE_ADV8+" in standings_tags: home_score += vote("standings_table_advantage")
+        if f"{away_slug}_TABLE_ADV8+" in standings_tags: away_score += vote("standings_table_advantage")
         
-        if f"{home_slug}_GD_POS_STRONG" in standings_tags: home_score += config.standings_gd_strong; reasoning.append(f"{home_team} has strong GD")
-        if f"{away_slug}_GD_POS_STRONG" in standings_tags: away_score += config.standings_gd_strong; reasoning.append(f"{away_team} has strong GD")
-        if f"{home_slug}_GD_NEG_WEAK" in standings_tags: away_score += config.standings_gd_weak; reasoning.append(f"{home_team} has weak GD")
-        if f"{away_slug}_GD_NEG_WEAK" in standings_tags: home_score += config.standings_gd_weak; reasoning.append(f"{away_team} has weak GD")
+        if f"{home_slug}_GD_POS_STRONG" in standings_tags: home_score += vote("standings_gd_strong"); reasoning.append(f"{home_team} has strong GD")
+        if f"{away_slug}_GD_POS_STRONG" in standings_tags: away_score += vote("standings_gd_strong"); reasoning.append(f"{away_team} has strong GD")
+        if f"{home_slug}_GD_NEG_WEAK" in standings_tags: away_score += vote("standings_gd_weak"); reasoning.append(f"{home_team} has weak GD")
+        if f"{away_slug}_GD_NEG_WEAK" in standings_tags: home_score += vote("standings_gd_weak"); reasoning.append(f"{away_team} has weak GD")
 
         # Form signals
-        if f"{home_slug}_FORM_S2+" in home_tags: home_score += config.form_score_2plus; over25_score += 2; reasoning.append(f"{home_team} scores 2+ often")
-        if f"{away_slug}_FORM_S2+" in away_tags: away_score += config.form_score_2plus; over25_score += 2; reasoning.append(f"{away_team} scores 2+ often")
-        if f"{home_slug}_FORM_S3+" in home_tags: home_score += config.form_score_3plus; over25_score += 1
-        if f"{away_slug}_FORM_S3+" in away_tags: away_score += config.form_score_3plus; over25_score += 1
+        if f"{home_slug}_FORM_S2+" in home_tags: home_score += vote("form_score_2plus"); over25_score += 2; reasoning.append(f"{home_team} scores 2+ often")
+        if f"{away_slug}_FORM_S2+" in away_tags: away_score += vote("form_score_2plus"); over25_score += 2; reasoning.append(f"{away_team} scores 2+ often")
+        if f"{home_slug}_FORM_S3+" in home_tags: home_score += vote("form_score_3plus"); over25_score += 1
+        if f"{away_slug}_FORM_S3+" in away_tags: away_score += vote("form_score_3plus"); over25_score += 1
 
-        if f"{away_slug}_FORM_C2+" in away_tags: home_score += config.form_concede_2plus; over25_score += 2; reasoning.append(f"{away_team} concedes 2+ often")
-        if f"{home_slug}_FORM_C2+" in home_tags: away_score += config.form_concede_2plus; over25_score += 2; reasoning.append(f"{home_team} concedes 2+ often")
+        if f"{away_slug}_FORM_C2+" in away_tags: home_score += vote("form_concede_2plus"); over25_score += 2; reasoning.append(f"{away_team} concedes 2+ often")
+        if f"{home_slug}_FORM_C2+" in home_tags: away_score += vote("form_concede_2plus"); over25_score += 2; reasoning.append(f"{home_team} concedes 2+ often")
 
-        if f"{home_slug}_FORM_SNG" in home_tags: away_score += config.form_no_score; reasoning.append(f"{home_team} fails to score")
-        if f"{away_slug}_FORM_SNG" in away_tags: home_score += config.form_no_score; reasoning.append(f"{away_team} fails to score")
+        if f"{home_slug}_FORM_SNG" in home_tags: away_score += vote("form_no_score"); reasoning.append(f"{home_team} fails to score")
+        if f"{away_slug}_FORM_SNG" in away_tags: home_score += vote("form_no_score"); reasoning.append(f"{away_team} fails to score")
 
-        if f"{home_slug}_FORM_CS" in home_tags: home_score += config.form_clean_sheet; reasoning.append(f"{home_team} has strong defense")
-        if f"{away_slug}_FORM_CS" in away_tags: away_score += config.form_clean_sheet; reasoning.append(f"{away_team} has strong defense")
+        if f"{home_slug}_FORM_CS" in home_tags: home_score += vote("form_clean_sheet"); reasoning.append(f"{home_team} has strong defense")
+        if f"{away_slug}_FORM_CS" in away_tags: away_score += vote("form_clean_sheet"); reasoning.append(f"{away_team} has strong defense")
 
-        if any("vs_top" in t.lower() and "_w" in t.lower() for t in home_tags): home_score += config.form_vs_top_win
-        if any("vs_top" in t.lower() and "_w" in t.lower() for t in away_tags): away_score += config.form_vs_top_win
+        if any("vs_top" in t.lower() and "_w" in t.lower() for t in home_tags): home_score += vote("form_vs_top_win")
+        if any("vs_top" in t.lower() and "_w" in t.lower() for t in away_tags): away_score += vote("form_vs_top_win")
 
         # Calculate probabilities
         keys = ["0", "1", "2", "3+"]
@@ -187,28 +232,18 @@ class RuleEngine:
              best_prediction = list(betting_markets.values())[0]
 
         if not best_prediction:
-             return {"type": "SKIP", "confidence": "Low", "reason": ["No valid markets"]}
+             return {"type": "SKIP", "confidence": "Low", "reason": ["No valid markets"], "rules_fired": sorted(fired)}
 
         # Format prediction text
         prediction_text = best_prediction["market_prediction"]
         
         # Confidence Calibration (League Specific)
-        confidence_calibration = weights.get("confidence_calibration", {})
-        # Map score to category
         raw_conf = best_prediction.get("confidence_score", 0.5)
-        
-        if raw_conf > 0.8: base_conf = "Very High"
-        elif raw_conf > 0.65: base_conf = "High"
-        elif raw_conf > 0.5: base_conf = "Medium"
-        else: base_conf = "Low"
-        
-        calibrated_score = confidence_calibration.get(base_conf, raw_conf) # Use calibrated expectation if available
-        
-        # Final Confidence Label
-        if calibrated_score > 0.75: final_confidence = "Very High"
-        elif calibrated_score > 0.60: final_confidence = "High"
-        elif calibrated_score > 0.45: final_confidence = "Medium"
-        else: final_confidence = "Low"
+        calibration_market = get_market_option(prediction_text, home_team, away_team)
+        final_confidence = RuleEngine.calibrate_confidence(
+            raw_conf, weights.get("confidence_calibration", {}), calibration_market, region_league
+        )
+        confidence_capped = False
 
         # --- DATA INTEGRITY SANITY CHECKS ---
         # 1. Contradiction Check: Heavily favored by xG vs Prediction
@@ -216,29 +251,33 @@ class RuleEngine:
         if f"{away_team.lower()} to win" in primary_pred or f"{away_team.lower()} or draw" in primary_pred:
             if home_xg > away_xg + 1.25 and "over 0.5" not in primary_pred: # Allow over markets, block win markets
                 reasoning.append(f"WARNING: Contradicts xG ({home_xg} vs {away_xg})")
-                final_confidence = "Low"
+                final_confidence = "Low"; confidence_capped = True
                 # Optionally forceful SKIP
                 if "win" in primary_pred:
-                     return {"type": "SKIP", "confidence": "Low", "reason": [f"Contradiction: Pred Away Win but {home_team} xG dominance"]}
+                     return {"type": "SKIP", "confidence": "Low", "reason": [f"Contradiction: Pred Away Win but {home_team} xG dominance"], "rules_fired": sorted(fired)}
 
         if f"{home_team.lower()} to win" in primary_pred or f"{home_team.lower()} or draw" in primary_pred:
             if away_xg > home_xg + 1.25 and "over 0.5" not in primary_pred:
                  reasoning.append(f"WARNING: Contradicts xG ({home_xg} vs {away_xg})")
-                 final_confidence = "Low"
+                 final_confidence = "Low"; confidence_capped = True
                  if "win" in primary_pred:
-                     return {"type": "SKIP", "confidence": "Low", "reason": [f"Contradiction: Pred Home Win but {away_team} xG dominance"]}
+                     return {"type": "SKIP", "confidence": "Low", "reason": [f"Contradiction: Pred Home Win but {away_team} xG dominance"], "rules_fired": sorted(fired)}
 
         # 2. Score sanity
         if scores:
              most_prob_score = scores[0]["score"]
              if most_prob_score == "0-0" and "over 2.5" in primary_pred:
-                 final_confidence = "Low" # Contradiction
+                 final_confidence = "Low"; confidence_capped = True # Contradiction
 
         return {
             "market_prediction": prediction_text,
             "type": prediction_text,
             "market_type": best_prediction["market_type"],
             "confidence": final_confidence,
+            "confidence_score": raw_conf,
+            "confidence_capped": confidence_capped,
+            "calibration_market": calibration_market,
+            "region_league": region_league,
             "reason": reasoning[:3],
             "xg_home": round(home_xg, 2),
             "xg_away": round(away_xg, 2),
@@ -256,4 +295,5 @@ class RuleEngine:
             "home_form_n": len(home_form),
             "away_form_n": len(away_form),
             "total_xg": round(home_xg + away_xg, 2),
+            "rules_fired": sorted(fired),
         }
@@ -0,0 +1,204 @@
+# concurrency.py: Adaptive (AIMD) concurrency limit driven by memory, CPU, failure and latency samples.
+# Part of LeoBook Core — Utilities
+#
+# Classes: ConcurrencyController
+# Functions: report_outcome(), sample_resources()
+# Called by: utils.py (BatchProcessor), manager.py, enrich_all_schedules.py (enrichment + league harvesting)
+
+"""
+Concurrency Controller
+A resizable semaphore whose limit follows the machine instead of a hard-coded count.
+Every task runs inside slot(), which times it and records ok / error / timeout.
+Every AIMD_ADJUST_S seconds the controller samples the host and the window of
+finished tasks, then:
+  - halves the limit on memory pressure (system memory >= AIMD_MEM_HIGH_PCT, or the
+    process tree incl. browsers >= AIMD_RSS_LIMIT_MB) or when the timeout / error
+    rate of the window reaches AIMD_TIMEOUT_RATE / AIMD_ERROR_RATE;
+  - adds one slot when the limit was actually reached, CPU and memory have headroom
+    and the median task latency is not rising against its baseline;
+  - otherwise holds.
+Tasks that catch their own exceptions call report_outcome() so the failure still counts.
+psutil is optional: without it memory and CPU come from /proc/meminfo and the load
+average, and the process-tree RSS check is skipped. ADAPTIVE_CONCURRENCY=0 pins the limit.
+"""
+
+import asyncio
+import os
+import statistics
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple, Union
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+ADAPTIVE_ENABLED = os.getenv("ADAPTIVE_CONCURRENCY", "1") != "0"
+ADJUST_INTERVAL = float(os.getenv("AIMD_ADJUST_S", "10"))
+MIN_SAMPLES = int(os.getenv("AIMD_MIN_SAMPLES", "4"))
+MEM_HIGH_PCT = float(os.getenv("AIMD_MEM_HIGH_PCT", "85"))
+CPU_HIGH_PCT = float(os.getenv("AIMD_CPU_HIGH_PCT", "85"))
+RSS_LIMIT_MB = float(os.getenv("AIMD_RSS_LIMIT_MB", "0"))  # 0 = no process-tree cap
+TIMEOUT_RATE = float(os.getenv("AIMD_TIMEOUT_RATE", "0.2"))
+ERROR_RATE = float(os.getenv("AIMD_ERROR_RATE", "0.3"))
+LATENCY_RISE = float(os.getenv("AIMD_LATENCY_RISE", "1.5"))  # Median vs baseline that blocks growth
+
+# Outcome of the task running in the current slot (set by slot(), read back on exit)
+_current_outcome: ContextVar[Optional[Dict[str, str]]] = ContextVar("_current_outcome", default=None)
+
+
+def _classify(exc: BaseException) -> str:
+    # asyncio.TimeoutError and Playwright's TimeoutError both carry "Timeout" in the name
+    return "timeout" if "Timeout" in type(exc).__name__ else "error"
+
+
+def report_outcome(outcome: Union[str, BaseException]):
+    """Mark the current slot's task as failed ("error" / "timeout", or the exception it caught)."""
+    current = _current_outcome.get()
+    if current is not None:
+        current["outcome"] = outcome if isinstance(outcome, str) else _classify(outcome)
+
+
+def _meminfo_percent() -> float:
+    try:
+        info = {}
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                info[key] = int(value.split()[0])
+        return 100.0 * (1 - info["MemAvailable"] / info["MemTotal"])
+    except Exception:
+        return 0.0
+
+
+def sample_resources() -> Dict[str, float]:
+    """System memory %, CPU % and this process tree's RSS in MB (0 without psutil)."""
+    if HAS_PSUTIL:
+        rss = 0
+        try:
+            me = psutil.Process()
+            for proc in [me] + me.children(recursive=True):
+                try:
+                    rss += proc.memory_info().rss
+                except psutil.Error:
+                    continue  # Exited between listing and sampling
+        except psutil.Error:
+            pass
+        return {"mem_pct": psutil.virtual_memory().percent, "cpu_pct": psutil.cpu_percent(None),
+                "rss_mb": rss / (1024 * 1024)}
+    try:
+        cpu = 100.0 * os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        cpu = 0.0
+    return {"mem_pct": _meminfo_percent(), "cpu_pct": cpu, "rss_mb": 0.0}
+
+
+class ConcurrencyController:
+    """AIMD-resized concurrency limit shared by every task of one workload."""
+
+    def __init__(self, name: str, initial: int, min_limit: int = 1, max_limit: Optional[int] = None):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit if max_limit is not None else initial * 2)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.increases = 0
+        self.decreases = 0
+        self.completed = 0
+        self._active = 0
+        self._peak = 0  # Most slots in use at once during the current window
+        self._cond = asyncio.Condition()
+        self._window: List[Tuple[float, str]] = []
+        self._baseline: Optional[float] = None  # Typical task latency when healthy
+        self._last_adjust = time.monotonic()
+        if HAS_PSUTIL:
+            psutil.cpu_percent(None)  # First call only primes the counter
+
+    # ── Slots ────────────────────────────────────────
+
+    async def _acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+            self._peak = max(self._peak, self._active)
+
+    async def _release(self):
+        async with self._cond:
+            self._active -= 1
+            self._cond.notify_all()  # The limit may have grown by more than one free slot
+
+    @asynccontextmanager
+    async def slot(self):
+        """Run one task under the current limit and record its latency and outcome."""
+        await self._acquire()
+        current = {"outcome": "ok"}
+        token = _current_outcome.set(current)
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            current["outcome"] = _classify(e)
+            raise
+        finally:
+            _current_outcome.reset(token)
+            self.record(time.monotonic() - start, current["outcome"])
+            await self._release()
+
+    # ── AIMD ─────────────────────────────────────────
+
+    def record(self, latency: float, outcome: str = "ok"):
+        """Add one finished task to the window and adjust the limit when the interval is up."""
+        self.completed += 1
+        self._window.append((latency, outcome))
+        if ADAPTIVE_ENABLED and time.monotonic() - self._last_adjust >= ADJUST_INTERVAL:
+            self._adjust()
+
+    def _decide(self, resources: Dict[str, float]) -> Tuple[int, str]:
+        """(new limit, reason) for the current window."""
+        if resources["mem_pct"] >= MEM_HIGH_PCT:
+            return max(self.min_limit, self.limit // 2), f"memory {resources['mem_pct']:.0f}%"
+        if RSS_LIMIT_MB and resources["rss_mb"] >= RSS_LIMIT_MB:
+            return max(self.min_limit, self.limit // 2), f"rss {resources['rss_mb']:.0f}MB"
+        if len(self._window) < MIN_SAMPLES:
+            return self.limit, "too few samples"
+
+        outcomes = [o for _, o in self._window]
+        timeout_rate = outcomes.count("timeout") / len(outcomes)
+        error_rate = outcomes.count("error") / len(outcomes)
+        if timeout_rate >= TIMEOUT_RATE:
+            return max(self.min_limit, self.limit // 2), f"timeouts {timeout_rate:.0%}"
+        if error_rate >= ERROR_RATE:
+            return max(self.min_limit, self.limit // 2), f"errors {error_rate:.0%}"
+
+        median = statistics.median(latency for latency, o in self._window if o == "ok") if "ok" in outcomes else None
+        rising = median is not None and self._baseline is not None and median > self._baseline * LATENCY_RISE
+        if median is not None and not rising:
+            self._baseline = median if self._baseline is None else 0.8 * self._baseline + 0.2 * median
+        if rising:
+            return self.limit, f"latency {median:.1f}s vs {self._baseline:.1f}s"
+        if resources["cpu_pct"] >= CPU_HIGH_PCT:
+            return self.limit, f"cpu {resources['cpu_pct']:.0f}%"
+        if self._peak < self.limit:
+            return self.limit, "limit not reached"
+        return min(self.max_limit, self.limit + 1), "headroom"
+
+    def _adjust(self):
+        new_limit, reason = self._decide(sample_resources())
+        if new_limit != self.limit:
+            if new_limit > self.limit:
+                self.increases += 1
+            else:
+                self.decreases += 1
+            print(f"    [AIMD:{self.name}] Concurrency {self.limit} -> {new_limit} ({reason})")
+            self.limit = new_limit
+        if reason != "too few samples":
+            self._window = []
+            self._peak = self._active
+        self._last_adjust = time.monotonic()
+
+    def summary(self) -> str:
+        return (f"limit {self.limit} (range {self.min_limit}-{self.max_limit}), {self.completed} tasks, "
+                f"+{self.increases}/-{self.decreases} adjustments")
+
@@ -1,28 +1,38 @@
 # utils.py: utils.py: General-purpose utility functions and system helpers.
 # Part of LeoBook Core — Utilities
 #
-# Classes: Tee, BatchProcessor
+# Classes: Tee, PagePool, BatchProcessor
 # Functions: log_error_state(), capture_debug_snapshot()
 
 """
 Utilities Module
 General-purpose utility functions and classes for the LeoBook system.
 Responsible for error logging, batch processing, and system utilities.
+
+BatchProcessor can hand each task a warm page from a PagePool instead of the
+task creating (and tearing down) its own browser context, and run under a
+ConcurrencyController (Core/Utils/concurrency.py) instead of a fixed semaphore.
 """
 
 import asyncio
+import os
 import sys
 import traceback
+from contextlib import asynccontextmanager
 from datetime import datetime as dt
 from pathlib import Path
-from typing import Callable, List, TypeVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from playwright.async_api import Browser, BrowserContext, Page
 
-from playwright.async_api import Page
+from Core.Utils.concurrency import ConcurrencyController
 
 T = TypeVar('T')
 LOG_DIR = Path("Logs")
 ERROR_LOG_DIR = LOG_DIR / "Error" # Corrected to match handbook
 AUTH_DIR = Path("Data/Auth")
+PAGE_POOL_MAX_USES = int(os.getenv("PAGE_POOL_MAX_USES", "25"))        # Recycle a context after K tasks
+PAGE_POOL_MAX_HEAP_MB = int(os.getenv("PAGE_POOL_MAX_HEAP_MB", "300"))  # ...or once its JS heap grows past this
 
 class Tee(object):
     """A utility to redirect stdout to both console and a log file."""
@@ -84,13 +94,129 @@ async def capture_debug_snapshot(page: Page, label: str, info_text: str = ""):
     except Exception as e:
         print(f"    [Debug Failure] Could not write debug snapshot: {e}") 
 
+class PagePool:
+    """
+    Warm browser contexts (one page each) leased to batch tasks.
+    Between leases cookies are kept (consent, region) and sessionStorage is cleared.
+    A context is recycled after max_uses leases, when its JS heap exceeds
+    max_heap_mb, or when its page was closed or crashed.
+    """
+
+    def __init__(self, browser: Browser, size: int, context_options: Optional[Dict[str, Any]] = None,
+                 on_context: Optional[Callable[[BrowserContext], Awaitable[Any]]] = None,
+                 on_page: Optional[Callable[[Page], Any]] = None,
+                 max_uses: int = PAGE_POOL_MAX_USES, max_heap_mb: int = PAGE_POOL_MAX_HEAP_MB):
+        self.browser = browser
+        self.size = size
+        self.context_options = context_options or {}
+        self.on_context = on_context
+        self.on_page = on_page
+        self.max_uses = max_uses
+        self.max_heap_mb = max_heap_mb
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._created = 0
+        self.recycled = 0
+
+    async def _new_slot(self) -> Dict[str, Any]:
+        context = await self.browser.new_context(**self.context_options)
+        if self.on_context:
+            await self.on_context(context)
+        page = await context.new_page()
+        if self.on_page:
+            self.on_page(page)
+        return {"context": context, "page": page, "uses": 0}
+
+    async def _acquire(self) -> Dict[str, Any]:
+        if self._idle.empty() and self._created < self.size:
+            self._created += 1
+            try:
+                return await self._new_slot()
+            except Exception:
+                self._created -= 1
+                raise
+        return await self._idle.get()
+
+    async def _needs_recycle(self, slot: Dict[str, Any]) -> bool:
+        page = slot["page"]
+        if page.is_closed() or slot["uses"] >= self.max_uses:
+            return True
+        try:
+            heap = await page.evaluate("() => (performance.memory ? performance.memory.usedJSHeapSize : 0)")
+            return heap > self.max_heap_mb * 1024 * 1024
+        except Exception:
+            return True  # Page is unresponsive
+
+    async def _release(self, slot: Dict[str, Any]):
+        slot["uses"] += 1
+        if await self._needs_recycle(slot):
+            self.recycled += 1
+            try:
+                await slot["context"].close()
+            except Exception:
+                pass
+            try:
+                slot = await self._new_slot()
+            except Exception as e:
+                print(f"    [PagePool] Could not replace recycled context: {e}")
+                self._created -= 1
+                return
+        else:
+            try:
+                await slot["page"].evaluate("() => { try { sessionStorage.clear(); } catch (e) {} }")
+            except Exception:
+                pass
+        self._idle.put_nowait(slot)
+
+    @asynccontextmanager
+    async def lease(self):
+        """Borrow a warm page for one task."""
+        slot = await self._acquire()
+        try:
+            yield slot["page"]
+        finally:
+            await self._release(slot)
+
+    async def trim(self, keep: int):
+        """Close idle contexts until at most keep are open (after the concurrency limit shrank)."""
+        while self._created > keep and not self._idle.empty():
+            self._created -= 1
+            try:
+                await self._idle.get_nowait()["context"].close()
+            except Exception:
+                pass
+
+    async def close(self):
+        while not self._idle.empty():
+            try:
+                await self._idle.get_nowait()["context"].close()
+            except Exception:
+                pass
+        self._created = 0
+
+
 class BatchProcessor:
-    def __init__(self, max_concurrent: int = 4):
+    """
+    Runs one coroutine per item under a concurrency limit: a fixed semaphore of
+    max_concurrent, or a ConcurrencyController whose limit adapts while the batch runs
+    (the page pool is then sized for the controller's max_limit and trimmed when it shrinks).
+    """
+
+    def __init__(self, max_concurrent: int = 4, page_pool: Optional[PagePool] = None,
+                 controller: Optional[ConcurrencyController] = None):
         self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.page_pool = page_pool
+        self.controller = controller
 
     async def _worker(self, func: Callable, item: T, *args, **kwargs): # type: ignore
-        async with self.semaphore:
-            return await func(item, *args, **kwargs)
+        async with (self.controller.slot() if self.controller else self.semaphore):
+            if self.page_pool is None:
+                return await func(item, *args, **kwargs)
+            # Pooled mode: the task receives a warm page instead of opening its own context
+            async with self.page_pool.lease() as page:
+                result = await func(item, *args, page=page, **kwargs)
+            if self.controller:
+                await self.page_pool.trim(self.controller.limit)
+            return result
 
     async def run_batch(self, items: List[T], func: Callable, *args, **kwargs):
         tasks = [self._worker(func, item, *args, **kwargs) for item in items]
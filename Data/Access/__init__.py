@@ -17,8 +17,8 @@ from .review_outcomes import (
     DataValidator,
     evaluate_prediction,
     get_predictions_to_review,
-    save_single_outcome,
-    process_review_task_offline,
+    save_outcomes_batch,
+    resolve_outcome_offline,
     run_review_process
 )
 
@@ -28,7 +28,7 @@ __all__ = [
     'DataValidator',
     'evaluate_prediction',
     'get_predictions_to_review',
-    'save_single_outcome',
-    'process_review_task_offline',
+    'save_outcomes_batch',
+    'resolve_outcome_offline',
     'run_review_process'
 ]
@@ -12,6 +12,7 @@ Responsible for reading, writing, appending, and upserting CSV data safely.
 import os
 import csv
 import sys
+import threading
 from typing import Dict, Any, List
 
 # Increase CSV field size limit to handle large strings (e.g. HTML/JSON blobs)
@@ -20,6 +21,11 @@ csv.field_size_limit(sys.maxsize)
 # --- CSV File Paths ---
 DB_DIR = "Data/Store"
 
+# Held around each read-modify-write of one store file. Taken only by the blocking
+# write helpers; async callers run those through asyncio.to_thread so the event
+# loop never waits on it.
+STORE_WRITE_LOCK = threading.RLock()
+
 def _read_csv(filepath: str) -> List[Dict[str, str]]:
     """Safely reads a CSV file into a list of dictionaries."""
     if not os.path.exists(filepath) or os.path.getsize(filepath) == 0:
@@ -64,19 +70,20 @@ def upsert_entry(filepath: str, data_row: Dict, fieldnames: List[str], unique_ke
         print(f"    [DB UPSERT Warning] Skipping entry due to missing unique key '{unique_key}'.")
         return
 
-    all_rows = _read_csv(filepath)
+    with STORE_WRITE_LOCK:
+        all_rows = _read_csv(filepath)
 
-    updated = False
-    for row in all_rows:
-        if row.get(unique_key) == unique_id:
-            row.update(data_row)
-            updated = True
-            break
+        updated = False
+        for row in all_rows:
+            if row.get(unique_key) == unique_id:
+                row.update(data_row)
+                updated = True
+                break
 
-    if not updated:
-        all_rows.append(data_row)
+        if not updated:
+            all_rows.append(data_row)
 
-    _write_csv(filepath, all_rows, fieldnames)
+        _write_csv(filepath, all_rows, fieldnames)
 
 
 def batch_upsert(filepath: str, data_rows: List[Dict], fieldnames: List[str], unique_key: str):
@@ -87,24 +94,25 @@ def batch_upsert(filepath: str, data_rows: List[Dict], fieldnames: List[str], un
     if not data_rows:
         return
 
-    all_rows = _read_csv(filepath)
-
-    # Build index for O(1) lookup
-    index = {}
-    for i, row in enumerate(all_rows):
-        key = row.get(unique_key)
-        if key:
-            index[key] = i
-
-    new_rows = []
-    for data_row in data_rows:
-        uid = data_row.get(unique_key)
-        if not uid:
-            continue
-        if uid in index:
-            all_rows[index[uid]].update(data_row)
-        else:
-            new_rows.append(data_row)
-
-    all_rows.extend(new_rows)
-    _write_csv(filepath, all_rows, fieldnames)
+    with STORE_WRITE_LOCK:
+        all_rows = _read_csv(filepath)
+
+        # Build index for O(1) lookup
+        index = {}
+        for i, row in enumerate(all_rows):
+            key = row.get(unique_key)
+            if key:
+                index[key] = i
+
+        new_rows = []
+        for data_row in data_rows:
+            uid = data_row.get(unique_key)
+            if not uid:
+                continue
+            if uid in index:
+                all_rows[index[uid]].update(data_row)
+            else:
+                new_rows.append(data_row)
+
+        all_rows.extend(new_rows)
+        _write_csv(filepath, all_rows, fieldnames)
@@ -1,7 +1,7 @@
 # db_helpers.py: db_helpers.py: High-level database access layers for LeoBook.
 # Part of LeoBook Data — Access Layer
 #
-# Functions: init_csvs(), log_audit_event(), save_prediction(), update_prediction_status(), backfill_prediction_entry(), save_schedule_entry(), save_live_score_entry(), save_standings() (+12 more)
+# Functions: init_csvs(), log_audit_event(), save_prediction(), save_predictions_batch(), update_prediction_status(), backfill_prediction_entry(), save_schedule_entry(), save_live_score_entry(), save_live_scores_batch() (+14 more)
 
 """
 Database Helpers Module
@@ -11,11 +11,12 @@ Responsible for saving predictions, schedules, standings, teams, and region-leag
 
 import os
 import csv
+import json
 from datetime import datetime as dt
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import uuid
 
-from .csv_operations import _read_csv, _append_to_csv, _write_csv, upsert_entry, batch_upsert
+from .csv_operations import STORE_WRITE_LOCK, _read_csv, _append_to_csv, _write_csv, upsert_entry, batch_upsert
 append_to_csv = _append_to_csv # Alias for external use
 
 # --- Data Store Paths ---
@@ -64,12 +65,13 @@ def log_audit_event(event_type: str, description: str, balance_before: Optional[
     }
     _append_to_csv(AUDIT_LOG_CSV, row, ['id', 'timestamp', 'event_type', 'description', 'balance_before', 'balance_after', 'stake', 'status'])
 
-def save_prediction(match_data: Dict[str, Any], prediction_result: Dict[str, Any]):
-    """UPSERTs a prediction into the predictions.csv file."""
+def _build_prediction_row(match_data: Dict[str, Any], prediction_result: Dict[str, Any], crest_lookup=None) -> Dict[str, Any]:
+    """Maps a match + RuleEngine result onto a predictions.csv row."""
     fixture_id = match_data.get('id', 'unknown')
     date = match_data.get('date', dt.now().strftime("%d.%m.%Y"))
+    crest = crest_lookup or get_team_crest
 
-    new_row_data = {
+    return {
         'fixture_id': fixture_id,
         'date': date,
         'match_time': match_data.get('time', '00:00'),
@@ -80,6 +82,7 @@ def save_prediction(match_data: Dict[str, Any], prediction_result: Dict[str, Any
         'away_team_id': match_data.get('away_team_id', 'unknown'),
         'prediction': prediction_result.get('type', 'SKIP'),
         'confidence': prediction_result.get('confidence', 'Low'),
+        'confidence_score': str(prediction_result.get('confidence_score', '')),
         'reason': " | ".join(prediction_result.get('reason', [])),
         'xg_home': str(prediction_result.get('xg_home', 0.0)),
         'xg_away': str(prediction_result.get('xg_away', 0.0)),
@@ -99,8 +102,8 @@ def save_prediction(match_data: Dict[str, Any], prediction_result: Dict[str, Any
         'match_link': f"{match_data.get('match_link', '')}",
         'odds': str(prediction_result.get('odds', '')),
         'market_reliability_score': str(prediction_result.get('market_reliability', 0.0)),
-        'home_crest_url': get_team_crest(match_data.get('home_team_id'), match_data.get('home_team')),
-        'away_crest_url': get_team_crest(match_data.get('away_team_id'), match_data.get('away_team')),
+        'home_crest_url': crest(match_data.get('home_team_id'), match_data.get('home_team')),
+        'away_crest_url': crest(match_data.get('away_team_id'), match_data.get('away_team')),
         'h2h_fixture_ids': json.dumps(prediction_result.get('h2h_fixture_ids', [])),
         'form_fixture_ids': json.dumps(prediction_result.get('form_fixture_ids', [])),
         'standings_snapshot': json.dumps(prediction_result.get('standings_snapshot', [])),
@@ -108,8 +111,24 @@ def save_prediction(match_data: Dict[str, Any], prediction_result: Dict[str, Any
         'last_updated': dt.now().isoformat()
     }
 
+def save_prediction(match_data: Dict[str, Any], prediction_result: Dict[str, Any]):
+    """UPSERTs a prediction into the predictions.csv file."""
+    new_row_data = _build_prediction_row(match_data, prediction_result)
     upsert_entry(PREDICTIONS_CSV, new_row_data, files_and_headers[PREDICTIONS_CSV], 'fixture_id')
 
+def save_predictions_batch(items: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Batch UPSERT of (match_data, prediction_result) pairs: teams.csv and
+    predictions.csv are each read once and predictions.csv is written once.
+    Returns the rows written (for cloud sync).
+    """
+    if not items:
+        return []
+    crest_lookup = _team_crest_lookup()
+    rows = [_build_prediction_row(m, p, crest_lookup) for m, p in items]
+    batch_upsert(PREDICTIONS_CSV, rows, files_and_headers[PREDICTIONS_CSV], 'fixture_id')
+    return rows
+
 def update_prediction_status(match_id: str, date: str, new_status: str, **kwargs):
     """
     Updates the status and optional fields (like odds or booking_code) in predictions.csv.
@@ -119,24 +138,25 @@ def update_prediction_status(match_id: str, date: str, new_status: str, **kwargs
 
     rows = []
     updated = False
-    try:
-        with open(PREDICTIONS_CSV, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            fieldnames = reader.fieldnames
-            for row in reader:
-                if row.get('fixture_id') == match_id and row.get('date') == date:
-                    row['status'] = new_status
-                    row['last_updated'] = dt.now().isoformat()
-                    for key, value in kwargs.items():
-                        if key in row:
-                            row[key] = value
-                    updated = True
-                rows.append(row)
-
-        if updated and fieldnames is not None:
-            _write_csv(PREDICTIONS_CSV, rows, list(fieldnames))
-    except Exception as e:
-        print(f"    [Warning] Failed to update status for {match_id}: {e}")
+    with STORE_WRITE_LOCK:
+        try:
+            with open(PREDICTIONS_CSV, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                fieldnames = reader.fieldnames
+                for row in reader:
+                    if row.get('fixture_id') == match_id and row.get('date') == date:
+                        row['status'] = new_status
+                        row['last_updated'] = dt.now().isoformat()
+                        for key, value in kwargs.items():
+                            if key in row:
+                                row[key] = value
+                        updated = True
+                    rows.append(row)
+
+            if updated and fieldnames is not None:
+                _write_csv(PREDICTIONS_CSV, rows, list(fieldnames))
+        except Exception as e:
+            print(f"    [Warning] Failed to update status for {match_id}: {e}")
 
 def backfill_prediction_entry(fixture_id: str, updates: Dict[str, str]):
     """
@@ -151,27 +171,28 @@ def backfill_prediction_entry(fixture_id: str, updates: Dict[str, str]):
 
     rows = []
     updated = False
-    try:
-        with open(PREDICTIONS_CSV, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            fieldnames = reader.fieldnames
-            for row in reader:
-                if row.get('fixture_id') == fixture_id:
-                    for key, value in updates.items():
-                        if key in row and value:
-                            current = row[key].strip() if row[key] else ''
-                            if not current or current in ('Unknown', 'N/A', 'unknown'):
-                                row[key] = value
-                                row['last_updated'] = dt.now().isoformat()
-                                updated = True
-                    rows.append(row)
-                else:
-                    rows.append(row)
-
-        if updated and fieldnames is not None:
-            _write_csv(PREDICTIONS_CSV, rows, list(fieldnames))
-    except Exception as e:
-        print(f"    [Warning] Failed to backfill prediction {fixture_id}: {e}")
+    with STORE_WRITE_LOCK:
+        try:
+            with open(PREDICTIONS_CSV, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                fieldnames = reader.fieldnames
+                for row in reader:
+                    if row.get('fixture_id') == fixture_id:
+                        for key, value in updates.items():
+                            if key in row and value:
+                                current = row[key].strip() if row[key] else ''
+                                if not current or current in ('Unknown', 'N/A', 'unknown'):
+                                    row[key] = value
+                                    row['last_updated'] = dt.now().isoformat()
+                                    updated = True
+                        rows.append(row)
+                    else:
+                        rows.append(row)
+
+            if updated and fieldnames is not None:
+                _write_csv(PREDICTIONS_CSV, rows, list(fieldnames))
+        except Exception as e:
+            print(f"    [Warning] Failed to backfill prediction {fixture_id}: {e}")
 
     return updated
 
@@ -190,6 +211,21 @@ def save_live_score_entry(match_info: Dict[str, Any]):
     match_info['last_updated'] = dt.now().isoformat()
     upsert_entry(LIVE_SCORES_CSV, match_info, files_and_headers[LIVE_SCORES_CSV], 'fixture_id')
 
+def save_live_scores_batch(entries: List[Dict[str, Any]], keep_ids: Optional[set] = None):
+    """
+    Upserts many live score entries and drops fixtures not in keep_ids,
+    with one read and one write of live_scores.csv.
+    """
+    now = dt.now().isoformat()
+    with STORE_WRITE_LOCK:
+        rows = {r.get('fixture_id'): r for r in _read_csv(LIVE_SCORES_CSV) if r.get('fixture_id')}
+        for entry in entries:
+            entry['last_updated'] = now
+            rows.setdefault(entry['fixture_id'], {}).update(entry)
+        if keep_ids is not None:
+            rows = {fid: r for fid, r in rows.items() if fid in keep_ids}
+        _write_csv(LIVE_SCORES_CSV, list(rows.values()), files_and_headers[LIVE_SCORES_CSV])
+
 def save_standings(standings_data: List[Dict[str, Any]], region_league: str, league_id: str = ""):
     """UPSERTs standings data for a specific league in standings.csv."""
     if not standings_data: return
@@ -273,29 +309,30 @@ def save_team_entry(team_info: Dict[str, Any]):
     team_id = team_info.get('team_id')
     if not team_id or team_id == 'unknown': return
 
-    # Check for existing entry to merge rl_ids
-    existing_rows = _read_csv(TEAMS_CSV)
-    new_rl_id = team_info.get('rl_ids', team_info.get('region_league', ''))
+    with STORE_WRITE_LOCK:
+        # Check for existing entry to merge rl_ids
+        existing_rows = _read_csv(TEAMS_CSV)
+        new_rl_id = team_info.get('rl_ids', team_info.get('region_league', ''))
     
-    merged_rl_ids = new_rl_id
-    for row in existing_rows:
-        if row.get('team_id') == team_id:
-            existing_rl_ids = row.get('rl_ids', '').split(';')
-            if new_rl_id and new_rl_id not in existing_rl_ids:
-                existing_rl_ids.append(new_rl_id)
-            merged_rl_ids = ';'.join(filter(None, existing_rl_ids))
-            break
-
-    entry = {
-        'team_id': team_id,
-        'team_name': team_info.get('team_name', 'Unknown'),
-        'rl_ids': merged_rl_ids,
-        'team_crest': _standardize_url(team_info.get('team_crest', '')),
-        'team_url': _standardize_url(team_info.get('team_url', '')),
-        'last_updated': dt.now().isoformat()
-    }
+        merged_rl_ids = new_rl_id
+        for row in existing_rows:
+            if row.get('team_id') == team_id:
+                existing_rl_ids = row.get('rl_ids', '').split(';')
+                if new_rl_id and new_rl_id not in existing_rl_ids:
+                    existing_rl_ids.append(new_rl_id)
+                merged_rl_ids = ';'.join(filter(None, existing_rl_ids))
+                break
+
+        entry = {
+            'team_id': team_id,
+            'team_name': team_info.get('team_name', 'Unknown'),
+            'rl_ids': merged_rl_ids,
+            'team_crest': _standardize_url(team_info.get('team_crest', '')),
+            'team_url': _standardize_url(team_info.get('team_url', '')),
+            'last_updated': dt.now().isoformat()
+        }
 
-    upsert_entry(TEAMS_CSV, entry, files_and_headers[TEAMS_CSV], 'team_id')
+        upsert_entry(TEAMS_CSV, entry, files_and_headers[TEAMS_CSV], 'team_id')
 
 def get_team_crest(team_id: str, team_name: str = "") -> str:
     """Retrieves the crest URL for a team from teams.csv."""
@@ -308,6 +345,21 @@ def get_team_crest(team_id: str, team_name: str = "") -> str:
             return row.get('team_crest', '')
     return ""
 
+def _team_crest_lookup():
+    """get_team_crest() equivalent backed by a single read of teams.csv."""
+    by_id, by_name = {}, {}
+    if os.path.exists(TEAMS_CSV):
+        for row in _read_csv(TEAMS_CSV):
+            by_id.setdefault(str(row.get('team_id')), row.get('team_crest', ''))
+            if row.get('team_name'):
+                by_name.setdefault(row.get('team_name'), row.get('team_crest', ''))
+
+    def lookup(team_id: str, team_name: str = "") -> str:
+        if str(team_id) in by_id:
+            return by_id[str(team_id)]
+        return by_name.get(team_name, "") if team_name else ""
+    return lookup
+
 # --- Football.com Registry Helpers ---
 
 def get_site_match_id(date: str, home: str, away: str) -> str:
@@ -368,27 +420,28 @@ def update_site_match_status(site_match_id: str, status: str, fixture_id: Option
 
     rows = []
     updated = False
-    try:
-        with open(FB_MATCHES_CSV, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            fieldnames = reader.fieldnames
-            for row in reader:
-                if row.get('site_match_id') == site_match_id:
-                    row['booking_status'] = status
-                    if fixture_id: row['fixture_id'] = fixture_id
-                    if details: row['booking_details'] = details
-                    if booking_code: row['booking_code'] = booking_code
-                    if booking_url: row['booking_url'] = booking_url
-                    if status: row['status'] = status
-                    if matched: row['matched'] = matched
-                    if 'odds' in kwargs: row['odds'] = kwargs['odds']
-                    updated = True
-                rows.append(row)
-
-        if updated and fieldnames is not None:
-            _write_csv(FB_MATCHES_CSV, rows, list(fieldnames))
-    except Exception as e:
-        print(f"    [DB Error] Failed to update site match status: {e}")
+    with STORE_WRITE_LOCK:
+        try:
+            with open(FB_MATCHES_CSV, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                fieldnames = reader.fieldnames
+                for row in reader:
+                    if row.get('site_match_id') == site_match_id:
+                        row['booking_status'] = status
+                        if fixture_id: row['fixture_id'] = fixture_id
+                        if details: row['booking_details'] = details
+                        if booking_code: row['booking_code'] = booking_code
+                        if booking_url: row['booking_url'] = booking_url
+                        if status: row['status'] = status
+                        if matched: row['matched'] = matched
+                        if 'odds' in kwargs: row['odds'] = kwargs['odds']
+                        updated = True
+                    rows.append(row)
+
+            if updated and fieldnames is not None:
+                _write_csv(FB_MATCHES_CSV, rows, list(fieldnames))
+        except Exception as e:
+            print(f"    [DB Error] Failed to update site match status: {e}")
 
 def get_last_processed_info() -> Dict:
     """Loads last processed match info once at the start."""
@@ -419,6 +472,13 @@ def get_standings(region_league: str) -> List[Dict[str, Any]]:
     all_standings = _read_csv(STANDINGS_CSV)
     return [s for s in all_standings if s.get('region_league') == region_league]
 
+def get_standings_by_league() -> Dict[str, List[Dict[str, Any]]]:
+    """Loads standings.csv once, grouped by region_league."""
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for s in _read_csv(STANDINGS_CSV):
+        grouped.setdefault(s.get('region_league'), []).append(s)
+    return grouped
+
 # To be accessible from other modules, we need to define the headers dict here
 files_and_headers = {
     PREDICTIONS_CSV: [
@@ -430,7 +490,7 @@ files_and_headers = {
         'generated_at', 'status', 'match_link', 'odds', 'market_reliability_score',
         'home_crest_url', 'away_crest_url', 'is_recommended', 'recommendation_score',
         'h2h_fixture_ids', 'form_fixture_ids', 'standings_snapshot', 'league_id', 
-        'league_stage', 'last_updated'
+        'league_stage', 'confidence_score', 'last_updated'
     ],
     SCHEDULES_CSV: [
         'fixture_id', 'date', 'match_time', 'region_league', 'league_id', 'home_team', 'away_team',
@@ -1,7 +1,7 @@
 # outcome_reviewer.py: outcome_reviewer.py: Post-match results extraction and accuracy reporting.
 # Part of LeoBook Data — Access Layer
 #
-# Functions: _load_schedule_db(), get_predictions_to_review(), smart_parse_datetime(), save_single_outcome(), sync_schedules_to_predictions(), _sync_outcome_to_site_registry(), process_review_task_offline(), process_review_task_browser() (+4 more)
+# Functions: _load_schedule_db(), get_predictions_to_review(), smart_parse_datetime(), save_outcomes_batch(), sync_schedules_to_predictions(), _sync_outcome_to_site_registry(), resolve_outcome_offline(), review_in_browser_pool() (+8 more)
 
 """
 Outcome Reviewer Module
@@ -11,11 +11,12 @@ Responsible for managing the review workflow, CSV operations, and outcome tracki
 
 import asyncio
 import csv
+import math
 import os
 import pandas as pd
 import pytz
 from datetime import datetime as dt, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 from .health_monitor import HealthMonitor
 from playwright.async_api import Playwright
@@ -25,6 +26,7 @@ from playwright.async_api import Playwright
 BATCH_SIZE = 10      # How many matches to review at the same time
 LOOKBACK_LIMIT = 5000 # Only check the last 500 eligible matches to prevent infinite backlogs
 ENRICHMENT_CONCURRENCY = 10 # Concurrency for enriching past H2H matches
+REVIEW_BROWSER_CONCURRENCY = int(os.getenv("REVIEW_BROWSER_CONCURRENCY", "4"))  # Pages for the browser fallback
 
 # --- PRODUCTION CONFIGURATION ---
 PRODUCTION_MODE = True  # Set to True in production environment
@@ -41,10 +43,13 @@ from .db_helpers import (
     PREDICTIONS_CSV, SCHEDULES_CSV, TEAMS_CSV, REGION_LEAGUE_CSV, 
     FB_MATCHES_CSV, files_and_headers, save_team_entry, save_region_league_entry
 )
-from .csv_operations import upsert_entry, _read_csv, _write_csv
+from .csv_operations import STORE_WRITE_LOCK, upsert_entry, _read_csv, _write_csv
+from .prediction_evaluator import compile_prediction, evaluate, parse_score
 from .sync_manager import SyncManager
 from Core.Intelligence.intelligence import get_selector_auto, get_selector
+from Core.Intelligence.calibration import ProbabilityCalibrator
 from Core.Utils.constants import NAVIGATION_TIMEOUT
+from Core.Browser.resource_router import apply_resource_policy
 
 
 def _load_schedule_db() -> Dict[str, Dict]:
@@ -71,37 +76,25 @@ def get_predictions_to_review() -> List[Dict]:
 
     try:
         # 1. Load predictions with pandas
-        df = pd.read_csv(PREDICTIONS_CSV, dtype=str).fillna('')
+        df = pd.read_csv(PREDICTIONS_CSV, dtype=str, keep_default_na=False)
         
         if df.empty:
             return []
 
-        # 2. Filter for 'pending' status
-        df = df[df['status'] == 'pending']
+        # 2. Filter for 'pending' status (boolean mask over the raw column, no row copies)
+        df = df[df['status'].to_numpy() == 'pending']
         if df.empty:
             return []
 
-        # 3. Handle Date/Time Parsing
-        # Format in CSV is 14.02.2026 for date, 15:00 for match_time
-        def parse_dt(row):
-            try:
-                d_str = row.get('date') or row.get('Date')
-                t_str = row.get('match_time')
-                if not d_str or not t_str or t_str == 'N/A':
-                    return pd.NaT
-                return dt.strptime(f"{d_str} {t_str}", "%d.%m.%Y %H:%M")
-            except:
-                return pd.NaT
-
-        df['scheduled_dt'] = df.apply(parse_dt, axis=1)
-        df = df.dropna(subset=['scheduled_dt'])
+        # 3. Vectorized Date/Time Parsing
+        # Format in CSV is 14.02.2026 for date, 15:00 for match_time; anything else (N/A, '') -> NaT
+        dates = df['date'] if 'date' in df.columns else df['Date']
+        scheduled = pd.to_datetime(dates + ' ' + df['match_time'], format="%d.%m.%Y %H:%M", errors='coerce')
 
         # 4. Timezone Awareness (Africa/Lagos)
         lagos_tz = pytz.timezone('Africa/Lagos')
         now_lagos = dt.now(lagos_tz)
-        
-        # Localize scheduled_dt if naive (usually it is)
-        df['scheduled_dt'] = df['scheduled_dt'].apply(lambda x: lagos_tz.localize(x) if x.tzinfo is None else x)
+        df = df.assign(scheduled_dt=scheduled.dt.tz_localize(lagos_tz)).dropna(subset=['scheduled_dt'])
 
         # 5. Filter for FINISHED matches only (scheduled ≥ 2.5h ago)
         # A football match takes ~2h. Adding 30min buffer to avoid visiting
@@ -152,75 +145,92 @@ def smart_parse_datetime(dt_str: str):
     return None, None
 
 
-def save_single_outcome(match_data: Dict, new_status: str):
+def _apply_outcome(row: Dict, match_data: Dict, new_status: str) -> Optional[Tuple[int, int]]:
     """
-    Atomic Upsert to save the review result.
+    Applies a review result to a predictions.csv row in place.
+    Returns the parsed (home, away) goals when the row should be graded, else None.
     """
-    temp_file = PREDICTIONS_CSV + '.tmp'
-    os.makedirs(os.path.dirname(PREDICTIONS_CSV), exist_ok=True)
-    updated = False
-    row_id_key = 'ID' if 'ID' in match_data else 'fixture_id'
-    target_id = match_data.get(row_id_key)
+    row['status'] = new_status
+    row['actual_score'] = match_data.get('actual_score', row.get('actual_score', 'N/A'))
 
-    try:
-        with open(PREDICTIONS_CSV, 'r', encoding='utf-8', newline='') as infile, \
-             open(temp_file, 'w', encoding='utf-8', newline='') as outfile:
-
-            reader = csv.DictReader(infile)
-            fieldnames = reader.fieldnames
-            if fieldnames is None: 
-                fieldnames = files_and_headers[PREDICTIONS_CSV]
-
-            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for row in reader:
-                current_id = row.get('ID') or row.get('fixture_id')
-
-                if current_id == target_id:
-                    row['status'] = new_status
-                    row['actual_score'] = match_data.get('actual_score', row.get('actual_score', 'N/A'))
-                    
-                    # Update scores if available in match_data (from schedules)
-                    if 'home_score' in match_data and 'away_score' in match_data:
-                        row['actual_score'] = f"{match_data['home_score']}-{match_data['away_score']}"
-
-                    if new_status in ['reviewed', 'finished']:
-                        from .review_outcomes import evaluate_prediction as final_eval
-                        prediction = row.get('prediction', '')
-                        actual_score = row.get('actual_score', '')
-                        
-                        try:
-                            # Robust score parsing: handle "3-1", "3 - 1", "3-1-AET", etc.
-                            import re
-                            score_match = re.match(r'(\d+)\s*-\s*(\d+)', actual_score or '')
-                            if score_match:
-                                h_core, a_core = score_match.group(1), score_match.group(2)
-                                is_correct = final_eval(prediction, h_core, a_core)
-                                row['outcome_correct'] = str(is_correct)
-                                
-                                # Immediate Sync (Real-time update)
-                                print(f"      [Cloud] Immediate sync for {target_id}...")
-                                asyncio.create_task(SyncManager().batch_upsert('predictions', [row]))
-                            else:
-                                print(f"      [Eval Skip] Cannot parse score '{actual_score}' for {target_id}")
-                        except Exception as eval_err:
-                            print(f"      [Eval Error] {eval_err}")
-
-                    updated = True
-
-                writer.writerow(row)
-
-        if updated:
+    # Update scores if available in match_data (from schedules)
+    if 'home_score' in match_data and 'away_score' in match_data:
+        row['actual_score'] = f"{match_data['home_score']}-{match_data['away_score']}"
+
+    if new_status not in ('reviewed', 'finished'):
+        return None
+
+    # Robust score parsing: handle "3-1", "3 - 1", "3-1-AET", etc.
+    score = parse_score(row.get('actual_score', ''))
+    if score is None:
+        print(f"      [Eval Skip] Cannot parse score '{row.get('actual_score', '')}' for {row.get('fixture_id')}")
+    return score
+
+
+def save_outcomes_batch(updates: List[Tuple[Dict, str]]) -> List[Dict]:
+    """
+    Applies many review results with one read and one atomic write of predictions.csv.
+    updates: [(match_data, new_status), ...]. All finished rows are graded in one
+    vectorized pass. Returns the updated rows, and propagates graded outcomes to
+    fb_matches.csv in the same pass.
+    """
+    if not updates or not os.path.exists(PREDICTIONS_CSV):
+        return []
+
+    by_id = {}
+    for match_data, new_status in updates:
+        row_id_key = 'ID' if 'ID' in match_data else 'fixture_id'
+        target_id = match_data.get(row_id_key)
+        if target_id:
+            by_id[target_id] = (match_data, new_status)
+
+    temp_file = PREDICTIONS_CSV + '.tmp'
+    with STORE_WRITE_LOCK:  # Read-modify-write of the whole file
+        try:
+            with open(PREDICTIONS_CSV, 'r', encoding='utf-8', newline='') as infile:
+                reader = csv.DictReader(infile)
+                fieldnames = reader.fieldnames or files_and_headers[PREDICTIONS_CSV]
+                rows = list(reader)
+
+            changed, to_grade, goals = [], [], []
+            for row in rows:
+                update = by_id.get(row.get('ID') or row.get('fixture_id'))
+                if update:
+                    score = _apply_outcome(row, *update)
+                    if score is not None:
+                        to_grade.append(row)
+                        goals.append(score)
+                    changed.append(row)
+            if not changed:
+                return []
+
+            # Grade every finished prediction in one NumPy pass
+            graded = {}
+            if to_grade:
+                descriptors = [compile_prediction(r.get('prediction', ''), r.get('home_team', ''), r.get('away_team', ''))
+                               for r in to_grade]
+                home_goals, away_goals = zip(*goals)
+                for row, result in zip(to_grade, evaluate(descriptors, home_goals, away_goals)):
+                    if not math.isnan(result):
+                        row['outcome_correct'] = str(bool(result))
+                        graded[row.get('fixture_id')] = row
+
+            with open(temp_file, 'w', encoding='utf-8', newline='') as outfile:
+                writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+                writer.writeheader()
+                writer.writerows(rows)
             os.replace(temp_file, PREDICTIONS_CSV)
-            if new_status == 'reviewed' and target_id:
-                _sync_outcome_to_site_registry(target_id, match_data)
-        else:
+        except Exception as e:
+            HealthMonitor.log_error("csv_save_error", f"Failed to save CSV: {e}", "high")
+            print(f"    [File Error] Failed to write CSV: {e}")
             if os.path.exists(temp_file):
                 os.remove(temp_file)
-    except Exception as e:
-        HealthMonitor.log_error("csv_save_error", f"Failed to save CSV: {e}", "high")
-        print(f"    [File Error] Failed to write CSV: {e}")
+            return []
+
+    if graded:
+        _sync_outcome_to_site_registry(graded)
+    return changed
+
 
 def sync_schedules_to_predictions():
     """
@@ -260,46 +270,48 @@ def sync_schedules_to_predictions():
         print(f"  [Sync] Added {added_count} missing entries from schedules to predictions.")
 
 
-def _sync_outcome_to_site_registry(fixture_id: str, match_data: Dict):
-    """v2.7 Sync: Updates fb_matches.csv when a prediction is reviewed."""
-    if not os.path.exists(FB_MATCHES_CSV):
+def _sync_outcome_to_site_registry(outcomes: Dict[str, Dict]):
+    """
+    v2.7 Sync: Updates fb_matches.csv when predictions are reviewed.
+    outcomes maps fixture_id -> graded prediction row; fb_matches.csv is read and written once.
+    """
+    if not outcomes or not os.path.exists(FB_MATCHES_CSV):
         return
 
     try:
-        # 1. Determine WON/LOST
-        actual_score = match_data.get('actual_score', '')
-        prediction = match_data.get('prediction', '')
-        home_team = match_data.get('home_team', '')
-        away_team = match_data.get('away_team', '')
-        
-        is_correct = evaluate_prediction(prediction, actual_score, home_team, away_team)
-        if is_correct is None: return
-        
-        outcome_status = "WON" if is_correct else "LOST"
-        
+        # 1. Determine WON/LOST per fixture (rows are already graded)
+        statuses = {
+            str(fixture_id): "WON" if row.get('outcome_correct') == 'True' else "LOST"
+            for fixture_id, row in outcomes.items()
+            if row.get('outcome_correct') in ('True', 'False')
+        }
+        if not statuses:
+            return
+
         # 2. Update site registry
-        rows = _read_csv(FB_MATCHES_CSV)
-        sync_count = 0
-        for row in rows:
-            if str(row.get('fixture_id')) == str(fixture_id):
-                row['status'] = outcome_status
-                sync_count += 1
-        
-        if sync_count > 0:
-            _write_csv(FB_MATCHES_CSV, rows, files_and_headers[FB_MATCHES_CSV])
-            print(f"    [Sync] Updated {sync_count} records in fb_matches.csv to {outcome_status}")
-            
+        with STORE_WRITE_LOCK:
+            rows = _read_csv(FB_MATCHES_CSV)
+            sync_count = 0
+            for row in rows:
+                outcome_status = statuses.get(str(row.get('fixture_id')))
+                if outcome_status:
+                    row['status'] = outcome_status
+                    sync_count += 1
+
+            if sync_count > 0:
+                _write_csv(FB_MATCHES_CSV, rows, files_and_headers[FB_MATCHES_CSV])
+                print(f"    [Sync] Updated {sync_count} records in fb_matches.csv")
+
     except Exception as e:
         print(f"    [Sync Error] Failed to sync outcome: {e}")
 
 
-
-
-def process_review_task_offline(match: Dict) -> Optional[Dict]:
-    """Review a prediction by reading its result from schedules.csv (no browser)."""
-    schedule_db = _load_schedule_db()
-    fixture_id = match.get('fixture_id')
-    schedule = schedule_db.get(fixture_id, {})
+def resolve_outcome_offline(match: Dict, schedule_db: Dict[str, Dict]) -> Optional[str]:
+    """
+    Resolves a prediction against the in-memory schedules index (no I/O).
+    Fills the scores into match and returns the new status, or None if not yet decided.
+    """
+    schedule = schedule_db.get(match.get('fixture_id'), {})
 
     match_status = schedule.get('match_status', '').upper()
     home_score = schedule.get('home_score', '').strip()
@@ -312,43 +324,51 @@ def process_review_task_offline(match: Dict) -> Optional[Dict]:
         match['home_score'] = home_score
         match['away_score'] = away_score
         match['actual_score'] = f"{home_score}-{away_score}"
-        save_single_outcome(match, 'finished')
-        print(f"    [Result] {match.get('home_team')} {match['actual_score']} {match.get('away_team')}")
-        return match
+        return 'finished'
     elif match_status == 'POSTPONED':
-        save_single_outcome(match, 'match_postponed')
-        return None
+        return 'match_postponed'
     elif match_status == 'CANCELED':
-        save_single_outcome(match, 'canceled')
-        return None
+        return 'canceled'
     # Not yet finished — skip
     return None
 
-async def process_review_task_browser(page, match: Dict) -> Optional[Dict]:
-    """Review a prediction by visiting the match page (Browser fallback)."""
+
+async def process_review_task_browser(page, match: Dict, updates: List[Tuple[Dict, str]]) -> Optional[Dict]:
+    """
+    Review a prediction by visiting the match page (Browser fallback).
+    Results are queued in updates for one save_outcomes_batch() write.
+    """
     match_link = match.get('match_link')
     if not match_link:
         return None
 
+    def record(new_status: str):
+        updates.append((match, new_status))
+
     try:
         print(f"      [Fallback] Visiting {match.get('home_team')} vs {match.get('away_team')}...")
-        await page.goto(match_link, timeout=NAVIGATION_TIMEOUT)
-        await page.wait_for_load_state("networkidle")
+        # No networkidle wait: get_final_score() returns as soon as the header score renders
+        await page.goto(match_link, timeout=NAVIGATION_TIMEOUT, wait_until="domcontentloaded")
 
         final_score = await get_final_score(page)
         if final_score and '-' in final_score:
+            # Score read: stop the rest of the page load so the pooled page frees up sooner
+            try:
+                await page.evaluate("window.stop()")
+            except Exception:
+                pass
             match['actual_score'] = final_score
             h_score, a_score = final_score.split('-')
             match['home_score'] = h_score
             match['away_score'] = a_score
-            save_single_outcome(match, 'finished')
+            record('finished')
             print(f"    [Result-B] {match.get('home_team')} {final_score} {match.get('away_team')}")
             return match
         elif final_score == "Match_POSTPONED":
-            save_single_outcome(match, 'match_postponed')
+            record('match_postponed')
         elif final_score == "ARCHIVED":
             print(f"      [!] Match {match.get('fixture_id')} appears deleted or archived. Flagging.")
-            save_single_outcome(match, 'manual_review_needed')
+            record('manual_review_needed')
     except Exception as e:
         print(f"      [Fallback Error] {e}")
     
@@ -357,6 +377,47 @@ async def process_review_task_browser(page, match: Dict) -> Optional[Dict]:
 
 
 
+async def review_in_browser_pool(p: Playwright, matches: List[Dict], updates: List[Tuple[Dict, str]],
+                                 concurrency: int = REVIEW_BROWSER_CONCURRENCY) -> List[Dict]:
+    """
+    Browser fallback over a pool of warm pages sharing one browser.
+    Each worker keeps its own context/page for every match it pulls off the queue.
+    Results are queued in updates; returns the matches that resolved to a final score.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for m in matches:
+        queue.put_nowait(m)
+    resolved = []
+
+    browser = await p.chromium.launch(
+        headless=True,
+        args=['--disable-gpu', '--no-sandbox', '--disable-dev-shm-usage']
+    )
+
+    async def worker():
+        context = await browser.new_context(ignore_https_errors=True)
+        await apply_resource_policy(context, "outcome_review")  # Review only needs the score header text
+        page = await context.new_page()
+        try:
+            while not queue.empty():
+                m = queue.get_nowait()
+                if page.is_closed():
+                    page = await context.new_page()
+                result = await process_review_task_browser(page, m, updates)
+                if result:
+                    resolved.append(result)
+        finally:
+            await context.close()
+
+    try:
+        workers = max(1, min(concurrency, len(matches)))
+        print(f"   [Info] Reviewing with {workers} concurrent pages...")
+        await asyncio.gather(*(worker() for _ in range(workers)), return_exceptions=True)
+    finally:
+        await browser.close()
+    return resolved
+
+
 async def get_league_url(page):
     """
     Extracts the league URL from the match page. Returns empty string if not found.
@@ -479,6 +540,18 @@ def update_region_league_url(region_league: str, url: str):
     upsert_entry(REGION_LEAGUE_CSV, entry, files_and_headers[REGION_LEAGUE_CSV], 'region_league_id')
 
 
+async def _persist_outcomes(updates: List[Tuple[Dict, str]]):
+    """One predictions.csv write and one Supabase upsert for a whole review batch."""
+    rows = await asyncio.to_thread(save_outcomes_batch, updates)
+    if not rows:
+        return
+    print(f"   [Review] Saved {len(rows)} outcomes in one write.")
+    sync = SyncManager()
+    if sync.supabase:
+        print(f"   [Cloud] Upserting {len(rows)} reviewed predictions...")
+        await sync.batch_upsert('predictions', rows)
+
+
 async def run_review_process(p: Optional[Playwright] = None):
     """
     Orchestrates the outcome review process (Offline version with Browser Fallback).
@@ -496,33 +569,35 @@ async def run_review_process(p: Optional[Playwright] = None):
         # Limit to lookback
         to_review = to_review[:LOOKBACK_LIMIT]
         
+        # Join every pending prediction against one in-memory schedules index
+        schedule_db = _load_schedule_db()
         processed_matches = []
         needs_browser = []
+        updates = []
 
         for m in to_review:
-            result = process_review_task_offline(m)
-            if result:
-                processed_matches.append(result)
+            new_status = resolve_outcome_offline(m, schedule_db)
+            if new_status:
+                updates.append((m, new_status))
+                if new_status == 'finished':
+                    processed_matches.append(m)
             else:
                 # If match is in the past but offline failed, queue for browser
                 needs_browser.append(m)
+
+        await _persist_outcomes(updates)
         
         # Fallback to Browser if requested and needed
         if needs_browser and p:
             print(f"   [Info] Triggering Browser Fallback for {len(needs_browser)} unresolved reviews...")
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
-            page = await context.new_page()
-            
-            for m in needs_browser:
-                result = await process_review_task_browser(page, m)
-                if result:
-                    processed_matches.append(result)
-            
-            await browser.close()
+            browser_updates = []
+            processed_matches.extend(await review_in_browser_pool(p, needs_browser, browser_updates))
+            await _persist_outcomes(browser_updates)
         
         if processed_matches:
             print(f"\n   [SUCCESS] Reviewed {len(processed_matches)} match outcomes.")
+            # Fold the newly resolved outcomes into the probability calibration maps
+            ProbabilityCalibrator.ingest_predictions(_read_csv(PREDICTIONS_CSV))
         else:
             print("\n   [Info] All predictions still pending.")
 
@@ -1,7 +1,8 @@
 # prediction_accuracy.py: prediction_accuracy.py: Analytical tools for measuring prediction success.
 # Part of LeoBook Data — Access Layer
 #
-# Functions: get_market_option(), calculate_accuracy_by_date(), calculate_overall_accuracy(), calculate_accuracy_by_confidence(), format_date_for_display(), format_date_range(), print_accuracy_report()
+# Classes: AccuracyAggregator
+# Functions: get_market_option(), calculate_accuracy_by_date(), calculate_overall_accuracy(), calculate_accuracy_by_confidence(), calculate_calibration_report(), format_date_for_display(), format_date_range(), print_accuracy_report()
 
 """
 Prediction Accuracy Analysis Module
@@ -9,78 +10,221 @@ Analyzes prediction accuracy and generates reports for the LeoBook system.
 """
 
 import csv
-import re
+import json
 import os
 from datetime import datetime
-from typing import Dict, List, Tuple
-from pathlib import Path
+from typing import Dict, List, Optional
 
-from .db_helpers import PREDICTIONS_CSV
+from .db_helpers import PREDICTIONS_CSV, DB_DIR
+from .prediction_evaluator import COMPILER_VERSION, compile_prediction
 
 
 def get_market_option(prediction: str, home_team: str, away_team: str) -> str:
     """
     Normalize prediction string into a generic market option.
+    Delegates to the memoized prediction compiler, so the accuracy report,
+    recommendations, calibration and the rule engine share one classification.
     """
-    pred_lower = prediction.lower()
-    home_lower = home_team.lower()
-    away_lower = away_team.lower()
-
-    if pred_lower == 'home win' or pred_lower == home_lower: # Direct team name often means win
-        return "Home Win"
-    if pred_lower == f"{home_lower} to win":
-        return "Home Win"
-        
-    if pred_lower == 'away win' or pred_lower == away_lower:
-        return "Away Win"
-    if pred_lower == f"{away_lower} to win":
-        return "Away Win"
-
-    if 'or draw' in pred_lower:
-        if home_lower in pred_lower:
-            return "Home or Draw"
-        if away_lower in pred_lower:
-            return "Away or Draw"
-        
-    if 'or' in pred_lower and home_lower in pred_lower and away_lower in pred_lower:
-         return "Home or Away"
-
-    if 'btts' in pred_lower or 'both teams to score' in pred_lower:
-        if 'no' in pred_lower:
-            return "BTTS No"
-        return "BTTS Yes"
-    
-    if 'over' in pred_lower and '2.5' in pred_lower:
-        return "Over 2.5"
-    if 'under' in pred_lower and '2.5' in pred_lower:
-        return "Under 2.5"
-        
-    if '(dnb)' in pred_lower:
-        return "Draw No Bet"
-
-    if '2-3 goals' in pred_lower:
-        return "2-3 Goals"
-
-    # Match Over/Under (Starts with Over/Under)
-    # e.g. "Over 2.5", "Under 3.5 Goals"
-    if re.match(r'^(over|under)\s+\d+(\.\d+)?', pred_lower):
-        match = re.search(r'(over|under)\s+(\d+(\.\d+)?)', pred_lower)
-        if match:
-            type_ = match.group(1).title()
-            val = match.group(2)
-            return f"{type_} {val}"
-
-    # Team Over/Under (Ends with or contains " Over/Under value" but didn't start with it)
-    # e.g. "Atletico-Mg U20 Over 0.5", "Team Over 1.5"
-    if re.search(r'\s+(over|under)\s+\d+(\.\d+)?', pred_lower):
-        match = re.search(r'\s+(over|under)\s+(\d+(\.\d+)?)', pred_lower)
-        if match:
-            type_ = match.group(1).title()
-            val = match.group(2)
-            return f"Team {type_} {val}"
-
-    # Return the specific prediction name if no category matched
-    return prediction.title()
+    return compile_prediction(prediction, home_team, away_team).option
+
+
+CONFIDENCE_LEVELS = ['Very High', 'High', 'Low']
+
+
+def _normalize_confidence(confidence: str) -> str:
+    """Collapse confidence labels to the three report levels (Medium counts as Low)."""
+    confidence = (confidence or 'Low').strip().lower()
+    if confidence in ('very high', 'very_high'):
+        return 'Very High'
+    if confidence == 'high':
+        return 'High'
+    return 'Low'
+
+
+def _pct(correct: int, total: int) -> float:
+    return round((correct / total) * 100, 1) if total > 0 else 0.0
+
+
+class AccuracyAggregator:
+    """
+    Single-pass accuracy engine. Each resolved prediction is classified once and
+    folded into per-date buckets holding confidence, market and league counters;
+    every other rollup (overall, by confidence, by market, by league, recent
+    windows) is derived from those buckets. The buckets can be checkpointed so
+    later runs only fold in what changed: every row's contribution is kept, so a
+    re-graded outcome replaces the old one and a row that left predictions.csv
+    (or is unresolved again) is subtracted. A checkpoint written under another
+    schema or market classifier is discarded and rebuilt from the rows.
+    """
+
+    CHECKPOINT_FILE = os.path.join(DB_DIR, "accuracy_checkpoint.json")
+    CHECKPOINT_SCHEMA = 2
+
+    def __init__(self):
+        self.seen: Dict[str, List] = {}  # row key -> [date, hit, confidence, market, league] folded in
+        self.days: Dict[str, Dict] = {}
+
+    @staticmethod
+    def _row_key(pred: Dict) -> str:
+        return pred.get('fixture_id') or f"{pred.get('date')}|{pred.get('home_team')}|{pred.get('away_team')}"
+
+    @staticmethod
+    def _contribution(pred: Dict) -> Optional[List]:
+        outcome = pred.get('outcome_correct')
+        if outcome not in ('True', 'False'):
+            return None
+        market = get_market_option(pred.get('prediction', ''), pred.get('home_team', ''), pred.get('away_team', ''))
+        return [pred.get('date') or 'Unknown', 1 if outcome == 'True' else 0,
+                _normalize_confidence(pred.get('confidence')), market, pred.get('region_league') or 'Unknown']
+
+    def _apply(self, entry: List, sign: int):
+        """Add (sign=1) or subtract (sign=-1) one row's contribution, dropping emptied counters."""
+        date, hit, confidence, market, league = entry
+        day = self.days.setdefault(date, {
+            'total': 0, 'correct': 0, 'confidence': {}, 'market': {}, 'league': {},
+        })
+        day['total'] += sign
+        day['correct'] += sign * hit
+        for bucket, name in (('confidence', confidence), ('market', market), ('league', league)):
+            counts = day[bucket].setdefault(name, [0, 0])
+            counts[0] += sign
+            counts[1] += sign * hit
+            if counts[0] <= 0:
+                del day[bucket][name]
+        if day['total'] <= 0:
+            del self.days[date]
+
+    def add(self, pred: Dict) -> bool:
+        """Fold one prediction in. Unresolved or unchanged rows are ignored; a changed row replaces its old contribution."""
+        entry = self._contribution(pred)
+        if entry is None:
+            return False
+        key = self._row_key(pred)
+        old = self.seen.get(key)
+        if old == entry:
+            return False
+        if old is not None:
+            self._apply(old, -1)
+        self._apply(entry, 1)
+        self.seen[key] = entry
+        return True
+
+    def add_all(self, predictions: List[Dict]) -> int:
+        return sum(1 for pred in predictions if self.add(pred))
+
+    def retain(self, predictions: List[Dict]) -> int:
+        """Subtract rows that are no longer resolved in predictions (deleted or reset). Returns how many."""
+        current = {self._row_key(p) for p in predictions if p.get('outcome_correct') in ('True', 'False')}
+        stale = [key for key in self.seen if key not in current]
+        for key in stale:
+            self._apply(self.seen.pop(key), -1)
+        return len(stale)
+
+    @classmethod
+    def from_rows(cls, predictions: List[Dict]) -> 'AccuracyAggregator':
+        agg = cls()
+        agg.add_all(predictions)
+        return agg
+
+    @classmethod
+    def from_checkpoint(cls, predictions: List[Dict]) -> 'AccuracyAggregator':
+        """Resume from the saved checkpoint, reconcile it with predictions (the full table) and re-save if anything changed."""
+        agg = cls()
+        if os.path.exists(cls.CHECKPOINT_FILE):
+            try:
+                with open(cls.CHECKPOINT_FILE, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if state.get('schema') == cls.CHECKPOINT_SCHEMA and state.get('classifier') == COMPILER_VERSION:
+                    agg.seen = state.get('seen', {})
+                    agg.days = state.get('days', {})
+                else:
+                    print("  [Accuracy] Checkpoint from another schema/classifier version; rebuilding.")
+            except Exception as e:
+                print(f"  [Accuracy] Ignoring unreadable checkpoint: {e}")
+                agg = cls()
+        changed = agg.add_all(predictions)
+        if agg.retain(predictions) or changed:
+            agg.save_checkpoint()
+        return agg
+
+    def save_checkpoint(self):
+        try:
+            tmp = self.CHECKPOINT_FILE + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'schema': self.CHECKPOINT_SCHEMA, 'classifier': COMPILER_VERSION,
+                           'seen': self.seen, 'days': self.days}, f)
+            os.replace(tmp, self.CHECKPOINT_FILE)
+        except OSError as e:
+            print(f"  [Accuracy] Failed to save checkpoint: {e}")
+
+    # ── Rollups ──────────────────────────────────────
+
+    def _dates(self, since: Optional[datetime] = None):
+        """Yields (date_str, parsed_date or None, bucket), optionally limited to dates >= since."""
+        for date_str, day in self.days.items():
+            try:
+                parsed = datetime.strptime(date_str, "%d.%m.%Y")
+            except ValueError:
+                parsed = None
+            if since is not None and (parsed is None or parsed < since):
+                continue
+            yield date_str, parsed, day
+
+    def _rollup(self, bucket: str, since: Optional[datetime] = None, dated_only: bool = False) -> Dict[str, Dict]:
+        totals: Dict[str, List[int]] = {}
+        for _, parsed, day in self._dates(since):
+            if dated_only and parsed is None:
+                continue
+            for name, (total, correct) in day[bucket].items():
+                counts = totals.setdefault(name, [0, 0])
+                counts[0] += total
+                counts[1] += correct
+        return {name: {'total': t, 'correct': c, 'acc': _pct(c, t)} for name, (t, c) in totals.items()}
+
+    def by_date(self) -> Dict[str, Dict]:
+        result = {}
+        for date_str, day in self.days.items():
+            confidence_stats = {lvl: {'total': 0, 'correct': 0, 'acc': 0.0} for lvl in CONFIDENCE_LEVELS}
+            for lvl, (t, c) in day['confidence'].items():
+                confidence_stats[lvl] = {'total': t, 'correct': c, 'acc': _pct(c, t)}
+            result[date_str] = {
+                'total_predictions': day['total'],
+                'correct_predictions': day['correct'],
+                'accuracy_percentage': _pct(day['correct'], day['total']),
+                'formatted_date': format_date_for_display(date_str),
+                'confidence_stats': confidence_stats,
+                'market_stats': {m: {'total': t, 'correct': c, 'acc': _pct(c, t)} for m, (t, c) in day['market'].items()},
+            }
+        return result
+
+    def overall(self) -> Dict:
+        total = sum(day['total'] for day in self.days.values())
+        correct = sum(day['correct'] for day in self.days.values())
+        dates = [parsed.date() for _, parsed, _ in self._dates() if parsed is not None]
+        return {
+            'total_reviewed_predictions': total,
+            'correct_predictions': correct,
+            'overall_accuracy_percentage': _pct(correct, total),
+            'date_range': {'earliest': min(dates) if dates else None, 'latest': max(dates) if dates else None},
+        }
+
+    def by_confidence(self) -> Dict[str, Dict]:
+        rolled = self._rollup('confidence')
+        return {
+            lvl: {
+                'total_predictions': rolled.get(lvl, {}).get('total', 0),
+                'correct_predictions': rolled.get(lvl, {}).get('correct', 0),
+                'accuracy_percentage': rolled.get(lvl, {}).get('acc', 0.0),
+            }
+            for lvl in CONFIDENCE_LEVELS
+        }
+
+    def by_market(self, since: Optional[datetime] = None) -> Dict[str, Dict]:
+        """Market rollup over dated predictions (optionally only those on/after `since`)."""
+        return self._rollup('market', since=since, dated_only=True)
+
+    def by_league(self) -> Dict[str, Dict]:
+        return self._rollup('league')
 
 
 def calculate_accuracy_by_date(predictions: List[Dict]) -> Dict[str, Dict]:
@@ -100,78 +244,7 @@ def calculate_accuracy_by_date(predictions: List[Dict]) -> Dict[str, Dict]:
             }
         }
     """
-    accuracy_by_date = {}
-
-    for pred in predictions:
-        outcome = pred.get('outcome_correct')
-        if outcome in ['True', 'False']:
-            date = pred.get('date', 'Unknown')
-            confidence = pred.get('confidence', 'Low').strip() # Default to Low if missing
-            
-            # Normalize confidence
-            if confidence.lower() in ['very high', 'very_high']:
-                confidence = 'Very High'
-            elif confidence.lower() in ['high']:
-                confidence = 'High'
-            else:
-                confidence = 'Low'
-
-            # Get generic market option
-            home_team = pred.get('home_team', '')
-            away_team = pred.get('away_team', '')
-            prediction_text = pred.get('prediction', '')
-            market_option = get_market_option(prediction_text, home_team, away_team)
-
-            if date not in accuracy_by_date:
-                accuracy_by_date[date] = {
-                    'total_predictions': 0,
-                    'correct_predictions': 0,
-                    'accuracy_percentage': 0.0,
-                    'formatted_date': format_date_for_display(date),
-                    'confidence_stats': {
-                        'Very High': {'total': 0, 'correct': 0, 'acc': 0.0},
-                        'High': {'total': 0, 'correct': 0, 'acc': 0.0},
-                        'Low': {'total': 0, 'correct': 0, 'acc': 0.0}
-                    },
-                    'market_stats': {} 
-                }
-
-            # Update Daily Totals
-            accuracy_by_date[date]['total_predictions'] += 1
-            if outcome == 'True':
-                accuracy_by_date[date]['correct_predictions'] += 1
-
-            # Update Confidence Stats
-            accuracy_by_date[date]['confidence_stats'][confidence]['total'] += 1
-            if outcome == 'True':
-                accuracy_by_date[date]['confidence_stats'][confidence]['correct'] += 1
-            
-            # Update Market Stats
-            if market_option not in accuracy_by_date[date]['market_stats']:
-                accuracy_by_date[date]['market_stats'][market_option] = {'total': 0, 'correct': 0, 'acc': 0.0}
-            
-            accuracy_by_date[date]['market_stats'][market_option]['total'] += 1
-            if outcome == 'True':
-                accuracy_by_date[date]['market_stats'][market_option]['correct'] += 1
-
-    # Calculate percentages
-    for date, data in accuracy_by_date.items():
-        if data['total_predictions'] > 0:
-            data['accuracy_percentage'] = round(
-                (data['correct_predictions'] / data['total_predictions']) * 100, 1
-            )
-        
-        # Calculate Confidence Percentages
-        for conf, c_data in data['confidence_stats'].items():
-             if c_data['total'] > 0:
-                 c_data['acc'] = round((c_data['correct'] / c_data['total']) * 100, 1)
-
-        # Calculate Market Percentages
-        for mkt, m_data in data['market_stats'].items():
-            if m_data['total'] > 0:
-                m_data['acc'] = round((m_data['correct'] / m_data['total']) * 100, 1)
-
-    return accuracy_by_date
+    return AccuracyAggregator.from_rows(predictions).by_date()
 
 
 def calculate_overall_accuracy(predictions: List[Dict]) -> Dict:
@@ -181,41 +254,7 @@ def calculate_overall_accuracy(predictions: List[Dict]) -> Dict:
     Returns:
         Dict with overall accuracy metrics
     """
-    from typing import Optional
-    from datetime import date
-
-    total_reviewed = 0
-    total_correct = 0
-    date_range: Dict[str, Optional[date]] = {'earliest': None, 'latest': None}
-
-    for pred in predictions:
-        outcome = pred.get('outcome_correct')
-        if outcome in ['True', 'False']:
-            total_reviewed += 1
-            if outcome == 'True':
-                total_correct += 1
-
-            date_str = pred.get('date')
-            if date_str:
-                try:
-                    date_obj = datetime.strptime(date_str, "%d.%m.%Y").date()
-                    if date_range['earliest'] is None or date_obj < date_range['earliest']:
-                        date_range['earliest'] = date_obj
-                    if date_range['latest'] is None or date_obj > date_range['latest']:
-                        date_range['latest'] = date_obj
-                except ValueError:
-                    continue
-
-    overall_accuracy = 0.0
-    if total_reviewed > 0:
-        overall_accuracy = round((total_correct / total_reviewed) * 100, 1)
-
-    return {
-        'total_reviewed_predictions': total_reviewed,
-        'correct_predictions': total_correct,
-        'overall_accuracy_percentage': overall_accuracy,
-        'date_range': date_range
-    }
+    return AccuracyAggregator.from_rows(predictions).overall()
 
 
 def calculate_accuracy_by_confidence(predictions: List[Dict]) -> Dict[str, Dict]:
@@ -234,47 +273,33 @@ def calculate_accuracy_by_confidence(predictions: List[Dict]) -> Dict[str, Dict]
             "Low": {...}
         }
     """
-    # Define confidence level mappings
-    confidence_mapping = {
-        'Very High': ['Very High', 'very high', 'VERY HIGH'],
-        'High': ['High', 'high', 'HIGH'],
-        'Low': ['Low', 'low', 'LOW', 'Medium', 'medium', 'MEDIUM']  # Include Medium as Low for simplicity
-    }
+    return AccuracyAggregator.from_rows(predictions).by_confidence()
 
-    accuracy_by_confidence = {}
 
-    # Initialize confidence levels
-    for conf_level in confidence_mapping.keys():
-        accuracy_by_confidence[conf_level] = {
-            'total_predictions': 0,
-            'correct_predictions': 0,
-            'accuracy_percentage': 0.0
-        }
+def calculate_calibration_report(predictions: List[Dict]) -> Dict[str, Dict]:
+    """
+    Brier score, log-loss and reliability bins for reviewed predictions that
+    carry a raw confidence_score, before ('raw') and after ('calibrated') the
+    fitted per-market/league maps. Calibrated figures are in-sample.
+    """
+    from Core.Intelligence.calibration import ProbabilityCalibrator
 
+    raw, calibrated = [], []
     for pred in predictions:
-        outcome = pred.get('outcome_correct')
-        confidence = pred.get('confidence', '').strip()
-
-        if outcome in ['True', 'False']:
-            # Determine confidence level
-            conf_level = 'Low'  # Default to Low
-            for level, aliases in confidence_mapping.items():
-                if confidence in aliases:
-                    conf_level = level
-                    break
-
-            accuracy_by_confidence[conf_level]['total_predictions'] += 1
-            if outcome == 'True':
-                accuracy_by_confidence[conf_level]['correct_predictions'] += 1
-
-    # Calculate percentages for each confidence level
-    for conf_level, data in accuracy_by_confidence.items():
-        if data['total_predictions'] > 0:
-            data['accuracy_percentage'] = round(
-                (data['correct_predictions'] / data['total_predictions']) * 100, 1
-            )
+        try:
+            score = float(pred.get('confidence_score') or '')
+        except ValueError:
+            continue
+        correct = pred.get('outcome_correct') == 'True'
+        market = get_market_option(pred.get('prediction', ''), pred.get('home_team', ''), pred.get('away_team', ''))
+        prob = ProbabilityCalibrator.apply(market, pred.get('region_league'), score)
+        raw.append((score, correct))
+        calibrated.append((score if prob is None else prob, correct))
 
-    return accuracy_by_confidence
+    return {
+        'raw': ProbabilityCalibrator.evaluate(raw),
+        'calibrated': ProbabilityCalibrator.evaluate(calibrated),
+    }
 
 
 def format_date_for_display(date_str: str) -> str:
@@ -340,13 +365,14 @@ def print_accuracy_report():
         return
 
     # Filter for reviewed predictions only (must have actual resolved outcomes)
-    reviewed_predictions = [
-        pred for pred in predictions
-        if pred.get('outcome_correct') in ['True', 'False']
-    ]
+    reviewed_predictions = []
+    total_pending = 0
+    for pred in predictions:
+        if pred.get('outcome_correct') in ['True', 'False']:
+            reviewed_predictions.append(pred)
+        elif pred.get('status') == 'pending':
+            total_pending += 1
 
-    total_pending = sum(1 for p in predictions if p.get('status') == 'pending')
-    
     if not reviewed_predictions:
         if total_pending > 0:
             print(f"  [Accuracy] {total_pending} predictions still pending — no outcomes resolved yet. Skipping report.")
@@ -354,19 +380,25 @@ def print_accuracy_report():
             print("  [Accuracy] No reviewed predictions found.")
         return
 
-    # Calculate accuracy by date
-    accuracy_by_date = calculate_accuracy_by_date(reviewed_predictions)
+    # One aggregation pass (resumed from the checkpoint) feeds every section below
+    aggregator = AccuracyAggregator.from_checkpoint(reviewed_predictions)
+    accuracy_by_date = aggregator.by_date()
 
-    # Sort dates chronologically
-    sorted_dates = sorted(accuracy_by_date.keys(),
-                         key=lambda d: datetime.strptime(d, "%d.%m.%Y") if d != 'Unknown' else datetime.max.date())
+    # Sort dates chronologically (unparseable dates are skipped below)
+    def _date_sort_key(d):
+        try:
+            return datetime.strptime(d, "%d.%m.%Y")
+        except ValueError:
+            return datetime.max
+
+    sorted_dates = sorted(accuracy_by_date.keys(), key=_date_sort_key)
 
     # Print individual date accuracies
     print("\n  [Prediction Accuracy Report]")
     print("  " + "="*50)
 
     for date in sorted_dates:
-        if date == 'Unknown':
+        if _date_sort_key(date) == datetime.max:
             continue
 
         data = accuracy_by_date[date]
@@ -397,8 +429,8 @@ def print_accuracy_report():
             
             print("  " + "-"*30) # Separator for readability
 
-    # Calculate accuracy by confidence level
-    accuracy_by_confidence = calculate_accuracy_by_confidence(reviewed_predictions)
+    # Accuracy by confidence level
+    accuracy_by_confidence = aggregator.by_confidence()
 
     # Print confidence-based accuracy
     print("  " + "="*50)
@@ -411,20 +443,45 @@ def print_accuracy_report():
             if data['total_predictions'] > 0:
                 print(f"  {conf_level} Confidence: {data['accuracy_percentage']}% Accurate - {data['total_predictions']} Reviewed Predictions")
 
-    # Calculate and print overall accuracy
-    overall_stats = calculate_overall_accuracy(reviewed_predictions)
+    # League rollup (top 5 by volume)
+    top_leagues = sorted(aggregator.by_league().items(), key=lambda x: x[1]['total'], reverse=True)[:5]
+    if top_leagues:
+        print("  " + "="*50)
+        print("  [Top Leagues]")
+        for league, l_data in top_leagues:
+            print(f"  {league}: {l_data['acc']}% Accurate - {l_data['total']} Predictions")
+
+    # Overall accuracy
+    overall_stats = aggregator.overall()
     date_range_str = format_date_range(overall_stats['date_range'])
 
     print("  " + "="*50)
     print(f"  {date_range_str}: {overall_stats['overall_accuracy_percentage']}% Accurate - {overall_stats['total_reviewed_predictions']} Predictions")
+
+    # Probability calibration: refresh maps with any new outcomes, then score them
+    from Core.Intelligence.calibration import ProbabilityCalibrator
+    ProbabilityCalibrator.ingest_predictions(reviewed_predictions)
+    calibration = calculate_calibration_report(reviewed_predictions)
+    if calibration['raw']['n']:
+        print("  " + "="*50)
+        print(f"  [Probability Calibration] {calibration['raw']['n']} scored predictions")
+        for label in ('raw', 'calibrated'):
+            stats = calibration[label]
+            print(f"  {label.title():<10} Brier: {stats['brier']:.4f} | Log-loss: {stats['log_loss']:.4f}")
+        print("  Reliability (calibrated): predicted -> observed")
+        for b in calibration['calibrated']['bins']:
+            bar = "#" * round(b['observed'] * 20)
+            print(f"    {b['lo']:.1f}-{b['hi']:.1f}: {b['predicted']:.2f} -> {b['observed']:.2f} {bar:<20} ({b['n']})")
     print()
 
 
 # Module-level functions for external use
 __all__ = [
+    'AccuracyAggregator',
     'calculate_accuracy_by_date',
     'calculate_overall_accuracy',
     'calculate_accuracy_by_confidence',
+    'calculate_calibration_report',
     'print_accuracy_report',
     'format_date_for_display'
 ]
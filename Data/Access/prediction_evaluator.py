@@ -1,16 +1,250 @@
 # prediction_evaluator.py: prediction_evaluator.py: Logic for resolving betting market outcomes.
 # Part of LeoBook Data — Access Layer
 #
-# Functions: evaluate_prediction()
+# Classes: MarketDescriptor
+# Functions: compile_prediction(), evaluate(), evaluate_prediction(), parse_score()
+# Called by: outcome_reviewer.py, review_outcomes.py, prediction_accuracy.py, progressive_backtester.py, fs_live_streamer.py
 
 """
 Prediction Evaluator Module
 Handles prediction evaluation logic for all betting markets.
 Responsible for determining if predictions are correct based on actual match outcomes.
+
+Free-text predictions ("Arsenal to win", "Over 2.5", "Chelsea or Draw") are compiled
+once per (prediction, home_team, away_team) into a small MarketDescriptor. Grading is
+then pure arithmetic on goals, so a whole batch is graded in one NumPy pass with
+evaluate(), and every caller (review, live streamer, backtest, accuracy) agrees.
 """
 
 import re
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Market types
+WIN = "WIN"                  # side: home/away
+DRAW = "DRAW"
+DOUBLE_CHANCE = "DOUBLE_CHANCE"  # side: home/away (or draw), either (no draw)
+DRAW_NO_BET = "DRAW_NO_BET"  # side: home/away; a draw is graded as not won
+BTTS_YES = "BTTS_YES"
+BTTS_NO = "BTTS_NO"
+OVER = "OVER"                # side: total/home/away, line
+UNDER = "UNDER"              # side: total/home/away, line
+GOAL_RANGE = "GOAL_RANGE"    # line..upper total goals, inclusive
+CORRECT_SCORE = "CORRECT_SCORE"  # line = home goals, upper = away goals
+CLEAN_SHEET = "CLEAN_SHEET"  # side keeps a clean sheet
+HANDICAP = "HANDICAP"        # side goals + line > opponent goals
+UNKNOWN = "UNKNOWN"
+
+_SCORE_RE = re.compile(r'^\s*(\d+)\s*-\s*(\d+)')
+_OVER_UNDER_RE = re.compile(r'^(?:(.*?)[\s_]+)?(over|under)[\s_]+(\d+(?:[._]\d+)?)(?:\s+goals)?$')
+_BTTS_RE = re.compile(r'^(?:btts|both teams to score)(?:[\s_]+(yes|no))?$')
+_RANGE_RE = re.compile(r'^(\d+)-(\d+) goals$')
+_PLUS_RE = re.compile(r'^(\d+)\+ goals$')
+_CORRECT_SCORE_RE = re.compile(r'^(\d+)-(\d+)$')
+_HANDICAP_RE = re.compile(r'^(.+?)\s*([+-]\d+(?:\.\d+)?)$')
+
+# Bump when compile_prediction() classifies any prediction differently (invalidates accuracy checkpoints)
+COMPILER_VERSION = 1
+
+_HOME_ALIASES = ('home', 'home team', 'team')
+_AWAY_ALIASES = ('away', 'away team')
+
+
+class MarketDescriptor(NamedTuple):
+    """Compiled form of a prediction string. 'option' is the generic market label used in reports."""
+    market: str
+    side: str = ""
+    line: float = 0.0
+    upper: float = 0.0
+    also: Optional["MarketDescriptor"] = None  # Second leg of a combo ("X to win & BTTS Yes")
+    option: str = ""
+
+
+def _side_of(name: str, home_lower: str, away_lower: str) -> str:
+    """Resolve a team reference to 'home'/'away' ('' if it names neither)."""
+    name = name.strip()
+    if name and name == home_lower:
+        return "home"
+    if name and name == away_lower:
+        return "away"
+    return ""
+
+
+def _fmt(line: float) -> str:
+    return f"{line:g}"
+
+
+@lru_cache(maxsize=65536)
+def compile_prediction(prediction: str, home_team: str = "", away_team: str = "") -> MarketDescriptor:
+    """
+    Compile a prediction string into a MarketDescriptor (memoized).
+    Understands the markets produced by BettingMarkets plus the legacy aliases
+    (HOME_WIN, 1X, OVER_2_5, "Both Teams To Score No", ...).
+    """
+    raw = (prediction or "").strip()
+    descriptor = _compile_single(raw, (home_team or "").lower().strip(), (away_team or "").lower().strip())
+
+    # Combo bets: "Team to win & Over 2.5", "Team to win & BTTS Yes".
+    # Tried only after a single-market parse fails, since team names may contain " & ".
+    if descriptor.market == UNKNOWN and " & " in raw:
+        parts = raw.split(" & ")
+        for i in range(1, len(parts)):
+            d1 = compile_prediction(" & ".join(parts[:i]), home_team, away_team)
+            d2 = compile_prediction(" & ".join(parts[i:]), home_team, away_team)
+            if d1.market != UNKNOWN and d2.market != UNKNOWN and d1.also is None:
+                return d1._replace(also=d2, option=f"{d1.option} & {d2.option}")
+    return descriptor
+
+
+def _compile_single(raw: str, home_lower: str, away_lower: str) -> MarketDescriptor:
+    p = raw.lower()
+    title = raw.title()
+
+    # 1X2
+    if p in ("home win", "home_win", "1") or (home_lower and p in (home_lower, f"{home_lower} to win")):
+        return MarketDescriptor(WIN, "home", option="Home Win")
+    if p in ("away win", "away_win", "2") or (away_lower and p in (away_lower, f"{away_lower} to win")):
+        return MarketDescriptor(WIN, "away", option="Away Win")
+    if p in ("draw", "x"):
+        return MarketDescriptor(DRAW, option="Draw")
+
+    # Draw No Bet
+    if p.endswith(" to win (dnb)"):
+        side = _side_of(p[:-len(" to win (dnb)")], home_lower, away_lower)
+        if side:
+            return MarketDescriptor(DRAW_NO_BET, side, option="Draw No Bet")
+    if p in ("draw no bet", "draw_no_bet", "dnb"):
+        # Without a team, the home side is assumed (most common)
+        return MarketDescriptor(DRAW_NO_BET, "home", option="Draw No Bet")
+
+    # Double Chance
+    if p in ("home or draw", "home_or_draw", "1x"):
+        return MarketDescriptor(DOUBLE_CHANCE, "home", option="Home or Draw")
+    if p in ("away or draw", "away_or_draw", "x2"):
+        return MarketDescriptor(DOUBLE_CHANCE, "away", option="Away or Draw")
+    if p.endswith(" or draw"):
+        side = _side_of(p[:-len(" or draw")], home_lower, away_lower)
+        if side:
+            return MarketDescriptor(DOUBLE_CHANCE, side, option="Home or Draw" if side == "home" else "Away or Draw")
+    if p in ("home or away", "home_or_away", "12") or (
+            home_lower and away_lower and p in (f"{home_lower} or {away_lower}", f"{away_lower} or {home_lower}")):
+        return MarketDescriptor(DOUBLE_CHANCE, "either", option="Home or Away")
+
+    # BTTS
+    btts = _BTTS_RE.match(p)
+    if btts:
+        if btts.group(1) == "no":
+            return MarketDescriptor(BTTS_NO, option="BTTS No")
+        return MarketDescriptor(BTTS_YES, option="BTTS Yes")
+
+    # Over/Under: match totals ("Over 2.5", "OVER_2_5") and team goals ("Arsenal Over 0.5")
+    ou = _OVER_UNDER_RE.match(p)
+    if ou:
+        team, direction, value = ou.group(1), ou.group(2), ou.group(3)
+        line = float(value.replace("_", "."))
+        market = OVER if direction == "over" else UNDER
+        label = f"{direction.title()} {_fmt(line)}"
+        if not team:
+            return MarketDescriptor(market, "total", line, option=label)
+        if team in _HOME_ALIASES or team == home_lower:
+            return MarketDescriptor(market, "home", line, option=f"Team {label}")
+        if team in _AWAY_ALIASES or team == away_lower:
+            return MarketDescriptor(market, "away", line, option=f"Team {label}")
+        return MarketDescriptor(UNKNOWN, option=f"Team {label}")
+
+    # Goal ranges: "2-3 goals", "4+ goals"
+    goal_range = _RANGE_RE.match(p)
+    if goal_range:
+        low, high = map(int, goal_range.groups())
+        return MarketDescriptor(GOAL_RANGE, "total", low, high, option=f"{low}-{high} Goals")
+    plus = _PLUS_RE.match(p)
+    if plus:
+        low = int(plus.group(1))
+        return MarketDescriptor(GOAL_RANGE, "total", low, float("inf"), option=f"{low}+ Goals")
+
+    # Correct score: "2-1"
+    correct_score = _CORRECT_SCORE_RE.match(p)
+    if correct_score:
+        pred_h, pred_a = map(int, correct_score.groups())
+        return MarketDescriptor(CORRECT_SCORE, "", pred_h, pred_a, option=title)
+
+    # Clean sheet: "Team Clean Sheet"
+    if p.endswith(" clean sheet"):
+        side = _side_of(p[:-len(" clean sheet")], home_lower, away_lower)
+        if side:
+            return MarketDescriptor(CLEAN_SHEET, side, option=title)
+
+    # Asian handicap: "Team -1", "Team +0.5"
+    handicap = _HANDICAP_RE.match(p)
+    if handicap:
+        side = _side_of(handicap.group(1), home_lower, away_lower)
+        if side:
+            return MarketDescriptor(HANDICAP, side, float(handicap.group(2)), option=title)
+
+    return MarketDescriptor(UNKNOWN, option=title)
+
+
+def evaluate(descriptors: Sequence[MarketDescriptor], home_goals, away_goals) -> np.ndarray:
+    """
+    Grade many compiled predictions at once.
+    Returns a float array: 1.0 correct, 0.0 incorrect, NaN when the market is unknown
+    or the goals are missing (NaN).
+    """
+    n = len(descriptors)
+    out = np.full(n, np.nan)
+    if n == 0:
+        return out
+
+    h = np.asarray(home_goals, dtype=float)
+    a = np.asarray(away_goals, dtype=float)
+    markets = np.array([d.market for d in descriptors], dtype=object)
+    sides = np.array([d.side for d in descriptors], dtype=object)
+    lines = np.array([d.line for d in descriptors], dtype=float)
+    uppers = np.array([d.upper for d in descriptors], dtype=float)
+
+    is_home, is_away = sides == "home", sides == "away"
+    total = h + a
+    # Goals of the side a market refers to, and of its opponent
+    own = np.where(is_home, h, np.where(is_away, a, total))
+    opp = np.where(is_home, a, h)
+
+    outcomes = {
+        WIN: own > opp,
+        DRAW_NO_BET: own > opp,
+        DRAW: h == a,
+        DOUBLE_CHANCE: np.where(sides == "either", h != a, own >= opp),
+        BTTS_YES: (h > 0) & (a > 0),
+        BTTS_NO: (h == 0) | (a == 0),
+        OVER: own > lines,
+        UNDER: own < lines,
+        GOAL_RANGE: (total >= lines) & (total <= uppers),
+        CORRECT_SCORE: (h == lines) & (a == uppers),
+        CLEAN_SHEET: opp == 0,
+        HANDICAP: own + lines > opp,
+    }
+    for market, result in outcomes.items():
+        mask = markets == market
+        if mask.any():
+            out[mask] = result[mask]
+
+    # Combos: both legs must win
+    combo = [i for i, d in enumerate(descriptors) if d.also is not None]
+    if combo:
+        second = evaluate([descriptors[i].also for i in combo], h[combo], a[combo])
+        out[combo] = np.where(np.isnan(second), np.nan, out[combo] * second)
+
+    out[np.isnan(h) | np.isnan(a)] = np.nan
+    return out
+
+
+def parse_score(actual_score: str) -> Optional[Tuple[int, int]]:
+    """'3-1', '3 - 1' or '3-1-AET' -> (3, 1); None if there is no score."""
+    match = _SCORE_RE.match(actual_score or "")
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
 
 
 def evaluate_prediction(prediction: str, actual_score: str, home_team: str, away_team: str) -> Optional[bool]:
@@ -27,185 +261,11 @@ def evaluate_prediction(prediction: str, actual_score: str, home_team: str, away
     Returns:
         Optional[bool]: True if correct, False if incorrect, None if format is unrecognized.
     """
-    try:
-        home_goals, away_goals = map(int, actual_score.split('-'))
-        total_goals = home_goals + away_goals
-    except (ValueError, TypeError):
+    score = parse_score(actual_score)
+    if score is None:
         return None # Cannot determine outcome from score
 
-    # Normalize prediction string - keep original case for team name matching
-    prediction_str = prediction.strip()
-
-    # Create normalized versions for different matching strategies
-    prediction_lower = prediction_str.lower()
-    home_team_lower = home_team.lower().strip()
-    away_team_lower = away_team.lower().strip()
-
-    # --- Market Evaluation Logic ---
-
-    # 1. 1X2: "Team to win" or "Draw"
-    if prediction_str.endswith(" to win"):
-        team_name = prediction_str.replace(" to win", "").strip()
-        if team_name.lower() == home_team_lower:
-            return home_goals > away_goals
-        elif team_name.lower() == away_team_lower:
-            return away_goals > home_goals
-    if prediction_lower == 'draw':
-        return home_goals == away_goals
-
-    # 2. Double Chance: "Team or Draw"
-    if " or Draw" in prediction_str:
-        team_name = prediction_str.replace(" or Draw", "").strip()
-        if team_name.lower() == home_team_lower:
-            return home_goals >= away_goals  # Home win or draw
-        elif team_name.lower() == away_team_lower:
-            return away_goals >= home_goals  # Away win or draw
-
-    # 3. Draw No Bet: "Team to win (DNB)" or "Team" (where prediction is just the team name)
-    if prediction_str.endswith(" to win (DNB)"):
-        team_name = prediction_str.replace(" to win (DNB)", "").strip()
-        if team_name.lower() == home_team_lower:
-            return home_goals > away_goals
-        elif team_name.lower() == away_team_lower:
-            return away_goals > home_goals
-
-    if prediction_str == home_team:
-        return home_goals > away_goals
-    if prediction_str == away_team:
-        return away_goals > home_goals
-
-    # 4. BTTS: "Both Teams To Score Yes/No"
-    if prediction_str == "Both Teams To Score Yes":
-        return home_goals > 0 and away_goals > 0
-    if prediction_str == "Both Teams To Score No":
-        return home_goals == 0 or away_goals == 0
-
-    # 5. Over/Under Markets: "Over 2.5", "Under 1.5"
-    if prediction_lower.startswith('over '):
-        try:
-            value = float(prediction_lower.split('over')[1].strip())
-            return total_goals > value
-        except (ValueError, IndexError): pass
-    if prediction_lower.startswith('under '):
-        try:
-            value = float(prediction_lower.split('under')[1].strip())
-            return total_goals < value
-        except (ValueError, IndexError): pass
-
-    # 6. Goal Range: "2-3 goals", "4-6 goals", "0-1 goals"
-    if 'goals' in prediction_lower:
-        range_match = re.match(r'(\d+)-(\d+) goals', prediction_lower)
-        if range_match:
-            low, high = map(int, range_match.groups())
-            return low <= total_goals <= high
-
-        plus_match = re.match(r'(\d+)\+ goals', prediction_lower)
-        if plus_match:
-            low = int(plus_match.groups()[0])
-            return total_goals >= low
-
-    # 7. Correct Score: "2-1", "1-0", "0-0"
-    if re.match(r'^\d+-\d+$', prediction_str):
-        try:
-            pred_h, pred_a = map(int, prediction_str.split('-'))
-            return home_goals == pred_h and away_goals == pred_a
-        except ValueError: pass
-
-    # 8. Clean Sheet: "Team Clean Sheet"
-    if prediction_str.endswith(" Clean Sheet"):
-        team_name = prediction_str.replace(" Clean Sheet", "").strip()
-        if team_name.lower() == home_team_lower:
-            return away_goals == 0
-        elif team_name.lower() == away_team_lower:
-            return home_goals == 0
-
-    # 9. Asian Handicap: "Team -1", "Team +0.5"
-    handicap_match = re.match(r'(.+?)\s*([+-]\d+(?:\.\d+)?)$', prediction_str)
-    if handicap_match:
-        team_name, handicap_str = handicap_match.groups()
-        try:
-            handicap = float(handicap_str)
-            if team_name.strip().lower() == home_team_lower:
-                return (home_goals + handicap) > away_goals
-            elif team_name.strip().lower() == away_team_lower:
-                return (away_goals + handicap) > home_goals
-        except ValueError:
-            pass
-
-    # 10. Combo Bets: "Team to win & Over 2.5", "Team to win & BTTS Yes"
-    if " to win & " in prediction_str:
-        parts = prediction_str.split(" to win & ")
-        if len(parts) == 2:
-            team_name = parts[0].strip()
-            condition = parts[1].strip().lower()
-
-            # Determine win condition
-            if team_name.lower() == home_team_lower:
-                win_condition = home_goals > away_goals
-            elif team_name.lower() == away_team_lower:
-                win_condition = away_goals > home_goals
-            else:
-                win_condition = False
-
-            # Determine secondary condition
-            if condition == "over 2.5":
-                secondary_condition = total_goals > 2.5
-            elif condition == "btts yes":
-                secondary_condition = home_goals > 0 and away_goals > 0
-            elif condition == "btts no":
-                secondary_condition = home_goals == 0 or away_goals == 0
-            else:
-                secondary_condition = False
-
-            return win_condition and secondary_condition
-
-    # 11. Team Over/Under: "Team Over 1.5"
-    if " Over " in prediction_str:
-        parts = prediction_str.split(" Over ")
-        if len(parts) == 2:
-            team_name = parts[0].strip()
-            try:
-                value = float(parts[1].strip())
-                if team_name.lower() == home_team_lower:
-                    return home_goals > value
-                elif team_name.lower() == away_team_lower:
-                    return away_goals > value
-            except ValueError:
-                pass
-
-    # 12. Winner and BTTS combinations
-    if " & BTTS " in prediction_str:
-        parts = prediction_str.split(" & BTTS ")
-        if len(parts) == 2:
-            winner_part = parts[0].strip()
-            btts_part = parts[1].strip()
-
-            # Parse winner
-            if winner_part.endswith(" to win"):
-                team_name = winner_part.replace(" to win", "").strip()
-                if team_name.lower() == home_team_lower:
-                    win_condition = home_goals > away_goals
-                elif team_name.lower() == away_team_lower:
-                    win_condition = away_goals > home_goals
-                else:
-                    win_condition = False
-            else:
-                win_condition = False
-
-            # Parse BTTS
-            if btts_part.lower() == "yes":
-                btts_condition = home_goals > 0 and away_goals > 0
-            elif btts_part.lower() == "no":
-                btts_condition = home_goals == 0 or away_goals == 0
-            else:
-                btts_condition = False
-
-            return win_condition and btts_condition
-
-    # Fallback: Check if prediction matches team names exactly
-    if prediction_str == home_team:
-        return home_goals > away_goals
-    if prediction_str == away_team:
-        return away_goals > home_goals
-
-    return None # Return None if prediction format is not recognized
+    result = evaluate([compile_prediction(prediction or "", home_team or "", away_team or "")], [score[0]], [score[1]])[0]
+    if np.isnan(result):
+        return None # Return None if prediction format is not recognized
+    return bool(result)
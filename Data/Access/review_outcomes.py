@@ -24,86 +24,16 @@ import os
 import uuid
 from .db_helpers import PREDICTIONS_CSV, ACCURACY_REPORTS_CSV, log_audit_event, upsert_entry, files_and_headers
 from .sync_manager import SyncManager
+from .prediction_evaluator import evaluate_prediction as _evaluate
 
-def evaluate_prediction(predicted_type: str, home_score: str, away_score: str) -> int:
+def evaluate_prediction(predicted_type: str, home_score: str, away_score: str,
+                        home_team: str = "", away_team: str = "") -> int:
     """
     Evaluates if a prediction was correct (1) or not (0).
-    Handles all market types used by the LeoBook prediction pipeline.
+    Handles all market types used by the LeoBook prediction pipeline via the shared
+    prediction compiler; team names are needed for team-named markets ("X to win").
     """
-    try:
-        h = int(home_score)
-        a = int(away_score)
-        total = h + a
-        pt = predicted_type.strip()
-        pt_upper = pt.upper().replace(' ', '_')
-        pt_lower = pt.lower()
-
-        # --- Standard Markets ---
-        if pt_upper in ("OVER_2.5", "OVER_2_5"):
-            return 1 if total > 2.5 else 0
-        if pt_upper in ("UNDER_2.5", "UNDER_2_5"):
-            return 1 if total < 2.5 else 0
-        if pt_upper in ("BTTS_YES", "BTTS YES") or pt_lower == "btts yes":
-            return 1 if h > 0 and a > 0 else 0
-        if pt_upper in ("BTTS_NO", "BTTS NO") or pt_lower in ("btts no", "btts_no"):
-            return 1 if h == 0 or a == 0 else 0
-        if pt_upper in ("HOME_WIN", "HOME WIN", "1"):
-            return 1 if h > a else 0
-        if pt_upper in ("AWAY_WIN", "AWAY WIN", "2"):
-            return 1 if a > h else 0
-        if pt_upper in ("DRAW", "X"):
-            return 1 if h == a else 0
-
-        # --- Double Chance Markets ---
-        if pt_lower in ("draw no bet", "draw_no_bet", "dnb"):
-            # Draw No Bet = void on draw, win if predicted team wins
-            # Without knowing which team, assume home side (most common)
-            return 1 if h >= a else 0  # Home or Draw = refund, Home Win = win
-        if pt_lower in ("home or draw", "home_or_draw", "1x"):
-            return 1 if h >= a else 0
-        if pt_lower in ("away or draw", "away_or_draw", "x2"):
-            return 1 if a >= h else 0
-        if pt_lower in ("home or away", "home_or_away", "12"):
-            return 1 if h != a else 0  # No draw
-
-        # --- Team Goals Over/Under (e.g., "Team Over 0.5", "Team Over 1.5") ---
-        import re
-        team_over = re.match(r'(?:home\s+)?(?:team\s+)?over\s+([\d.]+)', pt_lower)
-        if team_over:
-            threshold = float(team_over.group(1))
-            # "Team Over X" typically means the home team scores > X goals
-            return 1 if h > threshold else 0
-        
-        team_under = re.match(r'(?:home\s+)?(?:team\s+)?under\s+([\d.]+)', pt_lower)
-        if team_under:
-            threshold = float(team_under.group(1))
-            return 1 if h < threshold else 0
-
-        away_over = re.match(r'away\s+(?:team\s+)?over\s+([\d.]+)', pt_lower)
-        if away_over:
-            threshold = float(away_over.group(1))
-            return 1 if a > threshold else 0
-
-        away_under = re.match(r'away\s+(?:team\s+)?under\s+([\d.]+)', pt_lower)
-        if away_under:
-            threshold = float(away_under.group(1))
-            return 1 if a < threshold else 0
-
-        # --- Total Goals Over/Under (generic) ---
-        total_over = re.match(r'over\s+([\d.]+)', pt_lower)
-        if total_over:
-            threshold = float(total_over.group(1))
-            return 1 if total > threshold else 0
-
-        total_under = re.match(r'under\s+([\d.]+)', pt_lower)
-        if total_under:
-            threshold = float(total_under.group(1))
-            return 1 if total < threshold else 0
-
-        # Fallback for complex strings
-        return 0
-    except:
-        return 0
+    return int(bool(_evaluate(predicted_type, f"{home_score}-{away_score}", home_team, away_team)))
 
 
 async def run_accuracy_generation():
@@ -145,7 +75,7 @@ async def run_accuracy_generation():
 
         # 2. Aggregates
         volume = len(df_24h)
-        correct_count = (df_24h['outcome_correct'] == '1').sum()
+        correct_count = df_24h['outcome_correct'].isin(['True', '1']).sum()  # '1' = legacy rows
         win_rate = (correct_count / volume) * 100 if volume > 0 else 0
 
         # Return Calculation (1-unit flat stake)
@@ -155,7 +85,7 @@ async def run_accuracy_generation():
                 odds = float(row.get('odds', 0))
                 if odds <= 0: odds = 2.0 # Default conservative odds
                 
-                if row['outcome_correct'] == '1':
+                if row['outcome_correct'] in ('True', '1'):
                     total_return += (odds - 1)
                 else:
                     total_return -= 1
@@ -199,8 +129,8 @@ async def run_accuracy_generation():
 
 from .outcome_reviewer import (
     get_predictions_to_review,
-    save_single_outcome,
-    process_review_task_offline,
+    save_outcomes_batch,
+    resolve_outcome_offline,
     run_review_process
 )
 
@@ -210,8 +140,8 @@ __all__ = [
     'DataValidator',
     'evaluate_prediction',
     'get_predictions_to_review',
-    'save_single_outcome',
-    'process_review_task_offline',
+    'save_outcomes_batch',
+    'resolve_outcome_offline',
     'run_review_process'
 ]
 
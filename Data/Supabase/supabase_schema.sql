@@ -388,3 +388,6 @@ ALTER TABLE public.region_league ADD COLUMN IF NOT EXISTS country TEXT;
 ALTER TABLE public.region_league ADD COLUMN IF NOT EXISTS logo_url TEXT;
 ALTER TABLE public.teams ADD COLUMN IF NOT EXISTS country TEXT;
 ALTER TABLE public.teams ADD COLUMN IF NOT EXISTS city TEXT;
+
+-- MIGRATION: Raw market confidence score (input to probability calibration)
+ALTER TABLE public.predictions ADD COLUMN IF NOT EXISTS confidence_score TEXT;
@@ -203,20 +203,21 @@ async def run_chapter_3():
 
         # --- Backtest Check (single-pass, integrated from backtest_monitor.py) ---
         try:
-            from Scripts.backtest_monitor import TRIGGER_FILE, CONFIG_FILE
-            from Core.Intelligence.rule_config import RuleConfig
+            from Scripts.backtest_monitor import TRIGGER_FILE, load_backtest_config
             import json
             if os.path.exists(TRIGGER_FILE):
                 print("  [Backtest] Trigger detected — running single-pass backtest...")
-                if os.path.exists(CONFIG_FILE):
-                    with open(CONFIG_FILE, 'r') as f:
-                        config_data = json.load(f)
-                    valid_keys = RuleConfig.__annotations__.keys()
-                    filtered = {k: v for k, v in config_data.items() if k in valid_keys}
-                    config = RuleConfig(**filtered)
-                    await run_flashscore_offline_repredict(playwright=None, custom_config=config)
-                    print("  [Backtest] Complete.")
-                os.remove(TRIGGER_FILE)
+                try:
+                    with open(TRIGGER_FILE, 'r') as f:
+                        trigger_data = json.load(f)
+                    config = load_backtest_config(trigger_data.get("engine_id"))
+                    if config:
+                        await run_flashscore_offline_repredict(playwright=None, custom_config=config)
+                        print("  [Backtest] Complete.")
+                finally:
+                    # Consumed even when malformed or failed, so later cycles don't re-fail on it
+                    if os.path.exists(TRIGGER_FILE):
+                        os.remove(TRIGGER_FILE)
         except Exception as e:
             print(f"  [Backtest] Check failed: {e}")
 
@@ -262,15 +263,9 @@ async def run_utility(args):
 
     elif args.backtest and not args.rule_engine:
         print("\n  --- LEO: Single-Pass Backtest ---")
-        from Scripts.backtest_monitor import TRIGGER_FILE, CONFIG_FILE
-        from Core.Intelligence.rule_config import RuleConfig
-        import json
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'r') as f:
-                config_data = json.load(f)
-            valid_keys = RuleConfig.__annotations__.keys()
-            filtered = {k: v for k, v in config_data.items() if k in valid_keys}
-            config = RuleConfig(**filtered)
+        from Scripts.backtest_monitor import CONFIG_FILE, load_backtest_config
+        config = load_backtest_config()
+        if config:
             await run_flashscore_offline_repredict(playwright=None, custom_config=config)
         else:
             print(f"  [ERROR] Config file not found: {CONFIG_FILE}")
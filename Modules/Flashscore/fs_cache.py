@@ -0,0 +1,239 @@
+# fs_cache.py: Persistent H2H/form and standings extraction cache with TTLs and result-based invalidation.
+# Part of LeoBook Modules — Flashscore
+#
+# Classes: ExtractionCache
+# Functions: season_of()
+# Called by: fs_processor.py (lookups/stores), manager.py (refresh/save per cycle)
+
+"""
+Extraction Cache
+Keeps what process_match_task scraped so later fixtures only scrape what is missing:
+  - standings: (league_id or region_league, season) -> table rows ([] for cups / draw tables)
+  - form:      (team_id or team name, as_of_date)   -> that team's last matches
+  - pair:      (home, away)                         -> mutual H2H rows + league metadata
+
+Entries expire after their TTL and are invalidated early when a result lands:
+  - form:      schedules.csv has a finished match for the team dated after the
+               newest match in the cached form.
+  - standings: a finished match in the league dated after the day it was cached.
+The results index is rebuilt from schedules.csv by refresh() once per cycle.
+"""
+
+import json
+import os
+from datetime import datetime as dt, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from Data.Access.db_helpers import get_all_schedules
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+CACHE_FILE = PROJECT_ROOT / "Data" / "Store" / "extraction_cache.json"
+
+# Bump when the cached entry shape changes incompatibly.
+CACHE_SCHEMA = 1
+
+STANDINGS_TTL = timedelta(hours=float(os.getenv("FS_CACHE_STANDINGS_TTL_H", "6")))
+FORM_TTL = timedelta(hours=float(os.getenv("FS_CACHE_FORM_TTL_H", "72")))
+PAIR_TTL = timedelta(hours=float(os.getenv("FS_CACHE_PAIR_TTL_H", "72")))
+CACHE_ENABLED = os.getenv("FS_EXTRACTION_CACHE", "1") != "0"
+
+DATE_FORMATS = ("%d.%m.%Y", "%d.%m.%y", "%Y-%m-%d")
+META_FIELDS = ("region_league", "league_stage", "league_id")
+
+
+def _parse_date(value: str) -> Optional[dt]:
+    for fmt in DATE_FORMATS:
+        try:
+            return dt.strptime((value or "").strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def season_of(date_str: str) -> str:
+    """'14.11.2025' -> '2025/2026' (seasons roll over in July); 'unknown' without a date."""
+    d = _parse_date(date_str)
+    if d is None:
+        return "unknown"
+    start = d.year if d.month >= 7 else d.year - 1
+    return f"{start}/{start + 1}"
+
+
+class ExtractionCache:
+    """On-disk cache of extracted standings and H2H/form, shared by every process_match_task."""
+
+    def __init__(self, path: Path = CACHE_FILE):
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._entries: Dict[str, Dict[str, Dict[str, Any]]] = {"standings": {}, "form": {}, "pair": {}}
+        self._team_results: Dict[str, dt] = {}    # team id/name -> date of latest finished match
+        self._league_results: Dict[str, dt] = {}  # league id/region_league -> date of latest finished match
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+                if raw.get("schema") == CACHE_SCHEMA:
+                    self._entries.update(raw.get("entries", {}))
+            except Exception as e:
+                print(f"   [ExtractionCache] Ignoring unreadable cache: {e}")
+
+    # ── Keys ─────────────────────────────────────────
+
+    @staticmethod
+    def keys_for(match_data: Dict[str, Any]) -> Dict[str, str]:
+        """Cache keys of one fixture. Compute them before extraction rewrites match_data's league fields."""
+        date = match_data.get("date", "")
+        home = match_data.get("home_team_id") or match_data.get("home_team", "")
+        away = match_data.get("away_team_id") or match_data.get("away_team", "")
+        league = match_data.get("league_id") or match_data.get("region_league") or "Unknown"
+        return {
+            "standings": f"{league}|{season_of(date)}",
+            "home": f"{home}|{date}",
+            "away": f"{away}|{date}",
+            "pair": f"{home}|{away}",
+            "league": league,
+            "home_team": match_data.get("home_team", ""),
+            "away_team": match_data.get("away_team", ""),
+        }
+
+    # ── Results index (invalidation) ─────────────────
+
+    def refresh(self):
+        """Rebuild the latest-result index from schedules.csv and drop expired entries."""
+        self._team_results.clear()
+        self._league_results.clear()
+        for row in get_all_schedules():
+            if row.get("match_status") != "finished":
+                continue
+            played = _parse_date(row.get("date", ""))
+            if played is None:
+                continue
+            for key in (row.get("home_team"), row.get("home_team_id"), row.get("away_team"), row.get("away_team_id")):
+                if key and played > self._team_results.get(key, dt.min):
+                    self._team_results[key] = played
+            for key in (row.get("league_id"), row.get("region_league")):
+                if key and played > self._league_results.get(key, dt.min):
+                    self._league_results[key] = played
+
+        now = dt.now()
+        for kind, ttl in (("standings", STANDINGS_TTL), ("form", FORM_TTL), ("pair", PAIR_TTL)):
+            bucket = self._entries[kind]
+            for key in [k for k, e in bucket.items() if now - dt.fromisoformat(e["cached_at"]) > ttl]:
+                del bucket[key]
+                self._dirty = True
+
+    def _fresh(self, kind: str, key: str, ttl: timedelta) -> Optional[Dict[str, Any]]:
+        entry = self._entries[kind].get(key)
+        if entry and dt.now() - dt.fromisoformat(entry["cached_at"]) <= ttl:
+            return entry
+        return None
+
+    @staticmethod
+    def _has_new_result(index: Dict[str, dt], names: List[str], since: Optional[dt]) -> bool:
+        """A finished match for any of names dated after since (any at all when since is None)."""
+        latest = max((index[n] for n in names if n in index), default=None)
+        return latest is not None and (since is None or latest > since)
+
+    # ── Lookups ──────────────────────────────────────
+
+    def get_standings(self, keys: Dict[str, str]) -> Optional[List[Dict[str, Any]]]:
+        """Cached standings rows ([] is a valid hit: no table for this league), or None."""
+        if not CACHE_ENABLED:
+            return None
+        entry = self._fresh("standings", keys["standings"], STANDINGS_TTL)
+        if entry is not None:
+            cached_day = dt.fromisoformat(entry["cached_at"]).replace(hour=0, minute=0, second=0, microsecond=0)
+            if self._has_new_result(self._league_results, [keys["league"]], cached_day):
+                entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["rows"]
+
+    def _get_form(self, key: str, team_name: str) -> Optional[List[Dict[str, Any]]]:
+        entry = self._fresh("form", key, FORM_TTL)
+        if entry is None:
+            return None
+        last_played = _parse_date(entry.get("last_played", ""))
+        if self._has_new_result(self._team_results, [key.rsplit("|", 1)[0], team_name], last_played):
+            return None
+        return entry["rows"]
+
+    def get_h2h(self, keys: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Cached h2h_data in the extract_h2h_data() schema (plus 'meta'), or None unless
+        both teams' form and the mutual H2H are all cached and valid.
+        """
+        if not CACHE_ENABLED:
+            return None
+        home_form = self._get_form(keys["home"], keys["home_team"])
+        away_form = self._get_form(keys["away"], keys["away_team"])
+        pair = self._fresh("pair", keys["pair"], PAIR_TTL)
+        if home_form is None or away_form is None or pair is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {
+            "home_last_10_matches": home_form,
+            "away_last_10_matches": away_form,
+            "head_to_head": pair["rows"],
+            "home_team": keys["home_team"],
+            "away_team": keys["away_team"],
+            "region_league": pair["meta"].get("region_league", "Unknown"),
+            "parsing_errors": [],
+            "meta": pair["meta"],
+        }
+
+    # ── Stores ───────────────────────────────────────
+
+    def put_standings(self, keys: Dict[str, str], rows: List[Dict[str, Any]]):
+        # Copied: save_standings() adds columns to the caller's rows, possibly on the pipeline's writer thread
+        self._entries["standings"][keys["standings"]] = {"cached_at": dt.now().isoformat(), "rows": [dict(r) for r in rows]}
+        self._dirty = True
+
+    def put_h2h(self, keys: Dict[str, str], h2h_data: Dict[str, Any], match_data: Dict[str, Any]):
+        """Store both teams' form and the mutual H2H; league metadata is taken from match_data."""
+        now = dt.now().isoformat()
+        for side, section in (("home", "home_last_10_matches"), ("away", "away_last_10_matches")):
+            rows = h2h_data.get(section, [])
+            played = [d for d in (_parse_date(m.get("date", "")) for m in rows) if d]
+            self._entries["form"][keys[side]] = {
+                "cached_at": now,
+                "last_played": max(played).strftime("%d.%m.%Y") if played else "",
+                "rows": rows,
+            }
+        self._entries["pair"][keys["pair"]] = {
+            "cached_at": now,
+            "rows": h2h_data.get("head_to_head", []),
+            "meta": {f: match_data.get(f, "") for f in META_FIELDS},
+        }
+        self._dirty = True
+
+    # ── Persistence ──────────────────────────────────
+
+    def save(self):
+        """Write the cache back to disk (atomic replace) if anything changed."""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"schema": CACHE_SCHEMA, "entries": self._entries}, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except Exception as e:
+            print(f"   [ExtractionCache] Failed to save cache: {e}")
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0
+        return f"{self.hits}/{total} cached ({rate:.0f}%)"
+
+
+# Process-wide cache: fs_processor reads/writes it, manager refreshes and saves it per cycle
+extraction_cache = ExtractionCache()
@@ -4,8 +4,8 @@
 # Single source of truth for extracting matches from the Flashscore ALL tab.
 # Used by: fs_live_streamer.py, fs_schedule.py
 
-import asyncio
 from playwright.async_api import Page
+from Core.Browser.waits import wait_for_count_stable, wait_for_dom_quiet
 from Core.Intelligence.selector_manager import SelectorManager
 
 
@@ -26,7 +26,7 @@ async def expand_all_leagues(page: Page) -> int:
             return count;
         }""", down_arrow_sel)
         if expanded:
-            await asyncio.sleep(1)
+            await wait_for_dom_quiet(page, quiet_ms=300, timeout_ms=3000)  # Expanded rows rendered
         return expanded or 0
     except Exception as e:
         print(f"    [Extractor] Expansion warning: {e}")
@@ -40,7 +40,8 @@ async def extract_all_matches(page: Page, label: str = "Extractor") -> list:
     Returns list of match dicts.
     """
     selectors = SelectorManager.get_all_selectors_for_context("fs_home_page")
-    await asyncio.sleep(3)
+    if selectors.get("match_rows"):
+        await wait_for_count_stable(page, selectors["match_rows"], settle_ms=500, timeout_ms=5000)
 
     result = await page.evaluate(r"""(sel) => {
         const matches = [];
@@ -0,0 +1,239 @@
+# fs_http.py: Browserless fetch path for Flashscore match data (H2H feed over pooled HTTP).
+# Part of LeoBook Modules — Flashscore
+#
+# Functions: match_id_of(), parse_h2h_feed(), fetch_feed(), fetch_h2h_data(), close_http_client(), parse_recorded()
+# Called by: fs_processor.py (FS_HTTP_FETCH=1), manager.py (client shutdown), run standalone on recorded payloads
+
+"""
+Direct HTTP Fetch
+The match page's H2H tab is rendered from the plain-text feed df_hh_1_<match id>
+(same '~' / '¬' / '÷' encoding as the live feeds, see fs_live_feed). With
+FS_HTTP_FETCH=1, fs_processor asks fetch_h2h_data() first:
+  - H2H comes from that feed over one shared keep-alive client (httpx with HTTP/2
+    when installed, aiohttp otherwise), parsed into the extract_h2h_data() schema.
+  - Standings come from the extraction cache (fs_cache); the feed is only tried
+    when the league's table is cached, since the page is needed otherwise.
+Anything missing or unparseable returns None and the match goes through
+Playwright as before, so the browser path stays the reference.
+
+Raw payloads are saved with FS_HTTP_RECORD=1 and can be replayed offline:
+
+    python -m Modules.Flashscore.fs_http Data/Logs/HttpFeed/df_hh_1_<id>.txt [home] [away]
+"""
+
+import os
+import re
+import sys
+from datetime import datetime as dt
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from .fs_live_feed import LOCAL_TZ, LiveFeedParser
+
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+try:
+    import h2  # noqa: F401  (enables http2=True in httpx)
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
+HTTP_FETCH_ENABLED = os.getenv("FS_HTTP_FETCH", "0") == "1"
+FS_HTTP_RECORD = os.getenv("FS_HTTP_RECORD", "0") == "1"
+FEED_BASE = os.getenv("FS_FEED_BASE", "https://www.flashscore.com/x/feed/")
+FEED_SIGN = os.getenv("FS_FEED_SIGN", "SW9D1eZo")  # x-fsign header the frontend sends with every feed call
+HTTP_TIMEOUT = float(os.getenv("FS_HTTP_TIMEOUT", "10"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("FS_HTTP_MAX_CONNECTIONS", "20"))
+RECORD_DIR = os.path.join("Data", "Logs", "HttpFeed")
+
+FEED_HEADERS = {
+    "x-fsign": FEED_SIGN,
+    "Referer": "https://www.flashscore.com/",
+    "User-Agent": (
+        "Mozilla/5.0 (Linux; Android 10; SM-G973F) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/91.0.4472.124 Mobile Safari/537.36"
+    ),
+}
+
+# H2H feed keys (as served by Flashscore; kept in one place in case they move)
+K_GROUP = "KA"          # Tab group: Overall / Home / Away (only the first is used)
+K_SECTION = "KB"        # "Last matches: <team>" / "Head-to-head matches"
+K_TIME = "KC"           # Kickoff, unix seconds
+K_LEAGUE = "KF"
+K_HOME = "KJ"           # Winner is prefixed with '*'
+K_AWAY = "KK"
+K_SCORE = "KL"          # "2:1"
+K_RESULT = "KN"         # w / d / l from the section team's perspective
+K_EVENT_ID = "KP"
+
+SECTION_TARGETS = ("home_last_10_matches", "away_last_10_matches", "head_to_head")
+_SCORE_RE = re.compile(r"(\d+)\s*[:\-]\s*(\d+)")
+_MID_RE = re.compile(r"[?&]mid=([A-Za-z0-9]+)|/match/(?!football/)([A-Za-z0-9]{8})/")
+
+_client = None
+
+
+def match_id_of(match_data: Dict[str, Any]) -> str:
+    """Flashscore match id from the schedule row (id/fixture_id, else the match link)."""
+    mid = match_data.get("fixture_id") or match_data.get("id") or ""
+    if mid:
+        return mid
+    found = _MID_RE.search(match_data.get("match_link") or "")
+    return (found.group(1) or found.group(2)) if found else ""
+
+
+def _h2h_row(fields: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    score = _SCORE_RE.match(fields.get(K_SCORE, ""))
+    home, away = fields.get(K_HOME, "").lstrip("*"), fields.get(K_AWAY, "").lstrip("*")
+    if not (score and home and away):
+        return None
+    home_goals, away_goals = int(score.group(1)), int(score.group(2))
+    date = ""
+    if fields.get(K_TIME, "").isdigit():
+        date = dt.fromtimestamp(int(fields[K_TIME]), tz=LOCAL_TZ).strftime("%d.%m.%Y")
+    event_id = fields.get(K_EVENT_ID) or None
+    link = f"https://www.flashscore.com/match/{event_id}/#/match-summary" if event_id else None
+    result = fields.get(K_RESULT, "")[:1].upper()
+    return {
+        "date": date,
+        "home": home,
+        "away": away,
+        "score": f"{home_goals}-{away_goals}",
+        "winner": "Home" if home_goals > away_goals else "Away" if away_goals > home_goals else "Draw",
+        "perspective_result": result if result in ("W", "D", "L") else "N/A",
+        "match_link": link,
+        "match_url": link,
+        "home_team_url": None,
+        "away_team_url": None,
+        "fixture_id": event_id,
+        "league_name": fields.get(K_LEAGUE, ""),
+        "home_team_id": None,
+        "away_team_id": None,
+    }
+
+
+def parse_h2h_feed(payload: str, home_team: str, away_team: str, region_league: str = "Unknown") -> Dict[str, Any]:
+    """
+    Parse a df_hh feed into the extract_h2h_data() schema.
+    Raises ValueError when the payload has no recognisable sections (feed format moved).
+    """
+    results: Dict[str, Any] = {target: [] for target in SECTION_TARGETS}
+    results["parsing_errors"] = []
+    section = -1
+    for fields in LiveFeedParser._records(payload):
+        if K_GROUP in fields and section >= 0:
+            break  # Next tab group (Home/Away): same matches, filtered
+        if K_SECTION in fields:
+            section += 1
+            if section >= len(SECTION_TARGETS):
+                break
+        if K_EVENT_ID not in fields or section < 0:
+            continue
+        row = _h2h_row(fields)
+        if row:
+            results[SECTION_TARGETS[section]].append(row)
+        elif K_SCORE in fields:
+            results["parsing_errors"].append({"error": "Row without teams/score", "html": str(fields)[:200]})
+
+    if section < 1:  # Both teams' last matches; head-to-head is absent when they never met
+        raise ValueError(f"H2H feed has {section + 1} sections, expected at least 2")
+    results["home_team"] = home_team
+    results["away_team"] = away_team
+    results["region_league"] = region_league
+    return results
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        if HAS_HTTPX:
+            _client = httpx.AsyncClient(
+                http2=HAS_H2, headers=FEED_HEADERS, timeout=HTTP_TIMEOUT,
+                limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                                    max_keepalive_connections=HTTP_MAX_CONNECTIONS, keepalive_expiry=60),
+            )
+        else:
+            _client = aiohttp.ClientSession(
+                headers=FEED_HEADERS, timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+                connector=aiohttp.TCPConnector(limit=HTTP_MAX_CONNECTIONS, keepalive_timeout=60),
+            )
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client (safe to call when it was never opened)."""
+    global _client
+    if _client is not None:
+        if HAS_HTTPX:
+            await _client.aclose()
+        else:
+            await _client.close()
+        _client = None
+
+
+def _record(feed: str, payload: str):
+    """Save a raw payload for offline replay (FS_HTTP_RECORD=1)."""
+    os.makedirs(RECORD_DIR, exist_ok=True)
+    with open(os.path.join(RECORD_DIR, f"{feed}.txt"), "w", encoding="utf-8") as f:
+        f.write(payload)
+
+
+async def fetch_feed(feed: str) -> Optional[str]:
+    """GET one feed over the shared client; None on any HTTP/network error."""
+    client = _get_client()
+    try:
+        if HAS_HTTPX:
+            response = await client.get(FEED_BASE + feed)
+            if response.status_code != 200:
+                return None
+            payload = response.text
+        else:
+            async with client.get(FEED_BASE + feed) as response:
+                if response.status != 200:
+                    return None
+                payload = await response.text()
+    except Exception as e:  # aiohttp/httpx network errors and timeouts
+        print(f"      [HTTP] {feed} failed: {e}")
+        return None
+    if FS_HTTP_RECORD:
+        _record(feed, payload)
+    return payload
+
+
+async def fetch_h2h_data(match_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """h2h_data without a browser, or None (no match id, HTTP error, unusable feed) to use Playwright."""
+    mid = match_id_of(match_data)
+    if not mid:
+        return None
+    payload = await fetch_feed(f"df_hh_1_{mid}")
+    if not payload:
+        return None
+    try:
+        return parse_h2h_feed(payload, match_data.get("home_team", ""), match_data.get("away_team", ""),
+                              match_data.get("region_league") or "Unknown")
+    except ValueError as e:
+        print(f"      [HTTP] Unusable H2H feed for {mid}: {e}")
+        return None
+
+
+def parse_recorded(path: str, home_team: str = "", away_team: str = "") -> Dict[str, Any]:
+    """Parse a payload saved with FS_HTTP_RECORD=1."""
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_h2h_feed(f.read(), home_team, away_team)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 4):
+        print("Usage: python -m Modules.Flashscore.fs_http <recorded df_hh payload .txt> [home away]")
+        sys.exit(1)
+    data = parse_recorded(*sys.argv[1:])
+    for target in SECTION_TARGETS:
+        print(f"\n{target} ({len(data[target])})")
+        for m in data[target]:
+            print(f"  {m['date']:<10} | {m['perspective_result']:<3} | {m['home']} {m['score']} {m['away']} ({m['league_name']})")
+    print(f"\n{len(data['parsing_errors'])} parsing errors")
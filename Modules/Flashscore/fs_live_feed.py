@@ -0,0 +1,233 @@
+# fs_live_feed.py: Network-level Flashscore live feed capture and parser.
+# Part of LeoBook Modules — Flashscore
+#
+# Classes: LiveFeedParser
+# Functions: attach_feed_capture(), parse_recorded()
+# Called by: fs_live_streamer.py (LIVE_STREAM_MODE=feed), run standalone on recorded payloads
+
+"""
+Live Feed Capture
+The Flashscore page refreshes itself from plain-text feeds (XHR and websocket):
+  - f_1_<day>_...  full list of the day's football fixtures
+  - r_1_...        deltas carrying only the fields that changed
+Records are separated by '~', fields by '¬' and key/value by '÷'. A 'ZA' record
+opens a league block; an 'AA' record is one fixture.
+
+LiveFeedParser merges these payloads into the same fixture dicts that
+fs_live_streamer._extract_all_matches() returns, without selectors or league
+expansion. Region names are upper-cased like the DOM path ("ENGLAND - Premier
+League"), match links reuse the stored /match/football/...?mid= link when the
+caller knows one, and fixtures missing from a full list are dropped from the
+parser's state. It is pure Python, so it can be checked offline against payloads
+recorded with LIVE_FEED_RECORD=1:
+
+    python -m Modules.Flashscore.fs_live_feed Data/Logs/LiveFeed/<YYYYMMDD>.jsonl
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime as dt, timezone
+from typing import Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+FEED_URL_PATTERN = re.compile(r"/x/feed/(?P<kind>[fr])_1_")
+RECORD_DIR = os.path.join("Data", "Logs", "LiveFeed")
+LIVE_FEED_RECORD = os.getenv("LIVE_FEED_RECORD", "0") == "1"
+LOCAL_TZ = ZoneInfo("Africa/Lagos")  # Same clock as the streamer's browser context
+
+# Feed keys (as served by Flashscore; kept in one place in case they move)
+K_ID = "AA"
+K_START = "AD"          # Kickoff, unix seconds
+K_STAGE_TYPE = "AB"     # 1 scheduled, 2 live, 3 finished
+K_STAGE = "AC"          # Detailed stage, see STAGES
+K_HOME = "AE"
+K_AWAY = "AF"
+K_HOME_SCORE = "AG"
+K_AWAY_SCORE = "AH"
+K_PHASE_START = "BC"    # Unix seconds the current half started (live only)
+K_LEAGUE = "ZA"         # "ENGLAND: Premier League"
+
+# Detailed stage -> (status, stage_detail, minute offset for the running clock)
+STAGES = {
+    "12": ("live", "", 0),             # 1st half
+    "13": ("live", "", 45),            # 2nd half
+    "38": ("halftime", "", None),
+    "46": ("break", "", None),
+    "6": ("extra_time", "ET", 90),
+    "7": ("penalties", "Pen", None),
+    "3": ("finished", "", None),
+    "10": ("finished", "AET", None),
+    "11": ("finished", "Pen", None),
+    "9": ("finished", "WO", None),
+    "54": ("finished", "WO", None),
+    "4": ("postponed", "Postp", None),
+    "5": ("cancelled", "Canc", None),
+    "37": ("cancelled", "Abn", None),
+    "36": ("fro", "FRO", None),
+    "43": ("scheduled", "", None),     # Delayed
+}
+NO_SCORE_STATUSES = {"postponed", "cancelled", "fro"}
+
+
+class LiveFeedParser:
+    """Accumulates feed payloads into per-fixture state; feed() returns the fixtures a payload touched."""
+
+    def __init__(self, match_links: Optional[Dict[str, str]] = None):
+        self.match_links: Dict[str, str] = dict(match_links or {})  # fixture_id -> stored match_link
+        self._fields: Dict[str, Dict[str, str]] = {}   # fixture_id -> merged raw fields
+        self._league: Dict[str, str] = {}              # fixture_id -> region_league
+
+    @staticmethod
+    def _records(payload: str):
+        for record in payload.split("~"):
+            fields = {}
+            for part in record.split("¬"):
+                key, sep, value = part.partition("÷")
+                if sep:
+                    fields[key] = value
+            if fields:
+                yield fields
+
+    @staticmethod
+    def _region_league(raw: str) -> str:
+        region, sep, league = raw.partition(": ")
+        return f"{region.upper()} - {league}" if sep else (raw or "Unknown")
+
+    def feed(self, payload: str, full_list: bool = False) -> List[Dict]:
+        """Merge one payload; a full_list (f_ feed) also forgets fixtures it no longer carries."""
+        touched: List[str] = []
+        league = "Unknown"  # Delta payloads usually carry no league block
+        for fields in self._records(payload):
+            if K_LEAGUE in fields:
+                league = self._region_league(fields[K_LEAGUE])
+                continue
+            fixture_id = fields.get(K_ID)
+            if not fixture_id:
+                continue
+            self._fields.setdefault(fixture_id, {}).update(fields)
+            if league != "Unknown" or fixture_id not in self._league:
+                self._league[fixture_id] = league
+            touched.append(fixture_id)
+        if full_list and touched:
+            current = set(touched)
+            for fixture_id in [fid for fid in self._fields if fid not in current]:
+                del self._fields[fixture_id]
+                self._league.pop(fixture_id, None)
+        return [m for m in (self.fixture(fid) for fid in dict.fromkeys(touched)) if m]
+
+    def fixture(self, fixture_id: str, now: float = None) -> Dict:
+        """Current state of one fixture in the _extract_all_matches() schema ({} if incomplete)."""
+        f = self._fields.get(fixture_id, {})
+        if not (f.get(K_HOME) and f.get(K_AWAY)):
+            return {}
+
+        status, stage_detail, offset = STAGES.get(f.get(K_STAGE, ""), (None, "", None))
+        if status is None:
+            status = {"2": "live", "3": "finished"}.get(f.get(K_STAGE_TYPE, ""), "scheduled")
+
+        minute = ""
+        if offset is not None and f.get(K_PHASE_START, "").isdigit():
+            elapsed = int(((now or time.time()) - int(f[K_PHASE_START])) // 60) + 1
+            minute = f"{offset + max(elapsed, 1)}'"
+        elif status == "halftime":
+            minute = "Half Time"
+
+        home_score, away_score = f.get(K_HOME_SCORE, ""), f.get(K_AWAY_SCORE, "")
+        if status in NO_SCORE_STATUSES:
+            home_score = away_score = ""
+
+        match_time = ""
+        if f.get(K_START, "").isdigit():
+            match_time = dt.fromtimestamp(int(f[K_START]), tz=LOCAL_TZ).strftime("%H:%M")
+
+        return {
+            "fixture_id": fixture_id,
+            "home_team": f[K_HOME],
+            "away_team": f[K_AWAY],
+            "home_score": home_score,
+            "away_score": away_score,
+            "minute": minute,
+            "status": status,
+            "stage_detail": stage_detail,
+            "region_league": self._league.get(fixture_id, "Unknown"),
+            "match_link": self.match_links.get(fixture_id) or f"https://www.flashscore.com/match/{fixture_id}/",
+            "match_time": match_time,
+            "timestamp": dt.now(timezone.utc).isoformat(),
+        }
+
+
+def _record(kind: str, payload: str):
+    """Append a raw payload for offline replay (LIVE_FEED_RECORD=1)."""
+    os.makedirs(RECORD_DIR, exist_ok=True)
+    path = os.path.join(RECORD_DIR, f"{dt.now().strftime('%Y%m%d')}.jsonl")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"kind": kind, "payload": payload}) + "\n")
+
+
+def attach_feed_capture(page, parser: LiveFeedParser, on_rows: Callable[[List[Dict], bool], None],
+                        on_payload: Optional[Callable[[str, str], None]] = None):
+    """
+    Hook the page's feed responses and websocket frames into the parser.
+    on_rows(rows, full_list) receives parsed fixtures; full_list is True for f_ feeds.
+    on_payload(kind, payload), when given, sees every raw payload first ("f" or "r").
+    """
+    def handle(kind: str, payload: str):
+        if LIVE_FEED_RECORD:
+            _record(kind, payload)
+        if on_payload:
+            on_payload(kind, payload)
+        rows = parser.feed(payload, full_list=kind == "f")
+        if rows:
+            on_rows(rows, kind == "f")
+
+    async def on_response(response):
+        match = FEED_URL_PATTERN.search(response.url)
+        if not match:
+            return
+        try:
+            handle(match.group("kind"), await response.text())
+        except Exception as e:
+            print(f"   [LiveFeed] Could not read {response.url}: {e}")
+
+    def on_websocket(ws):
+        def on_frame(payload):
+            if isinstance(payload, str) and "AA÷" in payload:
+                handle("r", payload)
+        ws.on("framereceived", on_frame)
+
+    page.on("response", on_response)
+    page.on("websocket", on_websocket)
+
+
+def parse_recorded(path: str) -> List[Dict]:
+    """Replay a recorded .jsonl (or a raw payload .txt) and return the final fixture states."""
+    parser = LiveFeedParser()
+    seen: Dict[str, Dict] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            payloads = [json.loads(line) for line in f if line.strip()]
+        else:
+            payloads = [{"kind": "f", "payload": f.read()}]
+    for item in payloads:
+        rows = parser.feed(item["payload"], full_list=item.get("kind") == "f")
+        if item.get("kind") == "f":
+            seen = {fid: row for fid, row in seen.items() if fid in parser._fields}
+        for row in rows:
+            seen[row["fixture_id"]] = row
+    return list(seen.values())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python -m Modules.Flashscore.fs_live_feed <recorded .jsonl | payload .txt>")
+        sys.exit(1)
+    fixtures = parse_recorded(sys.argv[1])
+    counts: Dict[str, int] = {}
+    for m in fixtures:
+        counts[m["status"]] = counts.get(m["status"], 0) + 1
+        print(f"{m['fixture_id']:>10} | {m['status']:<10} | {m['minute']:<9} | "
+              f"{m['home_team']} {m['home_score']}-{m['away_score']} {m['away_team']} ({m['region_league']})")
+    print(f"\n{len(fixtures)} fixtures: {counts}")
@@ -0,0 +1,203 @@
+# fs_live_hub.py: In-memory live-state hub with async pub/sub and an optional local SSE endpoint.
+# Part of LeoBook Modules — Flashscore
+#
+# Classes: LiveStateHub
+# Functions: change_events()
+# Called by: fs_live_streamer.py (publishes), Leo.py stages and local tools (subscribe)
+
+"""
+Live State Hub
+The streamer publishes every batch of changed fixtures here before it is written
+to CSV/Supabase. The hub keeps fixture_id -> latest state and a version counter
+that increases by one per published batch.
+
+In-process consumers (other Leo.py stages run in the same event loop):
+
+    async for update in live_hub.subscribe():
+        for fixture in update["fixtures"]:
+            if "final" in fixture["events"]: ...
+
+Each update is {"version", "fixtures": [state + "events"], "removed": [ids no
+longer tracked]}. The first update a subscriber gets is a snapshot of every known
+fixture. Slow subscribers are not allowed to stall the streamer: when their
+queue fills, pending updates are dropped and a fresh snapshot is queued instead.
+
+Finished fixtures stay in snapshots for FINAL_GRACE_SECONDS, so a subscriber
+that joins (or catches up) just after the whistle still sees the final state.
+Fixtures that are not updated for STATE_MAX_AGE_SECONDS are dropped and listed
+in the next update's "removed", which keeps the state bounded over a long run.
+
+Local tools: with LIVE_HUB_PORT set, http://127.0.0.1:<port>/state returns the
+snapshot as JSON and /events streams the same updates as Server-Sent Events.
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+HUB_HOST = "127.0.0.1"
+HUB_PORT = int(os.getenv("LIVE_HUB_PORT", "0") or 0)  # 0 disables the HTTP endpoint
+SUBSCRIBER_QUEUE_SIZE = 256
+FINAL_GRACE_SECONDS = int(os.getenv("LIVE_HUB_FINAL_GRACE", "900"))
+STATE_MAX_AGE_SECONDS = int(os.getenv("LIVE_HUB_MAX_AGE", str(6 * 3600)))
+RESOLVED_STATUSES = {'finished', 'cancelled', 'postponed', 'fro', 'abandoned'}
+
+
+def _score(state: Dict[str, Any]) -> int:
+    try:
+        return int(state.get('home_score') or 0) + int(state.get('away_score') or 0)
+    except ValueError:
+        return 0
+
+
+def change_events(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> List[str]:
+    """What moved between two states of a fixture: 'goal', 'final', 'status', 'minute'."""
+    if previous is None:
+        return ["status"]
+    events = []
+    if _score(current) > _score(previous):
+        events.append("goal")
+    if current.get('status') != previous.get('status'):
+        events.append("final" if current.get('status') in RESOLVED_STATUSES else "status")
+    if current.get('minute') != previous.get('minute'):
+        events.append("minute")
+    return events
+
+
+class LiveStateHub:
+    """Latest state per fixture, versioned, with fan-out to async subscribers."""
+
+    def __init__(self):
+        self.version = 0
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._updated: Dict[str, float] = {}   # fixture_id -> monotonic time of its last publish
+        self._expires: Dict[str, float] = {}   # fixture_id -> monotonic time a finished fixture leaves
+        self._subscribers: List[asyncio.Queue] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # ── State ────────────────────────────────────────
+
+    def get(self, fixture_id: str) -> Optional[Dict[str, Any]]:
+        return self._state.get(fixture_id)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"version": self.version, "fixtures": list(self._state.values()), "removed": []}
+
+    def _drop(self, fixture_id: str):
+        self._state.pop(fixture_id, None)
+        self._updated.pop(fixture_id, None)
+        self._expires.pop(fixture_id, None)
+
+    def _evict(self, now: float) -> List[str]:
+        """Drop finished fixtures past their grace period and stale ones; returns the stale ids."""
+        for fid in [fid for fid, at in self._expires.items() if now >= at]:
+            self._drop(fid)  # Already announced (final event / removed)
+        stale = [fid for fid, at in self._updated.items() if now - at > STATE_MAX_AGE_SECONDS]
+        for fid in stale:
+            self._drop(fid)
+        return stale
+
+    def publish(self, changed: Iterable[Dict[str, Any]], removed: Iterable[str] = ()) -> int:
+        """Record a batch of changed fixtures (and fixtures no longer live); returns the new version."""
+        now = time.monotonic()
+        stale = self._evict(now)
+        fixtures = []
+        for match in changed:
+            fid = match.get('fixture_id')
+            if not fid:
+                continue
+            state = dict(match)
+            state['events'] = change_events(self._state.get(fid), state)
+            self._state[fid] = state
+            self._updated[fid] = now
+            if state.get('status') in RESOLVED_STATUSES:
+                self._expires.setdefault(fid, now + FINAL_GRACE_SECONDS)
+            else:
+                self._expires.pop(fid, None)
+            fixtures.append(state)
+        removed = [fid for fid in removed if fid]
+        for fid in removed:
+            if fid in self._expires:
+                continue  # Finished: kept for late subscribers until its grace period ends
+            self._drop(fid)
+        removed += stale
+        if not (fixtures or removed):
+            return self.version
+
+        self.version += 1
+        update = {"version": self.version, "fixtures": fixtures, "removed": removed}
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(update)
+            except asyncio.QueueFull:
+                # Consumer fell behind: replace its backlog with one up-to-date snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot())
+        return self.version
+
+    # ── Subscription ─────────────────────────────────
+
+    async def subscribe(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yields a snapshot, then every update published after it."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        queue.put_nowait(self.snapshot())
+        self._subscribers.append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.remove(queue)
+
+    # ── Local HTTP / SSE endpoint ────────────────────
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # Headers are not needed
+            parts = request.decode("latin-1").split()
+            path = parts[1].split("?")[0] if len(parts) > 1 else "/"
+
+            if path == "/state":
+                body = json.dumps(self.snapshot()).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+                await writer.drain()
+            elif path == "/events":
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                             b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+                async for update in self.subscribe():
+                    writer.write(f"id: {update['version']}\ndata: {json.dumps(update)}\n\n".encode())
+                    await writer.drain()
+            else:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def start_server(self, port: int = HUB_PORT) -> bool:
+        """Start the local endpoint (no-op when port is 0 or it is already running)."""
+        if not port or self._server:
+            return bool(self._server)
+        try:
+            self._server = await asyncio.start_server(self._handle_client, HUB_HOST, port)
+            print(f"   [LiveHub] Serving http://{HUB_HOST}:{port}/state and /events")
+            return True
+        except OSError as e:
+            print(f"   [LiveHub] Endpoint unavailable ({e}); in-process subscribers only.")
+            return False
+
+    async def stop_server(self):
+        # Not awaiting wait_closed(): open /events streams would keep it pending
+        if self._server:
+            self._server.close()
+            self._server = None
+
+
+# Process-wide hub: the streamer publishes, everything else in the process subscribes
+live_hub = LiveStateHub()
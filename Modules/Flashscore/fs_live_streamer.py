@@ -1,34 +1,67 @@
 # fs_live_streamer.py: fs_live_streamer.py: Continuous live score streaming from Flashscore ALL tab.
 # Part of LeoBook Modules — Flashscore
 #
-# Functions: _read_csv(), _write_csv(), _compute_outcome_correct(), _is_streamer_alive(), _touch_heartbeat(), _propagate_status_updates(), _purge_stale_live_scores(), _extract_all_matches() (+2 more)
+# Classes: LiveStateTracker, ShardAggregator, KickoffCalendar
+# Functions: _read_csv(), _known_match_links(), _write_csv(), _compute_outcome_correct(), _is_streamer_alive(), _touch_heartbeat(), _propagate_status_updates(), _flush_changes(), _extract_all_matches() (+13 more)
 
 """
 Live Score Streamer v3
-Scrapes the Flashscore ALL tab every 15 seconds using its own browser context.
+Scrapes the Flashscore ALL tab using its own browser context. In push mode a
+MutationObserver reports changed rows as they happen; full scans become a
+periodic consistency check.
 Extracts live, finished, postponed, cancelled, and FRO match statuses.
 Saves results to live_scores.csv and upserts to Supabase.
 Propagates status to schedules.csv and predictions.csv.
 Purges matches no longer live from live_scores.csv and Supabase.
+Every changed batch is also published to the in-memory live_hub (fs_live_hub.py).
 """
 
 import asyncio
 import csv
 import os
+import re
+from bisect import bisect_left
 from datetime import datetime as dt, timedelta
+from typing import Optional
 from playwright.async_api import Playwright
 
 from Data.Access.db_helpers import (
-    save_live_score_entry, log_audit_event,
+    save_live_scores_batch, log_audit_event,
     SCHEDULES_CSV, PREDICTIONS_CSV, LIVE_SCORES_CSV,
     files_and_headers
 )
+from Data.Access.csv_operations import STORE_WRITE_LOCK
 from Data.Access.sync_manager import SyncManager
+from Data.Access.prediction_evaluator import evaluate_prediction
 from Core.Browser.site_helpers import fs_universal_popup_dismissal
+from Core.Browser.resource_router import apply_resource_policy
+from Core.Browser.supervisor import BrowserSupervisor
 from Core.Utils.constants import NAVIGATION_TIMEOUT, WAIT_FOR_LOAD_STATE_TIMEOUT
 from Core.Intelligence.selector_manager import SelectorManager
+from Modules.Flashscore.fs_live_feed import LOCAL_TZ, LiveFeedParser, attach_feed_capture
+from Modules.Flashscore.fs_live_hub import RESOLVED_STATUSES, live_hub
 
 STREAM_INTERVAL = 60  # seconds
+# Adaptive cadence (seconds): fast near full time, relaxed at half-time, asleep until kickoff when idle
+CADENCE_CLOSING = 15       # a live match at CLOSING_MINUTE+, in extra time or penalties
+CADENCE_LIVE = 30
+CADENCE_HALFTIME = 120     # every live match is at half-time / break
+CADENCE_MAX_IDLE = 1200    # stays under the 30 min heartbeat window of _is_streamer_alive()
+KICKOFF_LEAD = 120         # wake this long before a kickoff; kickoffs this recent still count as due
+CLOSING_MINUTE = 80
+LIVE_STATUSES = {'live', 'halftime', 'break', 'penalties', 'extra_time'}
+DIFF_FIELDS = ('home_score', 'away_score', 'minute', 'status', 'stage_detail')
+# push: MutationObserver streams changed rows, full scan every FULL_RESCAN_INTERVAL; poll: full scan every STREAM_INTERVAL;
+# feed: parse intercepted XHR/websocket feeds (fs_live_feed.py), full list reloaded every FULL_RESCAN_INTERVAL
+LIVE_STREAM_MODE = os.getenv("LIVE_STREAM_MODE", "push").lower()
+FULL_RESCAN_INTERVAL = int(os.getenv("LIVE_FULL_RESCAN_INTERVAL", "300"))  # seconds
+PUSH_DEBOUNCE_MS = 500
+# Push/feed modes write to CSV/Supabase at most this often (seconds); pushes in between are merged into one flush
+PUSH_FLUSH_INTERVAL = int(os.getenv("LIVE_PUSH_FLUSH_INTERVAL", str(CADENCE_LIVE)))
+# Pages scanned in parallel in one browser (push/poll modes), e.g. "live,finished" on busy days
+SHARD_TABS = {"all": "all_tab", "live": "tab_live", "finished": "tab_finished", "scheduled": "tab_scheduled"}
+LIVE_SHARDS = [s.strip() for s in os.getenv("LIVE_SHARDS", "all").lower().split(",") if s.strip() in SHARD_TABS] or ["all"]
+LIVE_BINDING = "leoLiveRows"
 FLASHSCORE_URL = "https://www.flashscore.com/football/"
 _STREAMER_HEARTBEAT_FILE = os.path.join(os.path.dirname(LIVE_SCORES_CSV), '.streamer_heartbeat')
 
@@ -54,6 +87,16 @@ def _read_csv(path):
         return list(csv.DictReader(f))
 
 
+def _known_match_links():
+    """fixture_id -> stored match_link (schedules win over live_scores), for feed-mode rows."""
+    links = {}
+    for path in (LIVE_SCORES_CSV, SCHEDULES_CSV):
+        for row in _read_csv(path):
+            if row.get('fixture_id') and row.get('match_link'):
+                links[row['fixture_id']] = row['match_link']
+    return links
+
+
 def _write_csv(path, rows, fieldnames):
     with open(path, 'w', newline='', encoding='utf-8') as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
@@ -65,27 +108,15 @@ def _write_csv(path, rows, fieldnames):
 # ---------------------------------------------------------------------------
 # Status propagation: update schedules + predictions when matches go live/finish
 # ---------------------------------------------------------------------------
-def _compute_outcome_correct(prediction_str, home_score, away_score):
-    """Check if a prediction was correct given the final score."""
-    try:
-        hs = int(home_score)
-        aws = int(away_score)
-    except (ValueError, TypeError):
-        return ''
-    p = (prediction_str or '').lower()
-    if 'home win' in p:
-        return 'True' if hs > aws else 'False'
-    if 'away win' in p:
-        return 'True' if aws > hs else 'False'
-    if 'draw' in p:
-        return 'True' if hs == aws else 'False'
-    if 'over 2.5' in p:
-        return 'True' if (hs + aws) > 2 else 'False'
-    if 'under 2.5' in p:
-        return 'True' if (hs + aws) < 3 else 'False'
-    if 'btts' in p or 'both teams to score' in p:
-        return 'True' if hs > 0 and aws > 0 else 'False'
-    return ''
+def _compute_outcome_correct(row):
+    """Check if a prediction row was correct given its final score ('' if undecidable)."""
+    is_correct = evaluate_prediction(
+        row.get('prediction', ''),
+        f"{row.get('home_score', '')}-{row.get('away_score', '')}",
+        row.get('home_team', ''),
+        row.get('away_team', '')
+    )
+    return '' if is_correct is None else str(is_correct)
 
 
 def _is_streamer_alive() -> bool:
@@ -111,6 +142,7 @@ def _touch_heartbeat():
 def _propagate_status_updates(live_matches: list, resolved_matches: list = None):
     """
     Propagate live scores and resolved results into schedules.csv and predictions.csv.
+    Blocking (each file is rewritten under STORE_WRITE_LOCK); call it off the event loop.
     """
     resolved_matches = resolved_matches or []
     live_ids = {m['fixture_id'] for m in live_matches}
@@ -123,166 +155,420 @@ def _propagate_status_updates(live_matches: list, resolved_matches: list = None)
     NO_SCORE_STATUSES = {'cancelled', 'postponed', 'fro', 'abandoned'}
 
     sched_headers = files_and_headers.get(SCHEDULES_CSV, [])
-    sched_rows = _read_csv(SCHEDULES_CSV)
-    sched_changed = False
-    for row in sched_rows:
-        fid = row.get('fixture_id', '')
-
-        if fid in live_ids:
-            lm = live_map[fid]
-            if row.get('status', '').lower() != 'live':
+    with STORE_WRITE_LOCK:
+        sched_rows = _read_csv(SCHEDULES_CSV)
+        sched_updates = []
+        for row in sched_rows:
+            fid = row.get('fixture_id', '')
+            before = dict(row)
+
+            if fid in live_ids:
+                lm = live_map[fid]
                 row['status'] = 'live'
-                sched_changed = True
-            if lm.get('home_score'):
-                row['home_score'] = lm['home_score']
-                row['away_score'] = lm['away_score']
-                sched_changed = True
-            if lm.get('minute'):
-                row['live_minute'] = lm['minute']
-                sched_changed = True
-
-        elif fid in resolved_ids:
-            rm = resolved_map[fid]
-            terminal_status = rm.get('status', 'finished')
-            if row.get('status', '').lower() != terminal_status:
-                row['status'] = terminal_status
-                if terminal_status in NO_SCORE_STATUSES:
-                    row['home_score'] = ''
-                    row['away_score'] = ''
-                else:
-                    row['home_score'] = rm.get('home_score', row.get('home_score', ''))
-                    row['away_score'] = rm.get('away_score', row.get('away_score', ''))
-                if rm.get('stage_detail'):
-                    row['stage_detail'] = rm['stage_detail']
-                sched_changed = True
+                if lm.get('home_score'):
+                    row['home_score'] = lm['home_score']
+                    row['away_score'] = lm['away_score']
+                if lm.get('minute'):
+                    row['live_minute'] = lm['minute']
+
+            elif fid in resolved_ids:
+                rm = resolved_map[fid]
+                terminal_status = rm.get('status', 'finished')
+                if row.get('status', '').lower() != terminal_status:
+                    row['status'] = terminal_status
+                    if terminal_status in NO_SCORE_STATUSES:
+                        row['home_score'] = ''
+                        row['away_score'] = ''
+                    else:
+                        row['home_score'] = rm.get('home_score', row.get('home_score', ''))
+                        row['away_score'] = rm.get('away_score', row.get('away_score', ''))
+                    if rm.get('stage_detail'):
+                        row['stage_detail'] = rm['stage_detail']
+
+            elif row.get('status', '').lower() == 'live' and fid not in live_ids and not streamer_alive:
+                try:
+                    match_time_str = f"{row.get('date','2000-01-01')}T{row.get('match_time','00:00')}:00"
+                    match_start = dt.fromisoformat(match_time_str)
+                    if now > match_start + timedelta(minutes=150):
+                        row['status'] = 'finished'
+                except Exception:
+                    pass
 
-        elif row.get('status', '').lower() == 'live' and fid not in live_ids and not streamer_alive:
-            try:
-                match_time_str = f"{row.get('date','2000-01-01')}T{row.get('match_time','00:00')}:00"
-                match_start = dt.fromisoformat(match_time_str)
-                if now > match_start + timedelta(minutes=150):
-                    row['status'] = 'finished'
-                    sched_changed = True
-            except Exception:
-                pass
-
-    sched_updates = []
-    if sched_changed:
-        _write_csv(SCHEDULES_CSV, sched_rows, sched_headers)
-        sched_updates = [r for r in sched_rows if r.get('fixture_id') in (live_ids | resolved_ids)]
+            if row != before:
+                sched_updates.append(row)
+
+        if sched_updates:
+            _write_csv(SCHEDULES_CSV, sched_rows, sched_headers)
 
     pred_headers = files_and_headers.get(PREDICTIONS_CSV, [])
-    pred_rows = _read_csv(PREDICTIONS_CSV)
-    pred_changed = False
-    pred_updates = []
+    with STORE_WRITE_LOCK:
+        pred_rows = _read_csv(PREDICTIONS_CSV)
+        pred_changed = False
+        pred_updates = []
     
-    for row in pred_rows:
-        fid = row.get('fixture_id', '')
-        cur_status = row.get('status', row.get('match_status', '')).lower()
-
-        if fid in live_ids:
-            lm = live_map[fid]
-            row_changed = False
-            if cur_status != 'live':
-                row['status'] = 'live'
-                row_changed = True
+        for row in pred_rows:
+            fid = row.get('fixture_id', '')
+            cur_status = row.get('status', row.get('match_status', '')).lower()
+
+            if fid in live_ids:
+                lm = live_map[fid]
+                row_changed = False
+                if cur_status != 'live':
+                    row['status'] = 'live'
+                    row_changed = True
             
-            new_hs = lm.get('home_score', '')
-            new_as = lm.get('away_score', '')
-            if row.get('home_score') != new_hs or row.get('away_score') != new_as:
-                row['home_score'] = new_hs
-                row['away_score'] = new_as
-                row['actual_score'] = f"{new_hs}-{new_as}"
-                row_changed = True
+                new_hs = lm.get('home_score', '')
+                new_as = lm.get('away_score', '')
+                if row.get('home_score') != new_hs or row.get('away_score') != new_as:
+                    row['home_score'] = new_hs
+                    row['away_score'] = new_as
+                    row['actual_score'] = f"{new_hs}-{new_as}"
+                    row_changed = True
             
-            if row_changed:
-                pred_changed = True
-                pred_updates.append(row)
-
-        elif fid in resolved_ids:
-            rm = resolved_map[fid]
-            terminal_status = rm.get('status', 'finished')
-            if cur_status != terminal_status:
-                row['status'] = terminal_status
-                if terminal_status in NO_SCORE_STATUSES:
-                    row['home_score'] = ''
-                    row['away_score'] = ''
-                    row['actual_score'] = ''
-                else:
-                    row['home_score'] = rm.get('home_score', row.get('home_score', ''))
-                    row['away_score'] = rm.get('away_score', row.get('away_score', ''))
-                    row['actual_score'] = f"{rm.get('home_score', '')}-{rm.get('away_score', '')}"
-                if rm.get('stage_detail'):
-                    row['stage_detail'] = rm['stage_detail']
-                if terminal_status not in NO_SCORE_STATUSES:
-                    oc = _compute_outcome_correct(
-                        row.get('prediction', ''),
-                        row.get('home_score', ''),
-                        row.get('away_score', '')
-                    )
-                    if oc:
-                        row['outcome_correct'] = oc
-                pred_changed = True
-                pred_updates.append(row)
-
-        elif cur_status == 'live' and fid not in live_ids and not streamer_alive:
-            try:
-                date_val = row.get('date', '2000-01-01')
-                time_val = row.get('match_time', '00:00')
-                match_start = dt.fromisoformat(f"{date_val}T{time_val}:00")
-                if now > match_start + timedelta(minutes=150):
-                    row['status'] = 'finished'
-                    oc = _compute_outcome_correct(
-                        row.get('prediction', ''),
-                        row.get('home_score', ''),
-                        row.get('away_score', '')
-                    )
-                    if oc:
-                        row['outcome_correct'] = oc
+                if row_changed:
                     pred_changed = True
                     pred_updates.append(row)
-            except Exception:
-                pass
-    if pred_changed:
-        _write_csv(PREDICTIONS_CSV, pred_rows, pred_headers)
+
+            elif fid in resolved_ids:
+                rm = resolved_map[fid]
+                terminal_status = rm.get('status', 'finished')
+                if cur_status != terminal_status:
+                    row['status'] = terminal_status
+                    if terminal_status in NO_SCORE_STATUSES:
+                        row['home_score'] = ''
+                        row['away_score'] = ''
+                        row['actual_score'] = ''
+                    else:
+                        row['home_score'] = rm.get('home_score', row.get('home_score', ''))
+                        row['away_score'] = rm.get('away_score', row.get('away_score', ''))
+                        row['actual_score'] = f"{rm.get('home_score', '')}-{rm.get('away_score', '')}"
+                    if rm.get('stage_detail'):
+                        row['stage_detail'] = rm['stage_detail']
+                    if terminal_status not in NO_SCORE_STATUSES:
+                        oc = _compute_outcome_correct(row)
+                        if oc:
+                            row['outcome_correct'] = oc
+                    pred_changed = True
+                    pred_updates.append(row)
+
+            elif cur_status == 'live' and fid not in live_ids and not streamer_alive:
+                try:
+                    date_val = row.get('date', '2000-01-01')
+                    time_val = row.get('match_time', '00:00')
+                    match_start = dt.fromisoformat(f"{date_val}T{time_val}:00")
+                    if now > match_start + timedelta(minutes=150):
+                        row['status'] = 'finished'
+                        oc = _compute_outcome_correct(row)
+                        if oc:
+                            row['outcome_correct'] = oc
+                        pred_changed = True
+                        pred_updates.append(row)
+                except Exception:
+                    pass
+        if pred_changed:
+            _write_csv(PREDICTIONS_CSV, pred_rows, pred_headers)
         
     return sched_updates, pred_updates
 
 
 # ---------------------------------------------------------------------------
-# Purge stale live_scores: remove matches no longer in the LIVE tab
+# Diff tracking: only fixtures whose score/minute/status moved are persisted
 # ---------------------------------------------------------------------------
-def _purge_stale_live_scores(current_live_ids: set):
+class LiveStateTracker:
+    """Remembers each fixture's last seen state and reports only what changed."""
+
+    def __init__(self):
+        self._state = {}        # fixture_id -> tuple of DIFF_FIELDS
+        self.live_ids = set()   # fixtures live as of the last full scan
+
+    def diff(self, matches: list, full_scan: bool = True):
+        """
+        Returns (changed_matches, stale_live_ids). A full scan also forgets
+        fixtures that are no longer on the page.
+        """
+        changed = []
+        for m in matches:
+            fid = m.get('fixture_id')
+            signature = tuple(m.get(f, '') for f in DIFF_FIELDS)
+            if self._state.get(fid) != signature:
+                self._state[fid] = signature
+                changed.append(m)
+
+        live_now = {m['fixture_id'] for m in matches if m.get('status') in LIVE_STATUSES}
+        if full_scan:
+            seen = {m.get('fixture_id') for m in matches}
+            self._state = {fid: sig for fid, sig in self._state.items() if fid in seen}
+            stale = self.live_ids - live_now
+            self.live_ids = live_now
+        else:
+            ended = {m['fixture_id'] for m in matches if m.get('status') not in LIVE_STATUSES}
+            stale = self.live_ids & ended
+            self.live_ids = (self.live_ids - ended) | live_now
+        return changed, stale
+
+
+class ShardAggregator:
     """
-    Remove any fixture from live_scores.csv that is NOT in the current LIVE set.
+    Merges the rows scanned by every shard page into one view per tick.
+    A fixture seen by two shards (e.g. LIVE and FINISHED right at full time)
+    keeps its most advanced state.
     """
-    live_headers = files_and_headers.get(LIVE_SCORES_CSV, [])
-    existing_rows = _read_csv(LIVE_SCORES_CSV)
-    if not existing_rows:
-        return set()
-    
-    existing_ids = {r.get('fixture_id', '') for r in existing_rows}
-    stale_ids = existing_ids - current_live_ids
-    
+
+    @staticmethod
+    def _rank(match: dict) -> int:
+        status = match.get('status')
+        return 2 if status in RESOLVED_STATUSES else 1 if status in LIVE_STATUSES else 0
+
+    def __init__(self):
+        self._rows = {}  # fixture_id -> row
+
+    def add(self, rows: list):
+        for m in rows:
+            fid = m.get('fixture_id')
+            if not fid:
+                continue
+            current = self._rows.get(fid)
+            if current is None or self._rank(m) >= self._rank(current):
+                self._rows[fid] = m
+
+    def drain(self) -> list:
+        rows, self._rows = list(self._rows.values()), {}
+        return rows
+
+
+class KickoffCalendar:
+    """Upcoming kickoff times from schedules.csv, re-read only when the file changes."""
+
+    def __init__(self):
+        self._mtime = None
+        self._kickoffs = []  # sorted, LOCAL_TZ
+
+    def _refresh(self):
+        try:
+            mtime = os.path.getmtime(SCHEDULES_CSV)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        kickoffs = []
+        for row in _read_csv(SCHEDULES_CSV):
+            if row.get('match_status', '') not in ('', 'scheduled'):
+                continue
+            try:
+                kickoff = dt.strptime(f"{row.get('date', '')} {row.get('match_time', '')}", "%d.%m.%Y %H:%M")
+            except ValueError:
+                continue
+            kickoffs.append(kickoff.replace(tzinfo=LOCAL_TZ))
+        self._kickoffs = sorted(kickoffs)
+
+    def seconds_until_next(self) -> Optional[float]:
+        """Seconds to the next kickoff (negative if one is just due), None if none is scheduled."""
+        self._refresh()
+        now = dt.now(LOCAL_TZ)
+        i = bisect_left(self._kickoffs, now - timedelta(seconds=KICKOFF_LEAD))
+        return (self._kickoffs[i] - now).total_seconds() if i < len(self._kickoffs) else None
+
+
+def _is_closing(match: dict) -> bool:
+    if match.get('status') in ('extra_time', 'penalties'):
+        return True
+    minute = re.match(r"\d+", match.get('minute', '') or '')
+    return bool(minute) and int(minute.group()) >= CLOSING_MINUTE
+
+
+def _next_scan_delay(matches: list, calendar: KickoffCalendar) -> float:
+    """Seconds until the next scan, from the match clocks of the last scan and the kickoff calendar."""
+    live = [m for m in matches if m.get('status') in LIVE_STATUSES]
+    if live:
+        if any(_is_closing(m) for m in live):
+            return CADENCE_CLOSING
+        if all(m.get('status') in ('halftime', 'break') for m in live):
+            return CADENCE_HALFTIME
+        return CADENCE_LIVE
+    until = calendar.seconds_until_next()
+    if until is None:
+        return CADENCE_MAX_IDLE
+    return min(max(until - KICKOFF_LEAD, STREAM_INTERVAL), CADENCE_MAX_IDLE)
+
+
+async def _flush_changes(sync: SyncManager, changed: list, stale_ids: set, current_live_ids: set, force: bool = False):
+    """
+    One batched persist + sync for a set of changed fixtures:
+    live_scores.csv, schedules.csv and predictions.csv are each written at most once,
+    and Supabase only receives the rows that actually changed.
+    """
+    # In-process subscribers hear about goals and final whistles before the CSV/Supabase writes
+    live_hub.publish(changed, stale_ids)
+
+    live_changed = [m for m in changed if m.get('status') in LIVE_STATUSES]
+    resolved_changed = [m for m in changed if m.get('status') in RESOLVED_STATUSES]
+    if not (live_changed or resolved_changed or stale_ids or force):
+        return 0
+
+    # File writes run on a worker thread: STORE_WRITE_LOCK may be held by the analysis pipeline's writer
+    await asyncio.to_thread(save_live_scores_batch, live_changed, keep_ids=current_live_ids)
     if stale_ids:
-        kept_rows = [r for r in existing_rows if r.get('fixture_id', '') not in stale_ids]
-        _write_csv(LIVE_SCORES_CSV, kept_rows, live_headers)
-    
-    return stale_ids
+        print(f"   [Streamer] Decision: Purged {len(stale_ids)} stale matches from local state.")
+
+    sched_upd, pred_upd = [], []
+    if live_changed or resolved_changed:
+        sched_upd, pred_upd = await asyncio.to_thread(_propagate_status_updates, live_changed, resolved_changed)
+        print(f"   [Streamer] Status: {len(live_changed)} live / {len(resolved_changed)} resolved changed -> "
+              f"{len(sched_upd)} schedule rows, {len(pred_upd)} prediction rows.")
+
+    if sync.supabase:
+        if live_changed: await sync.batch_upsert('live_scores', live_changed)
+        if pred_upd: await sync.batch_upsert('predictions', pred_upd)
+        if sched_upd: await sync.batch_upsert('schedules', sched_upd)
+        if stale_ids:
+            try:
+                print(f"   [Streamer] Sync: Deleting {len(stale_ids)} stale entries from Supabase.")
+                sync.supabase.table('live_scores').delete().in_('fixture_id', list(stale_ids)).execute()
+            except Exception as e:
+                print(f"   [Streamer] Sync Warning: Supabase deletion failed: {e}")
+    return len(live_changed) + len(resolved_changed)
 
 
 # ---------------------------------------------------------------------------
 # Flashscore ALL tab extraction – only 4 selector keys updated
 # ---------------------------------------------------------------------------
-async def _extract_all_matches(page) -> list:
+# Row parser shared by the full scan and the MutationObserver push path
+_ROW_PARSER_JS = r"""
+const parseRow = (el, sel, regionLeague) => {
+    const rowId = el.getAttribute('id');
+    const cleanId = rowId ? rowId.replace(sel.match_id_prefix, '') : null;
+    if (!cleanId) return null;
+
+    const homeNameEl = el.querySelector(sel.match_row_home_team_name);
+    const awayNameEl = el.querySelector(sel.match_row_away_team_name);
+    if (!homeNameEl || !awayNameEl) return null;
+
+    const homeScoreEl = el.querySelector(sel.live_match_home_score);
+    const awayScoreEl = el.querySelector(sel.live_match_away_score);
+    const stageEl = el.querySelector(sel.live_match_stage_block);
+    const timeEl = el.querySelector(sel.match_row_time);
+    const linkEl = el.querySelector(sel.event_row_link);
+
+    const isLive = el.classList.contains(sel.live_match_row.replace('.', ''));
+    const stageText = stageEl ? stageEl.innerText.trim() : '';
+    const stageLower = stageText.toLowerCase();
+    const rawTime = timeEl ? timeEl.innerText.trim() : '';
+
+    let status = 'scheduled';
+    let stageDetail = '';
+    let minute = '';
+    let homeScore = homeScoreEl ? homeScoreEl.innerText.trim() : '';
+    let awayScore = awayScoreEl ? awayScoreEl.innerText.trim() : '';
+
+    if (isLive) {
+        status = 'live';
+        minute = stageText.replace(/\s+/g, '');
+        const minLower = minute.toLowerCase();
+        if (minLower.includes('half')) status = 'halftime';
+        else if (minLower.includes('break')) status = 'break';
+        else if (minLower.includes('pen')) { status = 'penalties'; stageDetail = 'Pen'; }
+        else if (minLower.includes('et')) { status = 'extra_time'; stageDetail = 'ET'; }
+    } else if (stageLower.includes('postp') || stageLower.includes('pp')) {
+        status = 'postponed'; stageDetail = 'Postp';
+        homeScore = ''; awayScore = '';
+    } else if (stageLower.includes('canc')) {
+        status = 'cancelled'; stageDetail = 'Canc';
+        homeScore = ''; awayScore = '';
+    } else if (stageLower.includes('abn') || stageLower.includes('abd')) {
+        status = 'cancelled'; stageDetail = 'Abn';
+        homeScore = ''; awayScore = '';
+    } else if (stageLower.includes('fro') || stageLower.includes('susp')) {
+        status = 'fro'; stageDetail = 'FRO';
+        homeScore = ''; awayScore = '';
+    } else if (homeScoreEl && awayScoreEl) {
+        const scoreState = homeScoreEl.getAttribute('data-state');
+        if (scoreState === sel.score_final_state || stageLower.includes('fin') || stageLower === '') {
+            status = 'finished';
+            if (stageLower.includes('pen')) stageDetail = 'Pen';
+            else if (stageLower.includes('aet') || stageLower.includes('et')) stageDetail = 'AET';
+            else if (stageLower.includes('wo') || stageLower.includes('w.o')) stageDetail = 'WO';
+        }
+    }
+
+    return {
+        fixture_id: cleanId,
+        home_team: homeNameEl.innerText.trim(),
+        away_team: awayNameEl.innerText.trim(),
+        home_score: homeScore,
+        away_score: awayScore,
+        minute: minute,
+        status: status,
+        stage_detail: stageDetail,
+        region_league: regionLeague,
+        match_link: linkEl ? linkEl.getAttribute('href') : '',
+        match_time: rawTime,
+        timestamp: new Date().toISOString()
+    };
+};
+const headerLeague = (el, sel) => {
+    const catEl = el.querySelector(sel.league_country_text);
+    const titleEl = el.querySelector(sel.league_title_text);
+    const region = catEl ? catEl.innerText.trim() : '';
+    const league = titleEl ? titleEl.innerText.trim() : '';
+    return region ? region + ' - ' + league : league || 'Unknown';
+};
+"""
+
+# Installs a MutationObserver that pushes changed rows to Python through the
+# exposed LIVE_BINDING. Idempotent per document: returns 'installed' or 'active'.
+_OBSERVER_JS = r"""(args) => {
+    const [sel, bindingName, debounceMs] = args;
+    if (window.__leoLiveObserver) return 'active';
+""" + _ROW_PARSER_JS + r"""
+    const leagueOf = (row) => {
+        for (let n = row.previousElementSibling; n; n = n.previousElementSibling) {
+            if (n.matches(sel.league_header_wrapper)) return headerLeague(n, sel);
+        }
+        return 'Unknown';
+    };
+    const pending = new Set();
+    let timer = null;
+    const flush = () => {
+        timer = null;
+        const rows = [];
+        pending.forEach((row) => {
+            if (!row.isConnected) return;
+            const m = parseRow(row, sel, leagueOf(row));
+            if (m) rows.push(m);
+        });
+        pending.clear();
+        if (rows.length) window[bindingName](rows);
+    };
+    const root = document.querySelector(sel.sport_container_soccer) || document.body;
+    window.__leoLiveObserver = new MutationObserver((mutations) => {
+        for (const mu of mutations) {
+            const node = mu.target.nodeType === 1 ? mu.target : mu.target.parentElement;
+            const row = node && node.closest(sel.match_rows);
+            if (row) pending.add(row);
+            mu.addedNodes.forEach((n) => {
+                if (n.nodeType === 1 && n.matches(sel.match_rows)) pending.add(n);
+            });
+        }
+        if (pending.size && !timer) timer = setTimeout(flush, debounceMs);
+    });
+    window.__leoLiveObserver.observe(root, {
+        subtree: true, childList: true, characterData: true,
+        attributes: true, attributeFilter: ['class', 'data-state'],
+    });
+    return 'installed';
+}"""
+
+
+async def _extract_all_matches(page, shard: str = "all") -> list:
     """
-    Extracts ALL matches from the ALL tab — the single source of truth.
+    Extracts every match row of the page's active tab (ALL by default).
     """
     selectors = SelectorManager.get_all_selectors_for_context("fs_home_page")
 
-    result = await page.evaluate(r"""(sel) => {
+    result = await page.evaluate(r"""(sel) => {""" + _ROW_PARSER_JS + r"""
         const matches = [];
-        const debug = {total_elements: 0, headers: 0, no_id: 0, no_teams: 0, matched: 0};
+        const debug = {total_elements: 0, headers: 0, no_row: 0, matched: 0};
         const combinedSel = sel.league_header_wrapper + ', ' + sel.match_rows;
         let container = document.querySelector(sel.sport_container_soccer);
         let allElements = container ? container.querySelectorAll(combinedSel) : [];
@@ -294,104 +580,25 @@ async def _extract_all_matches(page) -> list:
         }
         debug.total_elements = allElements.length;
 
-        let currentRegion = '';
-        let currentLeague = '';
+        let regionLeague = 'Unknown';
 
         allElements.forEach((el) => {
             if (el.matches(sel.league_header_wrapper)) {
                 debug.headers++;
-                const catEl = el.querySelector(sel.league_country_text);
-                const titleEl = el.querySelector(sel.league_title_text);
-                currentRegion = catEl ? catEl.innerText.trim() : '';
-                currentLeague = titleEl ? titleEl.innerText.trim() : '';
-                return;
-            }
-
-            const rowId = el.getAttribute('id');
-            const cleanId = rowId ? rowId.replace(sel.match_id_prefix, '') : null;
-            if (!cleanId) { debug.no_id++; return; }
-
-            const homeNameEl = el.querySelector(sel.match_row_home_team_name);
-            const awayNameEl = el.querySelector(sel.match_row_away_team_name);
-            if (!homeNameEl || !awayNameEl) {
-                debug.no_teams++;
+                regionLeague = headerLeague(el, sel);
                 return;
             }
-
+            const m = parseRow(el, sel, regionLeague);
+            if (!m) { debug.no_row++; return; }
             debug.matched++;
-
-            const homeScoreEl = el.querySelector(sel.live_match_home_score);
-            const awayScoreEl = el.querySelector(sel.live_match_away_score);
-            const stageEl = el.querySelector(sel.live_match_stage_block);
-            const timeEl = el.querySelector(sel.match_row_time);
-            const linkEl = el.querySelector(sel.event_row_link);
-
-            const isLive = el.classList.contains(sel.live_match_row.replace('.', ''));
-            const stageText = stageEl ? stageEl.innerText.trim() : '';
-            const stageLower = stageText.toLowerCase();
-            const rawTime = timeEl ? timeEl.innerText.trim() : '';
-
-            let status = 'scheduled';
-            let stageDetail = '';
-            let minute = '';
-            let homeScore = homeScoreEl ? homeScoreEl.innerText.trim() : '';
-            let awayScore = awayScoreEl ? awayScoreEl.innerText.trim() : '';
-
-            if (isLive) {
-                status = 'live';
-                minute = stageText.replace(/\s+/g, '');
-                const minLower = minute.toLowerCase();
-                if (minLower.includes('half')) status = 'halftime';
-                else if (minLower.includes('break')) status = 'break';
-                else if (minLower.includes('pen')) { status = 'penalties'; stageDetail = 'Pen'; }
-                else if (minLower.includes('et')) { status = 'extra_time'; stageDetail = 'ET'; }
-            } else if (stageLower.includes('postp') || stageLower.includes('pp')) {
-                status = 'postponed'; stageDetail = 'Postp';
-                homeScore = ''; awayScore = '';
-            } else if (stageLower.includes('canc')) {
-                status = 'cancelled'; stageDetail = 'Canc';
-                homeScore = ''; awayScore = '';
-            } else if (stageLower.includes('abn') || stageLower.includes('abd')) {
-                status = 'cancelled'; stageDetail = 'Abn';
-                homeScore = ''; awayScore = '';
-            } else if (stageLower.includes('fro') || stageLower.includes('susp')) {
-                status = 'fro'; stageDetail = 'FRO';
-                homeScore = ''; awayScore = '';
-            } else if (homeScoreEl && awayScoreEl) {
-                const scoreState = homeScoreEl.getAttribute('data-state');
-                if (scoreState === sel.score_final_state || stageLower.includes('fin') || stageLower === '') {
-                    status = 'finished';
-                    if (stageLower.includes('pen')) stageDetail = 'Pen';
-                    else if (stageLower.includes('aet') || stageLower.includes('et')) stageDetail = 'AET';
-                    else if (stageLower.includes('wo') || stageLower.includes('w.o')) stageDetail = 'WO';
-                }
-            }
-
-            const regionLeague = currentRegion
-                ? currentRegion + ' - ' + currentLeague
-                : currentLeague || 'Unknown';
-
-            matches.push({
-                fixture_id: cleanId,
-                home_team: homeNameEl.innerText.trim(),
-                away_team: awayNameEl.innerText.trim(),
-                home_score: homeScore,
-                away_score: awayScore,
-                minute: minute,
-                status: status,
-                stage_detail: stageDetail,
-                region_league: regionLeague,
-                match_link: linkEl ? linkEl.getAttribute('href') : '',
-                match_time: rawTime,
-                timestamp: new Date().toISOString()
-            });
+            matches.push(m);
         });
         return {matches, debug};
     }""", selectors)
 
     matches = result.get('matches', [])
     debug = result.get('debug', {})
-    print(f"   [Streamer] Found {len(matches)} matches.")
+    print(f"   [Streamer] Found {len(matches)} matches ({shard.upper()} tab).")
     #print(f"   [Streamer] Debug: {debug}")
 
     # Status breakdown
@@ -409,17 +616,94 @@ async def _extract_all_matches(page) -> list:
     return matches or []
 
 
+async def _install_live_observer(page) -> bool:
+    """(Re)installs the push observer; needed after every navigation or reload."""
+    selectors = SelectorManager.get_all_selectors_for_context("fs_home_page")
+    try:
+        state = await page.evaluate(_OBSERVER_JS, [selectors, LIVE_BINDING, PUSH_DEBOUNCE_MS])
+        if state == 'installed':
+            print("   [Streamer] Push observer installed.")
+        return True
+    except Exception as e:
+        print(f"   [Streamer] Push observer unavailable: {e}")
+        return False
+
+
+async def _flush_push_batches(batches: list, tracker: LiveStateTracker, sync: SyncManager):
+    """Diff queued (rows, full_list) batches in arrival order and persist them in one flush."""
+    try:
+        changed, stale_ids = [], set()
+        for rows, full_list in batches:
+            batch_changed, batch_stale = tracker.diff(rows, full_scan=full_list)
+            changed.extend(batch_changed)
+            stale_ids |= batch_stale
+        n_changed = await _flush_changes(sync, changed, stale_ids, tracker.live_ids)
+        if n_changed:
+            print(f"   [Streamer] Push: {n_changed} fixtures changed at {dt.now().strftime('%H:%M:%S')}.")
+    except Exception as e:
+        print(f"   [Streamer] Push update failed: {e}")
+
+
+async def _drain_push_updates(queue: asyncio.Queue, tracker: LiveStateTracker, sync: SyncManager, duration: float):
+    """
+    Push/feed modes: persist rows as they arrive (queue items are (rows, full_list)),
+    until the next full consistency scan is due. A push after a quiet spell is
+    flushed at once; pushes arriving within PUSH_FLUSH_INTERVAL of a flush wait
+    for the next one, so a busy evening costs one write per file per interval.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+    next_flush = loop.time() + PUSH_FLUSH_INTERVAL  # The scan before this call has just persisted
+    pending = []
+    while True:
+        now = loop.time()
+        if now >= deadline:
+            break
+        try:
+            wait = (min(next_flush, deadline) if pending else deadline) - now
+            pending.append(await asyncio.wait_for(queue.get(), timeout=max(wait, 0)))
+        except asyncio.TimeoutError:
+            pass
+        while not queue.empty():
+            pending.append(queue.get_nowait())
+        if pending and loop.time() >= next_flush:
+            await _flush_push_batches(pending, tracker, sync)
+            pending = []
+            next_flush = loop.time() + PUSH_FLUSH_INTERVAL
+    if pending:
+        await _flush_push_batches(pending, tracker, sync)
+
+
+async def _run_feed_mode(page, queue: asyncio.Queue, parser: LiveFeedParser):
+    """
+    Feed mode: rows come from intercepted feed payloads. Every FULL_RESCAN_INTERVAL
+    the page is reloaded, which re-requests the full day list (f_ feed) as the
+    consistency check; stored match links are refreshed for fixtures saved since.
+    """
+    sync = SyncManager()
+    tracker = LiveStateTracker()
+    print(f"   [Streamer] Feed mode: consuming network feeds (full list every {FULL_RESCAN_INTERVAL}s).")
+    while True:
+        _touch_heartbeat()
+        await _drain_push_updates(queue, tracker, sync, FULL_RESCAN_INTERVAL)
+        parser.match_links.update(_known_match_links())
+        try:
+            await page.reload(timeout=NAVIGATION_TIMEOUT, wait_until="domcontentloaded")
+        except Exception as e:
+            print(f"   [Streamer] Feed reload failed: {e}")
+
+
 # ---------------------------------------------------------------------------
 # Tab clicking helpers – MINIMAL CHANGE 2: added fallback
 # ---------------------------------------------------------------------------
-async def _click_all_tab(page) -> bool:
-    """Verify the ALL tab is selected; click it only if it isn't."""
+async def _click_tab(page, shard: str = "all") -> bool:
+    """Verify the shard's tab (ALL by default) is selected; click it only if it isn't."""
     try:
-        all_tab_sel = await SelectorManager.get_selector_auto(page, "fs_home_page", "all_tab")
-        if not all_tab_sel:
+        tab_sel = await SelectorManager.get_selector_auto(page, "fs_home_page", SHARD_TABS[shard])
+        if not tab_sel:
             return True  # no selector — likely fine by default
 
-        tab = page.locator(all_tab_sel)
+        tab = page.locator(tab_sel)
         if not await tab.is_visible(timeout=3000):
             return True  # tab not visible — page may not use tabs
 
@@ -429,12 +713,12 @@ async def _click_all_tab(page) -> bool:
             return True  # already active, nothing to do
 
         # Not selected — click to activate
-        print(f"   [Streamer] ALL tab not selected, clicking...")
-        await page.click(all_tab_sel, force=True, timeout=3000)
+        print(f"   [Streamer] {shard.upper()} tab not selected, clicking...")
+        await page.click(tab_sel, force=True, timeout=3000)
         await asyncio.sleep(0.5)
         return True
     except Exception as e:
-        print(f"   [Streamer] Error verifying ALL tab: {e}")
+        print(f"   [Streamer] Error verifying {shard.upper()} tab: {e}")
     return False
 
 
@@ -470,6 +754,70 @@ async def ensure_content_expanded(page):
     return True
 
 
+# ---------------------------------------------------------------------------
+# Page setup: one page per shard, all in the streamer's browser context
+# ---------------------------------------------------------------------------
+async def _open_flashscore(page):
+    """Navigate to Flashscore (wait up to 3 mins) and clear cookies/popups."""
+    await page.goto(FLASHSCORE_URL, timeout=NAVIGATION_TIMEOUT, wait_until="domcontentloaded")
+
+    # Target a visible element to ensure page has actual content before proceeding
+    try:
+        sport_sel = SelectorManager.get_selector_strict("fs_home_page", "sport_container")
+        await page.wait_for_selector(sport_sel, timeout=60000)
+    except:
+        print("   [Streamer] Warning: sportName container not found, proceeding anyway...")
+
+    await asyncio.sleep(2)
+    await fs_universal_popup_dismissal(page, "fs_home_page")
+
+
+async def _open_shard(context, shard: str):
+    page = await context.new_page()
+    await _open_flashscore(page)
+    await _click_tab(page, shard)
+    await ensure_content_expanded(page)
+    return page
+
+
+async def _recover_shard(page, shard: str):
+    try:
+        print(f"   [Streamer] Recovery ({shard.upper()}): Reloading page and re-authenticating state...")
+        await page.reload(wait_until="networkidle")
+        await fs_universal_popup_dismissal(page, "fs_home_page")
+        await _click_tab(page, shard)
+    except Exception as re:
+        print(f"   [Streamer] Recovery Failed ({shard.upper()}): {re}")
+
+
+async def _new_streamer_context(playwright: Playwright, browser):
+    """iPhone 12 emulation in Lagos time, with the streamer's resource policy."""
+    context = await browser.new_context(**playwright.devices['iPhone 12'], timezone_id="Africa/Lagos")
+    await apply_resource_policy(context, "live_streamer")
+    return context
+
+
+async def _open_session(playwright: Playwright, browser, push_queue: asyncio.Queue):
+    """
+    Context plus one page per shard (tab, leagues expanded), opened in parallel.
+    Returns (pages, push_mode). Also run after a browser recycle to restore the same state.
+    """
+    context = await _new_streamer_context(playwright, browser)
+
+    # Push mode: changed rows arrive through a MutationObserver binding between full scans.
+    # Bound on the context, so every shard page reports into the same queue.
+    push_mode = LIVE_STREAM_MODE == "push"
+    if push_mode:
+        try:
+            await context.expose_binding(LIVE_BINDING, lambda source, rows: push_queue.put_nowait((rows, False)))
+        except Exception as e:
+            print(f"   [Streamer] Push mode unavailable ({e}); polling every {STREAM_INTERVAL}s.")
+            push_mode = False
+
+    pages = dict(zip(LIVE_SHARDS, await asyncio.gather(*(_open_shard(context, s) for s in LIVE_SHARDS))))
+    return pages, push_mode
+
+
 # ---------------------------------------------------------------------------
 # Main streaming loop (unchanged except _touch_heartbeat is now guaranteed)
 # ---------------------------------------------------------------------------
@@ -477,130 +825,118 @@ async def live_score_streamer(playwright: Playwright):
     """
     Main streaming loop v3.2 (Mobile Optimized).
     - Headless browser session with iPhone 12 emulation.
-    - 60s extraction interval.
+    - Push mode (default): MutationObserver rows are persisted at most every
+      PUSH_FLUSH_INTERVAL, with a full re-scan every FULL_RESCAN_INTERVAL. Poll mode: full scans on an
+      adaptive cadence (15-30s in play, 120s at half-time, sleeps until the next
+      kickoff when nothing is live).
+      Feed mode: network feed payloads, no DOM scraping.
     - Robust dropdown + league expansion.
-    - Immediate DB + CSV upserts.
+    - Sharding (push/poll): LIVE_SHARDS opens one page per tab (e.g. "live,finished")
+      in the same browser; a ShardAggregator dedupes their rows by fixture_id so
+      each tick is one diff and one batched persist/sync.
+    - Diff-based persistence: only fixtures whose score, minute or status changed
+      are written (one batch per file) and upserted, and published to live_hub.
     """
-    print("\n   [Streamer] 🔴 Mobile Live Score Streamer v3.2 starting (Headless, 60s)...")
-    log_audit_event("STREAMER_START", "Mobile live score streamer v3.2 initialized (Headless, 60s).")
+    print("\n   [Streamer] 🔴 Mobile Live Score Streamer v3.2 starting (Headless, adaptive cadence)...")
+    log_audit_event("STREAMER_START", "Mobile live score streamer v3.2 initialized (Headless, adaptive cadence).")
 
-    browser = None
-    try:
-        # Launch headless Chromium
-        browser = await playwright.chromium.launch(
+    async def _launch():
+        return await playwright.chromium.launch(
             headless=True,
             args=["--disable-dev-shm-usage", "--no-sandbox"]
         )
 
-        # Emulate iPhone 12
-        iphone_12 = playwright.devices['iPhone 12']
-        context = await browser.new_context(
-            **iphone_12,
-            timezone_id="Africa/Lagos"
-        )
-        page = await context.new_page()
-
-        # Initial navigation (wait up to 3 mins)
+    # Owns the browser for the whole run and recycles it on its RSS / page ceilings
+    supervisor = BrowserSupervisor("live_streamer", _launch)
+    try:
+        browser = await supervisor.start()
+        await live_hub.start_server()
+        push_queue: asyncio.Queue = asyncio.Queue()
         print("   [Streamer] Navigating to Flashscore (Mobile view, up to 3 mins)...")
-        await page.goto(FLASHSCORE_URL, timeout=NAVIGATION_TIMEOUT, wait_until="domcontentloaded")
-        
-        # Target a visible element to ensure page has actual content before proceeding
-        try:
-            sport_sel = SelectorManager.get_selector_strict("fs_home_page", "sport_container")
-            await page.wait_for_selector(sport_sel, timeout=60000)
-        except:
-            print("   [Streamer] Warning: sportName container not found, proceeding anyway...")
-        
-        await asyncio.sleep(2)
-        
-        # Handle cookies/popups
-        await fs_universal_popup_dismissal(page, "fs_home_page")
-        
-        # Ensure ALL tab is active
-        await _click_all_tab(page)
-        
-        # Initial expansion
-        await ensure_content_expanded(page)
+
+        if LIVE_STREAM_MODE == "feed":
+            context = await _new_streamer_context(playwright, browser)
+            page = await context.new_page()
+            # Parse the page's own XHR/websocket feeds: no selectors or league expansion on this path
+            parser = LiveFeedParser(match_links=_known_match_links())
+            attach_feed_capture(page, parser, lambda rows, full_list: push_queue.put_nowait((rows, full_list)))
+            await _open_flashscore(page)
+            await _run_feed_mode(page, push_queue, parser)
+            return
+
+        pages, push_mode = await _open_session(playwright, browser, push_queue)
+        print(f"   [Streamer] Streaming {len(pages)} shard(s): {', '.join(s.upper() for s in pages)}.")
 
         EXPANSION_INTERVAL = 5  # re-expand every Nth cycle
 
         sync = SyncManager()
+        tracker = LiveStateTracker()
+        aggregator = ShardAggregator()
+        calendar = KickoffCalendar()
         cycle = 0
 
         while True:
             cycle += 1
             _touch_heartbeat()   # now always defined
             now_ts = dt.now().strftime("%H:%M:%S")
-            
-            try:
-                # Periodic expansion check (every Nth cycle — leagues stay expanded)
-                if cycle % EXPANSION_INTERVAL == 0:
-                    await ensure_content_expanded(page)
-
-                # Extraction
-                all_matches = await _extract_all_matches(page)
-                
-                # Separate by category
-                LIVE_STATUSES = {'live', 'halftime', 'break', 'penalties', 'extra_time'}
-                RESOLVED_STATUSES = {'finished', 'cancelled', 'postponed', 'fro', 'abandoned'}
-
-                live_matches = [m for m in all_matches if m.get('status') in LIVE_STATUSES]
-                resolved_matches = [m for m in all_matches if m.get('status') in RESOLVED_STATUSES]
-                current_live_ids = {m['fixture_id'] for m in live_matches}
-
-                # Save & Sync
-                stale_ids = _purge_stale_live_scores(current_live_ids)
-                if stale_ids:
-                    print(f"   [Streamer] Decision: Purged {len(stale_ids)} stale matches from local state.")
-                
-                if live_matches or resolved_matches:
-                    print(f"   [Streamer] Process: Upserting {len(live_matches)} live entries and {len(resolved_matches)} resolved entries.")
-                    # Update local CSVs
-                    for m in live_matches:
-                        save_live_score_entry(m)
-                    
-                    sched_upd, pred_upd = _propagate_status_updates(live_matches, resolved_matches)
-                    print(f"   [Streamer] Status: Propagation updated {len(sched_upd)} schedule rows and {len(pred_upd)} prediction rows.")
-
-                    # Immediate Supabase Sync
-                    if sync.supabase:
-                        print(f"   [Streamer] Sync: Pushing updates to Supabase...")
-                        if live_matches: await sync.batch_upsert('live_scores', live_matches)
-                        if pred_upd: await sync.batch_upsert('predictions', pred_upd)
-                        if sched_upd: await sync.batch_upsert('schedules', sched_upd)
-                        if stale_ids:
-                            try:
-                                print(f"   [Streamer] Sync: Deleting {len(stale_ids)} stale entries from Supabase.")
-                                sync.supabase.table('live_scores').delete().in_('fixture_id', list(stale_ids)).execute()
-                            except Exception as e:
-                                print(f"   [Streamer] Sync Warning: Supabase deletion failed: {e}")
-
-                    print(f"   [Streamer] Cycle {cycle} complete at {now_ts}. Summary: {len(live_matches)} Live | {len(resolved_matches)} Resolved | {len(all_matches)} Scanned.")
+
+            # Periodic expansion check (every Nth cycle — leagues stay expanded).
+            # Push mode scans rarely, so it re-expands on every scan.
+            if push_mode or cycle % EXPANSION_INTERVAL == 0:
+                await asyncio.gather(*(ensure_content_expanded(page) for page in pages.values()))
+
+            # Extraction: all shards scan in parallel (full scan; a consistency check in push mode)
+            results = await asyncio.gather(
+                *(_extract_all_matches(page, shard) for shard, page in pages.items()), return_exceptions=True
+            )
+            failed = [shard for shard, r in zip(pages, results) if isinstance(r, Exception)]
+            for shard, r in zip(pages, results):
+                if isinstance(r, Exception):
+                    print(f"   [Streamer] ⚠ Extraction Error in cycle {cycle} ({shard.upper()}): {r}")
                 else:
-                    # Fallback check
-                    _propagate_status_updates([], [])
-                    print(f"   [Streamer] {now_ts} — No active/resolved matches found (Cycle {cycle}). Fallback check performed.")
+                    aggregator.add(r)
+            all_matches = aggregator.drain()
+            delay = _next_scan_delay(all_matches, calendar)
 
+            try:
+                # A tick with a failed shard is partial: it must not forget or purge that shard's fixtures
+                changed, stale_ids = tracker.diff(all_matches, full_scan=not failed)
+
+                # Save & Sync only what moved since the last cycle, in one batch for all shards
+                # (first cycle also clears live_scores.csv of fixtures left over from a previous run)
+                n_changed = await _flush_changes(sync, changed, stale_ids, tracker.live_ids,
+                                                 force=(cycle == 1 and not failed))
+                print(f"   [Streamer] Cycle {cycle} complete at {now_ts}. Summary: {n_changed} Changed | "
+                      f"{len(tracker.live_ids)} Live | {len(all_matches)} Scanned | Next in {delay:.0f}s.")
             except Exception as e:
-                print(f"   [Streamer] ⚠ Extraction Error in cycle {cycle}: {e}")
-                # Try to recover session
-                try:
-                    print("   [Streamer] Recovery: Reloading page and re-authenticating state...")
-                    await page.reload(wait_until="networkidle")
-                    await fs_universal_popup_dismissal(page, "fs_home_page")
-                    await _click_all_tab(page)
-                except Exception as re:
-                    print(f"   [Streamer] Recovery Failed: {re}")
+                print(f"   [Streamer] ⚠ Persist Error in cycle {cycle}: {e}")
+                tracker = LiveStateTracker()  # Re-send full state next cycle; this one may not have been saved
+
+            # Try to recover failed sessions
+            await asyncio.gather(*(_recover_shard(pages[shard], shard) for shard in failed))
 
-            await asyncio.sleep(STREAM_INTERVAL)
+            # Every scan is one page pass per shard; recycle between scans, never mid-scan
+            supervisor.note_pages(len(pages))
+            if await supervisor.maybe_recycle():
+                pages, push_mode = await _open_session(playwright, supervisor.browser, push_queue)
+
+            if push_mode:
+                installed = await asyncio.gather(*(_install_live_observer(page) for page in pages.values()))
+                if not all(installed):
+                    push_mode = False
+
+            if push_mode:
+                # Pushes already carry live changes; the cadence only stretches the consistency scan while idle
+                await _drain_push_updates(push_queue, tracker, sync, max(delay, FULL_RESCAN_INTERVAL))
+            else:
+                await asyncio.sleep(delay)
 
     except asyncio.CancelledError:
         print("   [Streamer] Streamer cancelled.")
     except Exception as e:
         print(f"   [Streamer] Fatal error: {e}")
     finally:
-        if browser:
-            try:
-                await browser.close()
-            except: pass
+        await live_hub.stop_server()
+        await supervisor.close()
+        print(f"   [Streamer] Browser: {supervisor.summary()}")
         print("   [Streamer] 🔴 Streamer stopped.")
\ No newline at end of file
@@ -1,39 +1,136 @@
 # fs_offline.py: fs_offline.py: Reprediction loop using stored data.
 # Part of LeoBook Modules — Flashscore
 #
-# Functions: run_flashscore_offline_repredict(), _save_custom_prediction()
+# Functions: build_history_index(), run_flashscore_offline_repredict(), _save_custom_predictions()
 
+import asyncio
+import os
+import csv
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime as dt, timedelta
+from typing import Any, Dict, List, Tuple
 from zoneinfo import ZoneInfo
 from playwright.async_api import Playwright
-from Data.Access.db_helpers import get_all_schedules, get_standings, save_prediction
+from Data.Access.db_helpers import get_all_schedules, get_standings_by_league, save_predictions_batch
+from Data.Access.sync_manager import SyncManager
 from Scripts.recommend_bets import get_recommendations
 from Core.Intelligence.model import RuleEngine
 from Core.Intelligence.rule_config import RuleConfig
-import csv
-import os
+from Core.Intelligence.backtest_cache import BacktestCache
+from Core.Intelligence.learning_engine import LearningEngine
 
 NIGERIA_TZ = ZoneInfo("Africa/Lagos")
 
-async def run_flashscore_offline_repredict(playwright: Playwright, custom_config: RuleConfig = None):
+# Worker processes for RuleEngine fan-out (0/1 = run in-process)
+OFFLINE_WORKERS = int(os.getenv("OFFLINE_WORKERS", str(os.cpu_count() or 1)))
+# Below this many fixtures, process start-up costs more than it saves
+MIN_FIXTURES_FOR_POOL = 200
+CHUNKS_PER_WORKER = 4
+IN_PROCESS_CHUNK = 50
+
+
+def _parse_date(d_str):
+    try:
+        return dt.strptime(d_str, "%d.%m.%Y")
+    except:
+        return dt.min
+
+
+def build_history_index(all_schedules: List[Dict]) -> Dict[str, Any]:
+    """
+    Indexes finished matches (newest first) once so each fixture resolves its
+    form and H2H in O(team matches) instead of scanning all history.
+    Returns {"by_team": {team: [mapped...]}, "by_pair": {(a, b): [mapped...]}}.
+    """
+    historical_matches = [m for m in all_schedules if m.get('match_status') != 'scheduled' and m.get('home_score') not in ('', 'N/A', None) and m.get('away_score') not in ('', 'N/A', None)]
+    historical_matches.sort(key=lambda x: _parse_date(x.get('date', '')), reverse=True)
+
+    by_team = defaultdict(list)
+    by_pair = defaultdict(list)
+    for hist in historical_matches:
+        h_home = hist.get('home_team')
+        h_away = hist.get('away_team')
+        hs = hist.get('home_score', '0')
+        ascore = hist.get('away_score', '0')
+        try:
+            hsi = int(hs)
+            asi = int(ascore)
+            winner = "Home" if hsi > asi else "Away" if asi > hsi else "Draw"
+        except:
+            winner = "Draw"
+
+        mapped_hist = {
+            "date": hist.get("date"),
+            "home": h_home,
+            "away": h_away,
+            "score": f"{hs}-{ascore}",
+            "winner": winner
+        }
+        for team in {h_home, h_away}:
+            by_team[team].append(mapped_hist)
+        by_pair[tuple(sorted((str(h_home), str(h_away))))].append(mapped_hist)
+
+    return {"by_team": by_team, "by_pair": by_pair}
+
+
+def _parse_standings(raw_standings: List[Dict]) -> List[Dict]:
+    standings_data = []
+    for s in raw_standings:
+        try:
+            standings_data.append({
+                "team_name": s.get("team_name"),
+                "position": int(s.get("position", 0)),
+                "goal_difference": int(s.get("goal_difference", 0)),
+                "goals_for": int(s.get("goals_for", 0)),
+                "goals_against": int(s.get("goals_against", 0))
+            })
+        except:
+            continue
+    return standings_data
+
+
+def _analyze_chunk(inputs: List[Dict], config: RuleConfig) -> List[Any]:
+    """Process-pool entry point: RuleEngine over a chunk; exceptions are returned, not raised."""
+    results = []
+    for analysis_input in inputs:
+        try:
+            results.append(RuleEngine.analyze(analysis_input, config=config))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+async def run_flashscore_offline_repredict(
+    playwright: Playwright,
+    custom_config: RuleConfig = None,
+    schedules: list = None,
+    cache: BacktestCache = None,
+    progress_cb=None,
+    cancel_event: asyncio.Event = None,
+    history_index: Dict[str, Any] = None,
+):
     """
     Offline reprediction mode: Uses stored CSV data.
     If custom_config is provided, runs in "Backtest Mode" and saves to a separate file.
+    A long-lived caller (Scripts/backtest_monitor.py) can pass preloaded schedules,
+    history index and cache, a progress_cb(done, total) and a cancel_event.
+    Returns the number of matches repredicted.
     """
     mode_label = "BACKTEST" if custom_config else "OFFLINE"
     print(f"\n   [{mode_label}] Starting reprediction engine...")
-    
-    all_schedules = get_all_schedules()
+
+    all_schedules = schedules if schedules is not None else get_all_schedules()
     if not all_schedules:
         print("    [Offline Error] No schedules found in database.")
-        return
+        return 0
 
     # Filter for scheduled matches
     scheduled_matches = [m for m in all_schedules if m.get('match_status') == 'scheduled']
-    
+
     now = dt.now(NIGERIA_TZ)
     threshold = now + timedelta(hours=1)
-    
+
     to_process = []
     for m in scheduled_matches:
         try:
@@ -41,7 +138,7 @@ async def run_flashscore_offline_repredict(playwright: Playwright, custom_config
             time_str = m.get('match_time')
             if not date_str or not time_str or time_str == 'N/A':
                 continue
-                
+
             match_dt = dt.strptime(f"{date_str} {time_str}", "%d.%m.%Y %H:%M").replace(tzinfo=NIGERIA_TZ)
             if match_dt > threshold:
                 to_process.append(m)
@@ -49,150 +146,178 @@ async def run_flashscore_offline_repredict(playwright: Playwright, custom_config
             continue
 
     print(f"    [Offline] Found {len(to_process)} future matches (> 1 hour away) to repredict.")
-    
+
     # In BACKTEST mode, we process ALL historical matches to check accuracy
     if custom_config:
         print(f"    [Backtest] Running on all historical matches...")
         to_process = [m for m in all_schedules if m.get('home_score') and m.get('away_score')]
     elif not to_process:
-        return
+        return 0
 
-    # Sort historical matches once
-    def parse_date(d_str):
-        try:
-            return dt.strptime(d_str, "%d.%m.%Y")
-        except:
-            return dt.min
-
-    historical_matches = [m for m in all_schedules if m.get('match_status') != 'scheduled' and m.get('home_score') not in ('', 'N/A', None) and m.get('away_score') not in ('', 'N/A', None)]
-    historical_matches.sort(key=lambda x: parse_date(x.get('date', '')), reverse=True)
+    # 1. Index history and standings once
+    index = history_index if history_index is not None else build_history_index(all_schedules)
+    by_team, by_pair = index["by_team"], index["by_pair"]
+    standings_by_league = {league: _parse_standings(rows) for league, rows in get_standings_by_league().items()}
 
     print(f"    [{mode_label}] Processing {len(to_process)} matches...")
 
-    total_repredicted = 0
+    # Backtest mode reuses results for fixtures whose inputs and relevant rules are unchanged
+    if not custom_config:
+        cache = None
+    elif cache is None:
+        cache = BacktestCache()
+    calibration_cache = {}
+
+    # 2. Build analysis inputs; resolve cache hits in-process
+    ready: List[Tuple[Dict, Dict]] = []          # (match, prediction)
+    pending: List[Tuple[Dict, Dict, str]] = []   # (match, analysis_input, data_version)
     for m in to_process:
         home_team = m.get('home_team')
         away_team = m.get('away_team')
         region_league = m.get('region_league', 'Unknown')
-        match_label = f"{home_team} vs {away_team}"
-
-        # 1. Build H2H Data
-        home_last_10 = []
-        away_last_10 = []
-        h2h_list = []
-        
-        for hist in historical_matches:
-            h_home = hist.get('home_team')
-            h_away = hist.get('away_team')
-            hs = hist.get('home_score', '0')
-            ascore = hist.get('away_score', '0')
-            try:
-                hsi = int(hs)
-                asi = int(ascore)
-                winner = "Home" if hsi > asi else "Away" if asi > hsi else "Draw"
-            except:
-                winner = "Draw"
-                
-            mapped_hist = {
-                "date": hist.get("date"),
-                "home": h_home,
-                "away": h_away,
-                "score": f"{hs}-{ascore}",
-                "winner": winner
-            }
 
-            if (h_home == home_team or h_away == home_team) and len(home_last_10) < 10:
-                home_last_10.append(mapped_hist)
-            if (h_home == away_team or h_away == away_team) and len(away_last_10) < 10:
-                away_last_10.append(mapped_hist)
-            if ((h_home == home_team and h_away == away_team) or (h_home == away_team and h_away == home_team)):
-                h2h_list.append(mapped_hist)
+        home_last_10 = by_team.get(home_team, [])[:10]
+        away_last_10 = by_team.get(away_team, [])[:10]
+
+        # Data Quality Validation
+        if len(home_last_10) < 3 or len(away_last_10) < 3:
+            continue
 
         h2h_data = {
             "home_team": home_team,
             "away_team": away_team,
             "home_last_10_matches": home_last_10,
             "away_last_10_matches": away_last_10,
-            "head_to_head": h2h_list,
+            "head_to_head": by_pair.get(tuple(sorted((str(home_team), str(away_team)))), []),
             "region_league": region_league
         }
+        analysis_input = {"h2h_data": h2h_data, "standings": standings_by_league.get(region_league, []),
+                          "match_date": m.get('date', '')}
 
-        # 2. Get Standings
-        raw_standings = get_standings(region_league)
-        standings_data = []
-        for s in raw_standings:
-            try:
-                standings_data.append({
-                    "team_name": s.get("team_name"),
-                    "position": int(s.get("position", 0)),
-                    "goal_difference": int(s.get("goal_difference", 0)),
-                    "goals_for": int(s.get("goals_for", 0)),
-                    "goals_against": int(s.get("goals_against", 0))
-                })
-            except:
+        data_version = None
+        if cache:
+            if region_league not in calibration_cache:
+                calibration_cache[region_league] = LearningEngine.load_weights(
+                    region_league, engine_id=custom_config.id
+                ).get("confidence_calibration", {})
+            data_version = BacktestCache.data_version(analysis_input)
+            cached = cache.get(custom_config, m.get('fixture_id'), data_version, calibration_cache[region_league])
+            if cached is not None:
+                ready.append((m, cached))
                 continue
+        pending.append((m, analysis_input, data_version))
 
-        # 3. Data Quality Validation
-        if len(home_last_10) < 3 or len(away_last_10) < 3:
-            continue
+    total = len(ready) + len(pending)
+    if cache:
+        print(f"    [Backtest] Cache: {len(ready)} hits, {len(pending)} to compute.")
 
-        # 4. Predict
-        analysis_input = {"h2h_data": h2h_data, "standings": standings_data}
+    # 3. Fan RuleEngine out across worker processes in chunks
+    workers = OFFLINE_WORKERS if len(pending) >= MIN_FIXTURES_FOR_POOL else 1
+    chunk_size = max(1, -(-len(pending) // (workers * CHUNKS_PER_WORKER))) if workers > 1 else IN_PROCESS_CHUNK
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    done = len(ready)
+    cancelled = False
+
+    def collect(chunk, results):
+        nonlocal done
+        for (m, _, data_version), prediction in zip(chunk, results):
+            if isinstance(prediction, Exception):
+                print(f"      [Offline Error] Failed predicting {m.get('home_team')} vs {m.get('away_team')}: {prediction}")
+                continue
+            if cache:
+                cache.put(custom_config, m.get('fixture_id'), data_version, prediction)
+            ready.append((m, prediction))
+        done += len(chunk)
+        if progress_cb:
+            progress_cb(done, total)
+
+    if workers > 1:
+        print(f"    [{mode_label}] Fanning {len(pending)} fixtures across {workers} workers...")
+        loop = asyncio.get_running_loop()
+        executor = ProcessPoolExecutor(max_workers=workers)
         try:
-            prediction = RuleEngine.analyze(analysis_input, config=custom_config)
-            
-            if prediction.get("type", "SKIP") != "SKIP":
-                match_data_for_save = m.copy()
-                match_data_for_save['id'] = m.get('fixture_id')
-                match_data_for_save['time'] = m.get('match_time')
-                
-                if custom_config:
-                    # Save to custom CSV
-                    _save_custom_prediction(match_data_for_save, prediction, custom_config.name)
-                else:
-                    save_prediction(match_data_for_save, prediction)
-
-                total_repredicted += 1
-                if total_repredicted % 50 == 0:
-                    print(f"    [{mode_label}] Processed {total_repredicted} matches...")
-        except Exception as e:
-            print(f"      [Offline Error] Failed predicting {match_label}: {e}")
+            futures = {
+                loop.run_in_executor(executor, _analyze_chunk, [p[1] for p in chunk], custom_config): chunk
+                for chunk in chunks
+            }
+            remaining = set(futures)
+            while remaining:
+                finished, remaining = await asyncio.wait(remaining, timeout=1.0, return_when=asyncio.FIRST_COMPLETED)
+                for fut in finished:
+                    collect(futures[fut], fut.result())
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    for fut in remaining:
+                        fut.cancel()
+                    break
+        finally:
+            executor.shutdown(wait=not cancelled, cancel_futures=True)
+    else:
+        for chunk in chunks:
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                break
+            collect(chunk, _analyze_chunk([p[1] for p in chunk], custom_config))
+            await asyncio.sleep(0)  # let the caller's event loop serve status/cancel requests
+
+    if cancelled:
+        print(f"    [{mode_label}] Cancelled after {done}/{total} matches.")
+    if cache:
+        cache.save()
+        print(f"    [Backtest] Cache: {cache.summary()}")
+
+    # 4. Persist everything in one write
+    to_save = []
+    for m, prediction in ready:
+        if prediction.get("type", "SKIP") == "SKIP":
+            continue
+        match_data_for_save = m.copy()
+        match_data_for_save['id'] = m.get('fixture_id')
+        match_data_for_save['time'] = m.get('match_time')
+        to_save.append((match_data_for_save, prediction))
 
+    if custom_config:
+        _save_custom_predictions(to_save, custom_config.name)
+    else:
+        rows = await asyncio.to_thread(save_predictions_batch, to_save)
+        sync = SyncManager()
+        if sync.supabase and rows:
+            print(f"    [Cloud] Upserting {len(rows)} predictions...")
+            await sync.batch_upsert('predictions', rows)
+
+    total_repredicted = len(to_save)
     print(f"\n--- {mode_label} Complete: {total_repredicted} matches processed. ---")
-    
+
     if not custom_config:
         print("\n   [Auto] Generating betting recommendations after offline update...")
         get_recommendations(save_to_file=True)
 
-def _save_custom_prediction(match_data, prediction, config_name):
-    """Saves backtest results to a separate CSV."""
+    return total_repredicted
+
+def _save_custom_predictions(items, config_name):
+    """Saves backtest results to a separate CSV (single append for the whole run)."""
+    if not items:
+        return
     # Use consistent Data/Store path
     filename = f"Data/Store/predictions_custom_{config_name}.csv"
     os.makedirs("Data/Store", exist_ok=True)
-    
-    # Determine correctness if actual score exists
-    actual_score = f"{match_data.get('home_score')}-{match_data.get('away_score')}"
-    is_correct = "N/A"
-    
-    # Simple check for now (can expand to use evaluate_prediction)
-    if "win" in prediction['market_prediction'].lower():
-        # Implementation of simple check
-        pass
-        
-    row = {
-        'fixture_id': match_data.get('fixture_id'),
-        'date': match_data.get('date'),
-        'home_team': match_data.get('home_team'),
-        'away_team': match_data.get('away_team'),
-        'prediction': prediction['market_prediction'],
-        'confidence': prediction['confidence'],
-        'actual_score': actual_score,
-        'config_name': config_name
-    }
-    
+
+    rows = []
+    for match_data, prediction in items:
+        rows.append({
+            'fixture_id': match_data.get('fixture_id'),
+            'date': match_data.get('date'),
+            'home_team': match_data.get('home_team'),
+            'away_team': match_data.get('away_team'),
+            'prediction': prediction['market_prediction'],
+            'confidence': prediction['confidence'],
+            'actual_score': f"{match_data.get('home_score')}-{match_data.get('away_score')}",
+            'config_name': config_name
+        })
+
     file_exists = os.path.exists(filename)
     with open(filename, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=row.keys())
+        writer = csv.DictWriter(f, fieldnames=rows[0].keys())
         if not file_exists:
             writer.writeheader()
-        writer.writerow(row)
+        writer.writerows(rows)
@@ -0,0 +1,182 @@
+# fs_pipeline.py: Staged extraction -> prediction -> persistence pipeline for match analysis.
+# Part of LeoBook Modules — Flashscore
+#
+# Classes: AnalysisPipeline
+# Called by: manager.py (run_flashscore_analysis)
+
+"""
+Analysis Pipeline
+Three stages connected by bounded asyncio queues, so each runs at its own pace and
+throughput is capped by the slowest one instead of by the sum of all three:
+  1. extract:  BatchProcessor workers (browser/HTTP, I/O bound) run collect_match_data()
+               with store writes deferred, so a browser slot never waits on disk.
+  2. predict:  predict_match() in a process pool (RuleEngine is CPU bound).
+  3. persist:  one writer that applies the deferred writes and save_predictions_batch()
+               in batches on a worker thread, and runs the cloud sync at most every
+               PIPELINE_SYNC_INTERVAL_S seconds (plus once at the end).
+A full queue blocks the stage before it (backpressure), never drops work.
+A failed batch write or sync is logged and the run continues; the batch's fixtures
+are reported in `failed` so they are retried next cycle. Should a downstream stage
+still die, the stages feeding it are cancelled instead of blocking on its queue.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+from Data.Access.db_helpers import save_predictions_batch
+from Data.Access.sync_manager import run_full_sync
+from Core.Utils.utils import BatchProcessor
+from .fs_processor import collect_match_data, predict_match
+
+QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "20"))
+PREDICT_WORKERS = max(1, int(os.getenv("PIPELINE_PREDICT_WORKERS", "2")))
+WRITE_BATCH_SIZE = int(os.getenv("PIPELINE_WRITE_BATCH", "25"))
+WRITE_FLUSH_SECONDS = float(os.getenv("PIPELINE_WRITE_FLUSH_S", "5"))
+SYNC_INTERVAL = float(os.getenv("PIPELINE_SYNC_INTERVAL_S", "300"))
+
+_DONE = object()  # End-of-stream marker between stages
+
+
+def _label(match_data: Dict[str, Any]) -> str:
+    return f"{match_data.get('home_team', 'unknown')}_vs_{match_data.get('away_team', 'unknown')}"
+
+
+class AnalysisPipeline:
+    """Runs a list of fixtures through extract -> predict -> persist; returns stage counters."""
+
+    def __init__(self, processor: BatchProcessor):
+        self.processor = processor
+        self.predict_queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.persist_queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.stats = {"extracted": 0, "skipped": 0, "predicted": 0, "signals": 0, "written": 0, "syncs": 0}
+        self.failed: List[Dict[str, Any]] = []  # Extraction errors/timeouts or unsaved batches (retried next cycle)
+
+    # ── Stage 1: extract ─────────────────────────────
+
+    async def _extract(self, match_data: Dict[str, Any], page=None):
+        writes: List = []
+        collected = await collect_match_data(match_data, page=page, defer=writes)
+        if collected is not None:
+            self.stats["extracted"] += 1
+        elif match_data.get('_skipped'):
+            self.stats["skipped"] += 1  # Data-quality skip: analysed, nothing to retry
+        else:
+            self.failed.append(match_data)
+        # Failed/skipped matches still carry writes (e.g. H2H history) for the writer
+        await self.predict_queue.put((match_data, collected, writes))
+
+    # ── Stage 2: predict ─────────────────────────────
+
+    async def _predict(self, executor: ProcessPoolExecutor):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self.predict_queue.get()
+            if item is _DONE:
+                return
+            match_data, collected, writes = item
+            prediction = None
+            if collected is not None:
+                try:
+                    prediction = await loop.run_in_executor(executor, predict_match, _label(match_data), *collected)
+                    self.stats["predicted"] += 1
+                except Exception as e:
+                    print(f"      [Pipeline] Prediction failed for {_label(match_data)}: {e}")
+            await self.persist_queue.put((match_data, prediction, writes))
+
+    # ── Stage 3: persist ─────────────────────────────
+
+    @staticmethod
+    def _write_batch(batch: List) -> int:
+        """
+        Worker thread: deferred extraction writes, then one predictions upsert. Returns signals saved.
+        Each store write takes STORE_WRITE_LOCK for its own read-modify-write only, so the live
+        streamer's writes interleave between them instead of waiting out the whole batch.
+        """
+        signals = []
+        for match_data, prediction, writes in batch:
+            for func, args in writes:
+                try:
+                    func(*args)
+                except Exception as e:
+                    print(f"      [Pipeline] {func.__name__} failed for {_label(match_data)}: {e}")
+            if prediction and prediction.get("type", "SKIP") != "SKIP":
+                signals.append((match_data, prediction))
+        save_predictions_batch(signals)
+        return len(signals)
+
+    async def _persist(self):
+        batch: List = []
+        unsynced = 0
+        last_sync = time.monotonic()
+        while True:
+            try:
+                timeout = WRITE_FLUSH_SECONDS if batch else None
+                item = await asyncio.wait_for(self.persist_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None  # Quiet period: flush what we have
+            done = item is _DONE
+            if item is not None and not done:
+                batch.append(item)
+
+            if batch and (done or item is None or len(batch) >= WRITE_BATCH_SIZE):
+                try:
+                    saved = await asyncio.to_thread(self._write_batch, batch)
+                    self.stats["written"] += len(batch)
+                    self.stats["signals"] += saved
+                    unsynced += saved
+                except Exception as e:
+                    print(f"      [Pipeline] Batch write of {len(batch)} matches failed: {e}")
+                    self.failed.extend(match_data for match_data, _, _ in batch)
+                batch = []
+
+            if unsynced and (done or time.monotonic() - last_sync >= SYNC_INTERVAL):
+                print(f"\n   [Analytics Sync] {self.stats['signals']} predictions generated. Triggering sync...")
+                try:
+                    await run_full_sync()
+                    self.stats["syncs"] += 1
+                    unsynced = 0
+                except Exception as e:
+                    print(f"      [Pipeline] Sync failed (retried at the next interval): {e}")
+                last_sync = time.monotonic()
+            if done:
+                return
+
+    # ── Orchestration ────────────────────────────────
+
+    @staticmethod
+    async def _guard(awaitable, stages: List[asyncio.Task]):
+        """Await awaitable, failing fast if one of the downstream stages dies (its queue would never drain)."""
+        task = asyncio.ensure_future(awaitable)
+        watched = set(stages)
+        while not task.done():
+            done, _ = await asyncio.wait({task} | watched, return_when=asyncio.FIRST_COMPLETED)
+            for stage in done - {task}:
+                watched.discard(stage)
+                if stage.cancelled() or stage.exception() is not None:
+                    task.cancel()
+                    print("      [Pipeline] A downstream stage stopped; aborting the run.")
+                    stage.result()  # Re-raises the stage's error
+        return task.result()
+
+    async def _feed(self, matches: List[Dict[str, Any]], predictors: int):
+        await self.processor.run_batch(matches, self._extract)
+        for _ in range(predictors):
+            await self.predict_queue.put(_DONE)
+
+    async def run(self, matches: List[Dict[str, Any]]) -> Dict[str, int]:
+        with ProcessPoolExecutor(max_workers=PREDICT_WORKERS) as executor:
+            predictors = [asyncio.create_task(self._predict(executor)) for _ in range(PREDICT_WORKERS)]
+            writer = asyncio.create_task(self._persist())
+            try:
+                await self._guard(self._feed(matches, len(predictors)), predictors + [writer])
+                await self._guard(asyncio.gather(*predictors), [writer])
+                await self._guard(self.persist_queue.put(_DONE), [writer])
+                await writer
+            finally:
+                for task in predictors + [writer]:
+                    task.cancel()
+        print(f"    [Pipeline] {self.stats}")
+        return self.stats
@@ -1,16 +1,19 @@
 # fs_processor.py: fs_processor.py: Match processing and prediction generation flow.
 # Part of LeoBook Modules — Flashscore
 #
-# Functions: strip_league_stage(), process_match_task()
+# Functions: strip_league_stage(), setup_match_context(), collect_match_data(), predict_match(), process_match_task() (+5 more)
 
-import asyncio
-from playwright.async_api import Browser
+from typing import Callable, Optional, Tuple
+from playwright.async_api import Browser, BrowserContext, Page
 from Data.Access.db_helpers import save_prediction, save_region_league_entry, save_standings, save_team_entry
 from Core.Browser.site_helpers import fs_universal_popup_dismissal
+from Core.Browser.resource_router import apply_resource_policy
+from Core.Browser.waits import wait_for_dom_quiet
 from Core.Browser.Extractors.h2h_extractor import extract_h2h_data, activate_h2h_tab, save_extracted_h2h_to_schedules
 from Core.Browser.Extractors.standings_extractor import extract_standings_data, activate_standings_tab
 from Core.Utils.monitor import PageMonitor
 from Core.Utils.utils import log_error_state
+from Core.Utils.concurrency import report_outcome
 import re
 
 def strip_league_stage(league_name: str):
@@ -26,228 +29,333 @@ def strip_league_stage(league_name: str):
 from Core.Utils.constants import NAVIGATION_TIMEOUT, WAIT_FOR_LOAD_STATE_TIMEOUT
 from Core.Intelligence.model import RuleEngine
 from .fs_utils import retry_extraction
+from .fs_http import HTTP_FETCH_ENABLED, fetch_h2h_data
+from .fs_cache import extraction_cache
 
-async def process_match_task(match_data: dict, browser: Browser):
+MATCH_CONTEXT_OPTIONS = {
+    "user_agent": (
+        "Mozilla/5.0 (Linux; Android 10; SM-G973F) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/91.0.4472.124 Mobile Safari/537.36"
+    ),
+    "viewport": {'width': 450, 'height': 900},
+    "timezone_id": "Africa/Lagos",
+}
+
+
+async def setup_match_context(context: BrowserContext):
+    """Per-context setup shared by one-off contexts and the PagePool in manager.py."""
+    await apply_resource_policy(context, "fs_processor")
+
+
+def _store(defer: Optional[list], func: Callable, *args):
+    """Run a store write now, or queue it on defer for the pipeline's writer stage."""
+    if defer is None:
+        func(*args)
+    else:
+        defer.append((func, args))
+
+
+def _has_enough_form(h2h_data: dict, match_label: str) -> bool:
+    """Both teams need at least 3 recent matches for a prediction."""
+    home_form_count = len(h2h_data.get("home_last_10_matches", []))
+    away_form_count = len(h2h_data.get("away_last_10_matches", []))
+    if home_form_count < 3 or away_form_count < 3:
+        print(f"      [Data Quality] Skipped {match_label}: Insufficient form data (Home: {home_form_count}, Away: {away_form_count})")
+        return False
+    return True
+
+
+async def _extract_h2h_tab(page: Page, match_data: dict, match_label: str, defer: Optional[list]) -> dict:
+    """H2H tab: both teams' form and the mutual H2H ({} when the tab fails)."""
+    # --- H2H Tab & Expansion (Mobile Optimized) ---
+    h2h_data = {}
+    if await activate_h2h_tab(page):
+        try:
+            # Sections: Home Last 5/10, Away Last 5/10, Mutual H2H.
+            # "Show more" is clicked twice per section (~15 matches) inside the extraction evaluate.
+            print("    [H2H Expansion] Expanding sections for deep analysis...")
+            h2h_data = await retry_extraction(extract_h2h_data, page, match_data['home_team'], match_data['away_team'],
+                                              "fs_h2h_tab", expand_rounds=2)
+
+            h2h_count = len(h2h_data.get("home_last_10_matches", [])) + len(h2h_data.get("away_last_10_matches", [])) + len(h2h_data.get("head_to_head", []))
+            print(f"      [OK H2H] H2H tab data extracted for {match_label} ({h2h_count} matches found)")
+
+            _store(defer, save_extracted_h2h_to_schedules, h2h_data)
+
+        except Exception as e:
+            print(f"      [Warning] Failed to fully load/expand H2H tab for {match_label}: {e}")
+    else:
+        print(f"      [Warning] H2H tab inaccessible for {match_label}")
+
+    return h2h_data
+
+
+async def _extract_standings_tab(page: Page, h2h_data: dict, match_label: str,
+                                 defer: Optional[list]) -> Optional[list]:
+    """Standings tab: table rows, saved to standings.csv ([] for cups/draw tables, None on failure)."""
+    # --- Standings Tab ---
+    standings_data = []
+    standings_league = "Unknown"
+    
+    if await activate_standings_tab(page):
+        try:
+            standings_result = await retry_extraction(extract_standings_data, page)
+            standings_data = standings_result.get("standings", [])
+            standings_league = standings_result.get("region_league", "Unknown")
+            if standings_league == "Unknown":
+                standings_league = h2h_data.get("region_league", "Unknown")
+            standings_league_url = standings_result.get("league_url", "")
+            if standings_result.get("has_draw_table"):
+                print(f"      [Graceful Skip] Match has Draw table (Cup/Tournament). Proceeding without standings.")
+                # We don't return False here, allowing H2H-only prediction
+            if standings_data and standings_league != "Unknown":
+                for row in standings_data:
+                    row['url'] = standings_league_url
+                _store(defer, save_standings, standings_data, standings_league)
+                print(f"      [OK Standing] Standings tab data extracted for {standings_league}")
+            ## Phase 5: League Stage Parsing Fix
+            # - [x] Update `db_helpers.py` headers for `league_stage`
+            # - [x] Update `enrich_all_schedules.py`
+            ## Phase 8: Draw Tab Skip Logic
+            # - [x] Implement graceful standings skip in `fs_processor.py`
+        except Exception as e:
+            print(f"      [Warning] Failed to load Standings tab for {match_label}: {e}")
+            return None
+
+    return standings_data
+
+
+async def _collect_with_browser(page: Page, match_data: dict, match_label: str, h2h_data: Optional[dict] = None,
+                                standings_data: Optional[list] = None,
+                                defer: Optional[list] = None) -> Optional[Tuple[dict, Optional[list]]]:
     """
-    Worker function to process a single match in a new page/context.
+    Navigate the match page and extract (h2h_data, standings), skipping tabs whose data was
+    passed in (cached); None when form data is insufficient.
     """
-    context = await browser.new_context(
-        user_agent=(
-            "Mozilla/5.0 (Linux; Android 10; SM-G973F) AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/91.0.4472.124 Mobile Safari/537.36"
-        ),
-        viewport={'width': 450, 'height': 900},
-        timezone_id="Africa/Lagos"
-    )
-    page = await context.new_page()
-    PageMonitor.attach_listeners(page)
-    match_label = f"{match_data.get('home_team', 'unknown')}_vs_{match_data.get('away_team', 'unknown')}"
+    full_match_url = f"{match_data['match_link']}"
+    await page.goto(full_match_url, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT)
+    await wait_for_dom_quiet(page)
 
-    try:
-        print(f"    [Batch Start] {match_data['home_team']} vs {match_data['away_team']}")
+    await fs_universal_popup_dismissal(page, "fs_match_page")
+    await page.wait_for_load_state("domcontentloaded", timeout=WAIT_FOR_LOAD_STATE_TIMEOUT)
+    
+    if h2h_data is None:
+        h2h_data = await _extract_h2h_tab(page, match_data, match_label, defer)
 
-        full_match_url = f"{match_data['match_link']}"
-        await page.goto(full_match_url, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT)
-        await asyncio.sleep(2.0)
+    # --- Data Quality Validation ---
+    if not _has_enough_form(h2h_data, match_label):
+        match_data['_skipped'] = 'insufficient_form'
+        return None
 
-        await fs_universal_popup_dismissal(page, "fs_match_page")
-        await page.wait_for_load_state("domcontentloaded", timeout=WAIT_FOR_LOAD_STATE_TIMEOUT)
+    if standings_data is None:
+        standings_data = await _extract_standings_tab(page, h2h_data, match_label, defer)
+
+    # --- Meta Data Extraction (Leagues & Teams) ---
+    try:
+        from Core.Intelligence.selector_manager import SelectorManager
         
-        # --- H2H Tab & Expansion (Mobile Optimized) ---
-        h2h_data = {}
-        if await activate_h2h_tab(page):
-            try:
-                # Sections: Home Last 5/10, Away Last 5/10, Mutual H2H
-                show_more_selector = ".h2h__section .h2h__showMore"
-                
-                print("    [H2H Expansion] Expanding sections for deep analysis...")
-                for _ in range(2): # Click twice for each to get ~15 matches
-                    buttons = page.locator(show_more_selector)
-                    btn_count = await buttons.count()
-                    for j in range(btn_count):
-                        try:
-                            btn = buttons.nth(j)
-                            if await btn.is_visible():
-                                await btn.click(timeout=5000)
-                                await asyncio.sleep(1.0)
-                        except:
-                            continue
-                
-                await asyncio.sleep(1.5)
-                h2h_data = await retry_extraction(extract_h2h_data, page, match_data['home_team'], match_data['away_team'], "fs_h2h_tab")
-
-                h2h_count = len(h2h_data.get("home_last_10_matches", [])) + len(h2h_data.get("away_last_10_matches", [])) + len(h2h_data.get("head_to_head", []))
-                print(f"      [OK H2H] H2H tab data extracted for {match_label} ({h2h_count} matches found)")
-
-                await save_extracted_h2h_to_schedules(h2h_data)
-
-            except Exception as e:
-                print(f"      [Warning] Failed to fully load/expand H2H tab for {match_label}: {e}")
-        else:
-            print(f"      [Warning] H2H tab inaccessible for {match_label}")
-
-        # --- Data Quality Validation ---
-        home_form_count = len(h2h_data.get("home_last_10_matches", []))
-        away_form_count = len(h2h_data.get("away_last_10_matches", []))
+        sel_region_name = await SelectorManager.get_selector_auto(page, "fs_match_page", "region_name")
+        sel_region_flag = await SelectorManager.get_selector_auto(page, "fs_match_page", "region_flag_img")
+        sel_league_url = await SelectorManager.get_selector_auto(page, "fs_match_page", "league_url")
+        sel_region_url = await SelectorManager.get_selector_auto(page, "fs_match_page", "region_url")
         
-        if home_form_count < 3 or away_form_count < 3:
-            print(f"      [Data Quality] Skipped {match_label}: Insufficient form data (Home: {home_form_count}, Away: {away_form_count})")
-            return False
+        sel_home_crest = await SelectorManager.get_selector_auto(page, "fs_match_page", "home_crest")
+        sel_home_url = await SelectorManager.get_selector_auto(page, "fs_match_page", "home_url")
+        sel_away_crest = await SelectorManager.get_selector_auto(page, "fs_match_page", "away_crest")
+        sel_away_url = await SelectorManager.get_selector_auto(page, "fs_match_page", "away_url")
 
-        # --- Standings Tab ---
-        standings_data = []
-        standings_league = "Unknown"
+        region_name = await page.locator(sel_region_name).inner_text() if sel_region_name else "Unknown"
+        region_flag = await page.locator(sel_region_flag).get_attribute("src") if sel_region_flag else ""
+        region_url = await page.locator(sel_region_url).get_attribute("href") if sel_region_url else ""
+        league_url = await page.locator(sel_league_url).get_attribute("href") if sel_league_url else ""
+        league_name = await page.locator(sel_league_url).inner_text() if sel_league_url else "Unknown"
         
-        if await activate_standings_tab(page):
-            try:
-                standings_result = await retry_extraction(extract_standings_data, page)
-                standings_data = standings_result.get("standings", [])
-                standings_league = standings_result.get("region_league", "Unknown")
-                if standings_league == "Unknown":
-                    standings_league = h2h_data.get("region_league", "Unknown")
-                standings_league_url = standings_result.get("league_url", "")
-                if standings_result.get("has_draw_table"):
-                    print(f"      [Graceful Skip] Match has Draw table (Cup/Tournament). Proceeding without standings.")
-                    # We don't return False here, allowing H2H-only prediction
-                if standings_data and standings_league != "Unknown":
-                    for row in standings_data:
-                        row['url'] = standings_league_url
-                    save_standings(standings_data, standings_league)
-                    print(f"      [OK Standing] Standings tab data extracted for {standings_league}")
-                ## Phase 5: League Stage Parsing Fix
-                # - [x] Update `db_helpers.py` headers for `league_stage`
-                # - [x] Update `enrich_all_schedules.py`
-                ## Phase 8: Draw Tab Skip Logic
-                # - [x] Implement graceful standings skip in `fs_processor.py`
-            except Exception as e:
-                print(f"      [Warning] Failed to load Standings tab for {match_label}: {e}")
-
-        # --- Meta Data Extraction (Leagues & Teams) ---
-        try:
-            from Core.Intelligence.selector_manager import SelectorManager
-            
-            sel_region_name = await SelectorManager.get_selector_auto(page, "fs_match_page", "region_name")
-            sel_region_flag = await SelectorManager.get_selector_auto(page, "fs_match_page", "region_flag_img")
-            sel_league_url = await SelectorManager.get_selector_auto(page, "fs_match_page", "league_url")
-            sel_region_url = await SelectorManager.get_selector_auto(page, "fs_match_page", "region_url")
-            
-            sel_home_crest = await SelectorManager.get_selector_auto(page, "fs_match_page", "home_crest")
-            sel_home_url = await SelectorManager.get_selector_auto(page, "fs_match_page", "home_url")
-            sel_away_crest = await SelectorManager.get_selector_auto(page, "fs_match_page", "away_crest")
-            sel_away_url = await SelectorManager.get_selector_auto(page, "fs_match_page", "away_url")
-
-            region_name = await page.locator(sel_region_name).inner_text() if sel_region_name else "Unknown"
-            region_flag = await page.locator(sel_region_flag).get_attribute("src") if sel_region_flag else ""
-            region_url = await page.locator(sel_region_url).get_attribute("href") if sel_region_url else ""
-            league_url = await page.locator(sel_league_url).get_attribute("href") if sel_league_url else ""
-            league_name = await page.locator(sel_league_url).inner_text() if sel_league_url else "Unknown"
-            
-            # Extract rl_id from league URL fragment (e.g. #/ldxRUZwe)
-            # Or from page source if URL is generic
-            rl_id = ""
-            if league_url and "#/" in league_url:
-                rl_id = league_url.split("#/")[-1]
-            
-            if not rl_id:
-                # Fallback: look for tournamentId in page source
-                content = await page.content()
-                import re
-                match = re.search(r"tournamentId[:\s]+'([^']+)'", content)
-                if match:
-                    rl_id = match.group(1)
-            
-            if not rl_id:
-                rl_id = f"{region_name}_{league_name}".replace(' ', '_').replace('-', '_').upper()
-            
-            # --- LEAGUE STAGE PARSING ---
-            clean_league, stage = strip_league_stage(league_name)
-            match_data['region_league'] = f"{region_name.upper()} - {clean_league}"
-            match_data['league_stage'] = stage
-            match_data['league_id'] = rl_id
-            
-            save_region_league_entry({
-                'rl_id': rl_id,
-                'region': region_name,
-                'region_flag': region_flag,
-                'region_url': region_url,
-                'league': league_name,
-                'league_url': league_url
-            })
-
-            # Home Team
-            save_team_entry({
-                'team_id': match_data.get('home_team_id'),
-                'team_name': match_data.get('home_team'),
-                'rl_ids': rl_id,
-                'team_crest': await page.locator(sel_home_crest).get_attribute("src") if sel_home_crest else "",
-                'team_url': await page.locator(sel_home_url).get_attribute("href") if sel_home_url else ""
-            })
-
-            # Away Team
-            save_team_entry({
-                'team_id': match_data.get('away_team_id'),
-                'team_name': match_data.get('away_team'),
-                'rl_ids': rl_id,
-                'team_crest': await page.locator(sel_away_crest).get_attribute("src") if sel_away_crest else "",
-                'team_url': await page.locator(sel_away_url).get_attribute("href") if sel_away_url else ""
-            })
-        except Exception as e:
-            print(f"      [Warning] Failed to extract expanded metadata for {match_label}: {e}")
+        # Extract rl_id from league URL fragment (e.g. #/ldxRUZwe)
+        # Or from page source if URL is generic
+        rl_id = ""
+        if league_url and "#/" in league_url:
+            rl_id = league_url.split("#/")[-1]
+        
+        if not rl_id:
+            # Fallback: look for tournamentId in page source
+            content = await page.content()
+            import re
+            match = re.search(r"tournamentId[:\s]+'([^']+)'", content)
+            if match:
+                rl_id = match.group(1)
+        
+        if not rl_id:
+            rl_id = f"{region_name}_{league_name}".replace(' ', '_').replace('-', '_').upper()
+        
+        # --- LEAGUE STAGE PARSING ---
+        clean_league, stage = strip_league_stage(league_name)
+        match_data['region_league'] = f"{region_name.upper()} - {clean_league}"
+        match_data['league_stage'] = stage
+        match_data['league_id'] = rl_id
+        
+        _store(defer, save_region_league_entry, {
+            'rl_id': rl_id,
+            'region': region_name,
+            'region_flag': region_flag,
+            'region_url': region_url,
+            'league': league_name,
+            'league_url': league_url
+        })
 
-        # --- Process Data & Predict ---
-        analysis_input = {"h2h_data": h2h_data, "standings": standings_data}
-        prediction = RuleEngine.analyze(analysis_input)
+        # Home Team
+        _store(defer, save_team_entry, {
+            'team_id': match_data.get('home_team_id'),
+            'team_name': match_data.get('home_team'),
+            'rl_ids': rl_id,
+            'team_crest': await page.locator(sel_home_crest).get_attribute("src") if sel_home_crest else "",
+            'team_url': await page.locator(sel_home_url).get_attribute("href") if sel_home_url else ""
+        })
 
-        # Record Reference Data for Offline Review & Debugging
-        h2h_ids = []
-        if h2h_data:
-            for m in h2h_data.get('head_to_head', []):
-                if m.get('fixture_id'): h2h_ids.append(m['fixture_id'])
-        
-        home_form_ids = []
-        away_form_ids = []
-        if h2h_data:
-            for m in h2h_data.get('home_last_10_matches', []):
-                if m.get('fixture_id'): home_form_ids.append(m['fixture_id'])
-            for m in h2h_data.get('away_last_10_matches', []):
-                if m.get('fixture_id'): away_form_ids.append(m['fixture_id'])
-
-        prediction['h2h_fixture_ids'] = h2h_ids
-        prediction['form_fixture_ids'] = home_form_ids + away_form_ids
-        prediction['standings_snapshot'] = standings_data if standings_data else []
-
-        total_xg = prediction.get("total_xg", 0.0)
-        p_type = prediction.get("type", "SKIP")
-
-        # Rule Engine Logic Gate: Prioritize Over markets if Avg Goals > 1.8
-        # We also verify if a prediction was skipped despite high xG
-        if total_xg > 1.8 and p_type == "SKIP":
-            print(f"      [xG Signal] High Avg Goals ({total_xg}) detected. Categorizing as OVER 1.5 fallback.")
-            prediction.update({
-                "type": "OVER 1.5",
-                "market_prediction": "OVER 1.5",
-                "confidence": "Medium",
-                "reason": [f"High Avg Goals ({total_xg}) logic gate met"]
-            })
-            p_type = "OVER 1.5"
-
-        if p_type != "SKIP":
-            # Verification: If Avg Goals is too low, downgrade confidence
-            if total_xg < 1.4 and prediction.get("confidence") == "High":
-                prediction["confidence"] = "Medium"
-                prediction["reason"].append(f"Confidence adjusted for low Avg Goals ({total_xg})")
-
-            save_prediction(match_data, prediction)
-            print(f"            [OK Signal] {match_label} (Type: {p_type}, xG: {total_xg})")
-            return True
-        else:
-            print(f"      [NO Signal] {match_label} (xG: {total_xg})")
-            return False
+        # Away Team
+        _store(defer, save_team_entry, {
+            'team_id': match_data.get('away_team_id'),
+            'team_name': match_data.get('away_team'),
+            'rl_ids': rl_id,
+            'team_crest': await page.locator(sel_away_crest).get_attribute("src") if sel_away_crest else "",
+            'team_url': await page.locator(sel_away_url).get_attribute("href") if sel_away_url else ""
+        })
+    except Exception as e:
+        print(f"      [Warning] Failed to extract expanded metadata for {match_label}: {e}")
+
+    return h2h_data, standings_data
+
+
+async def collect_match_data(match_data: dict, browser: Optional[Browser] = None, page: Optional[Page] = None,
+                             defer: Optional[list] = None) -> Optional[Tuple[dict, list]]:
+    """
+    Extraction stage: (h2h_data, standings) for one match, or None (failure or too little form;
+    a data-quality skip also sets match_data['_skipped'], so callers can tell it from a failure).
+    Form/H2H and standings come from the extraction cache (fs_cache) when valid, then
+    (FS_HTTP_FETCH=1) from the H2H feed (fs_http); the page only scrapes what is still
+    missing. Uses the warm page handed out by BatchProcessor's PagePool, or a new
+    page/context when called without one. With defer, store writes are queued there
+    instead of run (see fs_pipeline).
+    """
+    context = None
+    match_label = f"{match_data.get('home_team', 'unknown')}_vs_{match_data.get('away_team', 'unknown')}"
+
+    try:
+        print(f"    [Batch Start] {match_data['home_team']} vs {match_data['away_team']}")
+
+        # Cached form/standings first, then the H2H feed (only useful once standings are known)
+        keys = extraction_cache.keys_for(match_data)
+        h2h_data = extraction_cache.get_h2h(keys)
+        standings_data = extraction_cache.get_standings(keys)
+        if h2h_data is not None:
+            match_data.update({k: v for k, v in h2h_data.pop("meta").items() if v})
+            print(f"      [Cache] H2H/form reused for {match_label}")
+        elif HTTP_FETCH_ENABLED and standings_data is not None:
+            h2h_data = await fetch_h2h_data(match_data)
+            if h2h_data is not None:
+                print(f"      [HTTP] H2H feed used for {match_label} (no browser)")
+                _store(defer, save_extracted_h2h_to_schedules, h2h_data)
+                extraction_cache.put_h2h(keys, h2h_data, match_data)
+
+        if h2h_data is None or standings_data is None:
+            if page is None:
+                context = await browser.new_context(**MATCH_CONTEXT_OPTIONS)
+                await setup_match_context(context)
+                page = await context.new_page()
+                PageMonitor.attach_listeners(page)
+            scrape_h2h, scrape_standings = h2h_data is None, standings_data is None
+            collected = await _collect_with_browser(page, match_data, match_label, h2h_data, standings_data, defer)
+            if collected is None:
+                return None
+            h2h_data, standings_data = collected
+            if scrape_h2h:
+                extraction_cache.put_h2h(keys, h2h_data, match_data)
+            if scrape_standings and standings_data is not None:
+                extraction_cache.put_standings(keys, standings_data)
+            standings_data = standings_data or []
+        elif not _has_enough_form(h2h_data, match_label):
+            match_data['_skipped'] = 'insufficient_form'
+            return None
+
+        return h2h_data, standings_data
 
     except Exception as e:
         print(f"      [Error] Match failed {match_label}: {e}")
-        await log_error_state(page, f"process_match_task_{match_label}", e)
-        return False
+        report_outcome(e)
+        if page is not None:
+            await log_error_state(page, f"process_match_task_{match_label}", e)
+        return None
     finally:
-        await asyncio.sleep(1.0)
-        await context.close()
+        if context is not None:
+            await context.close()
+
+
+def predict_match(match_label: str, h2h_data: dict, standings_data: list) -> dict:
+    """
+    Prediction stage: RuleEngine plus the xG logic gate. Pure CPU, no I/O, so the
+    pipeline can run it in a worker process. A 'type' of SKIP means no signal.
+    """
+    analysis_input = {"h2h_data": h2h_data, "standings": standings_data}
+    prediction = RuleEngine.analyze(analysis_input)
+
+    # Record Reference Data for Offline Review & Debugging
+    h2h_ids = []
+    if h2h_data:
+        for m in h2h_data.get('head_to_head', []):
+            if m.get('fixture_id'): h2h_ids.append(m['fixture_id'])
+    
+    home_form_ids = []
+    away_form_ids = []
+    if h2h_data:
+        for m in h2h_data.get('home_last_10_matches', []):
+            if m.get('fixture_id'): home_form_ids.append(m['fixture_id'])
+        for m in h2h_data.get('away_last_10_matches', []):
+            if m.get('fixture_id'): away_form_ids.append(m['fixture_id'])
+
+    prediction['h2h_fixture_ids'] = h2h_ids
+    prediction['form_fixture_ids'] = home_form_ids + away_form_ids
+    prediction['standings_snapshot'] = standings_data if standings_data else []
+
+    total_xg = prediction.get("total_xg", 0.0)
+    p_type = prediction.get("type", "SKIP")
+
+    # Rule Engine Logic Gate: Prioritize Over markets if Avg Goals > 1.8
+    # We also verify if a prediction was skipped despite high xG
+    if total_xg > 1.8 and p_type == "SKIP":
+        print(f"      [xG Signal] High Avg Goals ({total_xg}) detected. Categorizing as OVER 1.5 fallback.")
+        prediction.update({
+            "type": "OVER 1.5",
+            "market_prediction": "OVER 1.5",
+            "confidence": "Medium",
+            "reason": [f"High Avg Goals ({total_xg}) logic gate met"]
+        })
+        p_type = "OVER 1.5"
+
+    if p_type != "SKIP":
+        # Verification: If Avg Goals is too low, downgrade confidence
+        if total_xg < 1.4 and prediction.get("confidence") == "High":
+            prediction["confidence"] = "Medium"
+            prediction["reason"].append(f"Confidence adjusted for low Avg Goals ({total_xg})")
+        print(f"            [OK Signal] {match_label} (Type: {p_type}, xG: {total_xg})")
+    else:
+        print(f"      [NO Signal] {match_label} (xG: {total_xg})")
+    return prediction
+
+
+async def process_match_task(match_data: dict, browser: Optional[Browser] = None, page: Optional[Page] = None):
+    """
+    Worker function to process a single match end to end (extract, predict, save).
+    run_flashscore_analysis runs the same stages through AnalysisPipeline instead.
+    """
+    match_label = f"{match_data.get('home_team', 'unknown')}_vs_{match_data.get('away_team', 'unknown')}"
+    collected = await collect_match_data(match_data, browser, page)
+    if collected is None:
+        return False
+    try:
+        prediction = predict_match(match_label, *collected)
+        if prediction.get("type", "SKIP") == "SKIP":
+            return False
+        save_prediction(match_data, prediction)
+        return True
+    except Exception as e:
+        print(f"      [Error] Match failed {match_label}: {e}")
+        return False
@@ -1,21 +1,127 @@
 # fs_schedule.py: Daily match list extraction for Flashscore.
 # Part of LeoBook Modules — Flashscore
 #
+# Classes: ScheduleDigest
+# Functions: fixture_hash(), extract_matches_from_page()
 # Delegates to fs_extractor for ALL-tab extraction. Handles DB save + cloud sync.
 
-from datetime import datetime as dt
+"""
+Schedule Extraction
+Incremental mode (SCHEDULE_INCREMENTAL=1, default): the row list of a date is
+diffed against what the previous cycles stored, and only new or changed
+fixtures are saved and synced. A fixture counts as changed when its content
+hash (kickoff time, status, score, teams, league, link) differs from the one
+recorded for that date in schedule_digest.json, or when it is missing from
+schedules.csv. The digest keeps two ledgers: "stored" (written here after the
+save) and "analysed" (committed by the analysis loop once a fixture has been
+through prediction). Schedule-only runs therefore never hide a fixture from the
+next analysis run, and a fixture whose analysis failed is offered again next
+cycle. SCHEDULE_INCREMENTAL=0 saves every fixture.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime as dt, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
 from playwright.async_api import Page
 from Data.Access.db_helpers import (
-    batch_upsert, SCHEDULES_CSV, TEAMS_CSV, files_and_headers
+    batch_upsert, get_all_schedules, SCHEDULES_CSV, TEAMS_CSV, files_and_headers
 )
 from Data.Access.sync_manager import SyncManager
 from Modules.Flashscore.fs_extractor import expand_all_leagues, extract_all_matches
 
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DIGEST_FILE = PROJECT_ROOT / "Data" / "Store" / "schedule_digest.json"
+INCREMENTAL_ENABLED = os.getenv("SCHEDULE_INCREMENTAL", "1") != "0"
+DIGEST_KEEP_DAYS = 7  # Past dates kept in the digest
+# Extractor fields whose change makes a fixture worth re-saving / re-predicting
+HASH_FIELDS = ('match_time', 'status', 'home_score', 'away_score', 'home_team', 'away_team',
+               'region_league', 'match_link')
+
+
+def fixture_hash(match: Dict[str, Any]) -> str:
+    content = "|".join(str(match.get(f) or '') for f in HASH_FIELDS)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+
+class ScheduleDigest:
+    """Per-ledger, per-date fixture_id -> content hash of the fixtures already stored / analysed."""
+
+    LEDGERS = ("stored", "analysed")
+
+    def __init__(self, path: Path = DIGEST_FILE):
+        self.path = Path(path)
+        self._ledgers: Dict[str, Dict[str, Dict[str, str]]] = {name: {} for name in self.LEDGERS}
+        self._stored_ids: set = set()
+        self._dirty = False
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+                for name in self.LEDGERS:
+                    if isinstance(raw.get(name), dict):
+                        self._ledgers[name] = raw[name]
+            except Exception as e:
+                print(f"   [ScheduleDigest] Ignoring unreadable digest: {e}")
+
+    def begin(self):
+        """Load the fixture ids in schedules.csv (once per run; a wiped store means everything is new)."""
+        self._stored_ids = {r['fixture_id'] for r in get_all_schedules() if r.get('fixture_id')}
+
+    def diff(self, date: str, matches: List[Dict[str, Any]], ledger: str = "stored") -> List[Dict[str, Any]]:
+        """The matches of date that are new or changed since they were last committed to ledger."""
+        known = self._ledgers[ledger].get(date, {})
+        return [m for m in matches
+                if (ledger == "stored" and m.get('fixture_id') not in self._stored_ids)
+                or known.get(m.get('fixture_id')) != (m.get('_content_hash') or fixture_hash(m))]
 
-async def extract_matches_from_page(page: Page) -> list:
+    def commit(self, date: str, matches: List[Dict[str, Any]], ledger: str = "stored"):
+        known = self._ledgers[ledger].setdefault(date, {})
+        for m in matches:
+            if m.get('fixture_id'):
+                known[m['fixture_id']] = m.get('_content_hash') or fixture_hash(m)
+                if ledger == "stored":
+                    self._stored_ids.add(m['fixture_id'])
+        self._dirty = True
+
+    def save(self):
+        """Drop dates older than DIGEST_KEEP_DAYS and write the digest (atomic replace) if it changed."""
+        if not self._dirty:
+            return
+        cutoff = dt.now() - timedelta(days=DIGEST_KEEP_DAYS)
+        for dates in self._ledgers.values():
+            for date in list(dates):
+                try:
+                    if dt.strptime(date, "%d.%m.%Y") < cutoff:
+                        del dates[date]
+                except ValueError:
+                    del dates[date]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._ledgers, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except Exception as e:
+            print(f"   [ScheduleDigest] Failed to save digest: {e}")
+
+
+# Process-wide digest: manager begins, commits and saves it per run
+schedule_digest = ScheduleDigest()
+
+
+async def extract_matches_from_page(page: Page, date: str = "", incremental: bool = INCREMENTAL_ENABLED) -> list:
     """
-    Extracts ALL matches from the ALL tab, expands collapsed leagues first.
-    Saves schedule entries + teams locally via batch upsert (single read/write).
+    Extracts ALL matches from the ALL tab, expands collapsed leagues first, and stamps date on them.
+    Saves schedule entries + teams locally via batch upsert (single read/write): all of
+    them, or (incremental, date given) only the new/changed ones, which are then
+    committed to the "stored" ledger. Returns every extracted fixture; the analysis
+    loop diffs them against the "analysed" ledger itself.
     """
     print("    [Extractor] Extracting match data from ALL tab...")
 
@@ -24,9 +130,20 @@ async def extract_matches_from_page(page: Page) -> list:
         print(f"    [Extractor] Bulk-expanded {expanded} collapsed leagues.")
 
     matches = await extract_all_matches(page, label="Extractor")
+    for m in matches:
+        # Hashed as extracted: analysis later rewrites fields such as region_league
+        m['_content_hash'] = fixture_hash(m)
+        if date:
+            m['date'] = date
+
+    to_save = matches
+    if incremental and date:
+        to_save = schedule_digest.diff(date, matches)
+        print(f"    [Extractor] Incremental: {len(to_save)} new/changed of {len(matches)} fixtures "
+              f"({len(matches) - len(to_save)} unchanged, not re-saved).")
 
-    if matches:
-        print(f"    [Extractor] Pairings complete. Saving {len(matches)} fixtures and teams...")
+    if to_save:
+        print(f"    [Extractor] Pairings complete. Saving {len(to_save)} fixtures and teams...")
 
         # Build schedule rows for batch upsert
         now = dt.now().isoformat()
@@ -34,7 +151,7 @@ async def extract_matches_from_page(page: Page) -> list:
         team_rows = []
         seen_teams = set()
 
-        for m in matches:
+        for m in to_save:
             schedule_rows.append({
                 'fixture_id': m.get('fixture_id'),
                 'date': m.get('date', ''),
@@ -66,9 +183,9 @@ async def extract_matches_from_page(page: Page) -> list:
                         'last_updated': now
                     })
 
-        # Single read + write per file (instead of 1900 individual upserts)
-        batch_upsert(SCHEDULES_CSV, schedule_rows, files_and_headers[SCHEDULES_CSV], 'fixture_id')
-        batch_upsert(TEAMS_CSV, team_rows, files_and_headers[TEAMS_CSV], 'team_id')
+        # Single read + write per file (instead of 1900 individual upserts), off the event loop
+        await asyncio.to_thread(batch_upsert, SCHEDULES_CSV, schedule_rows, files_and_headers[SCHEDULES_CSV], 'fixture_id')
+        await asyncio.to_thread(batch_upsert, TEAMS_CSV, team_rows, files_and_headers[TEAMS_CSV], 'team_id')
         print(f"    [Extractor] Saved {len(schedule_rows)} schedules + {len(team_rows)} teams.")
 
         # Cloud sync
@@ -79,4 +196,7 @@ async def extract_matches_from_page(page: Page) -> list:
             await sync.batch_upsert('teams', team_rows)
             print(f"    [SUCCESS] Multi-table synchronization complete.")
 
+        if date:
+            schedule_digest.commit(date, to_save)
+
     return matches
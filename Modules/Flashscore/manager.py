@@ -14,21 +14,25 @@ from datetime import datetime as dt, timedelta
 from zoneinfo import ZoneInfo
 from playwright.async_api import Playwright
 
-from Data.Access.db_helpers import (
-    get_last_processed_info, save_schedule_entry, save_team_entry
-)
+from Data.Access.db_helpers import get_last_processed_info
 from Core.Browser.site_helpers import fs_universal_popup_dismissal, click_next_day
-from Core.Utils.utils import BatchProcessor
+from Core.Browser.resource_router import apply_resource_policy
+from Core.Utils.utils import BatchProcessor, PagePool
+from Core.Utils.concurrency import ConcurrencyController
 from Core.Utils.monitor import PageMonitor
 from Core.Intelligence.selector_manager import SelectorManager
 from Core.Utils.constants import NAVIGATION_TIMEOUT, WAIT_FOR_LOAD_STATE_TIMEOUT
 
 # Modular Imports
-from .fs_schedule import extract_matches_from_page
-from .fs_processor import process_match_task
+from .fs_schedule import extract_matches_from_page, schedule_digest, INCREMENTAL_ENABLED
+from .fs_processor import setup_match_context, MATCH_CONTEXT_OPTIONS
+from .fs_pipeline import AnalysisPipeline
+from .fs_http import close_http_client
+from .fs_cache import extraction_cache
 from .fs_offline import run_flashscore_offline_repredict
 
 NIGERIA_TZ = ZoneInfo("Africa/Lagos")
+MAX_CONCURRENCY = int(os.getenv("FLASHSCORE_MAX_CONCURRENCY", "10"))  # Ceiling for the adaptive limit
 
 async def run_flashscore_analysis(playwright: Playwright):
     """
@@ -48,6 +52,7 @@ async def run_flashscore_analysis(playwright: Playwright):
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             timezone_id="Africa/Lagos"
         )
+        await apply_resource_policy(context, "fs_schedule")
         page = await context.new_page()
         PageMonitor.attach_listeners(page)
         
@@ -75,6 +80,7 @@ async def run_flashscore_analysis(playwright: Playwright):
         await fs_universal_popup_dismissal(page, "fs_home_page")
 
         last_processed_info = get_last_processed_info()
+        schedule_digest.begin()
         
         # Fix #5: If resume date is already in the future, skip forward scanning
         resume_date = last_processed_info.get('date_obj')
@@ -107,22 +113,31 @@ async def run_flashscore_analysis(playwright: Playwright):
                     pass
 
                 await fs_universal_popup_dismissal(page, "fs_home_page")
-                matches_data = await extract_matches_from_page(page)
+                # Saves the day's fixtures (in incremental mode only the new/changed ones)
+                matches_data = await extract_matches_from_page(page, date=target_full)
+                if INCREMENTAL_ENABLED:
+                    # Analyse what changed since it was last analysed, whoever stored it
+                    total = len(matches_data)
+                    matches_data = schedule_digest.diff(target_full, matches_data, ledger="analysed")
+                    print(f"    [Incremental] {len(matches_data)} of {total} fixtures new/changed since last analysis.")
                 
                 # --- Cleaning & Sorting ---
                 for m in matches_data:
-                    original_time_str = m.get('time')
+                    # Prediction rows and the filters below read 'id' / 'time'
+                    m.setdefault('id', m.get('fixture_id'))
+                    original_time_str = m.get('time') or m.get('match_time')
                     if original_time_str:
                         clean_time_str = original_time_str.split('\n')[0].strip()
                         m['time'] = clean_time_str if clean_time_str and clean_time_str != 'N/A' else 'N/A'
 
-                matches_data.sort(key=lambda x: x.get('time', '23:59'))
+                matches_data.sort(key=lambda x: x.get('time') or '23:59')
 
                 # --- Load existing predictions for robust resume ---
+                # (full mode only: incremental mode re-predicts changed fixtures and never sees unchanged ones)
                 from Data.Access.db_helpers import PREDICTIONS_CSV
                 import csv
                 existing_ids = set()
-                if os.path.exists(PREDICTIONS_CSV):
+                if not INCREMENTAL_ENABLED and os.path.exists(PREDICTIONS_CSV):
                     try:
                         with open(PREDICTIONS_CSV, 'r', encoding='utf-8') as f:
                             reader = csv.DictReader(f)
@@ -130,7 +145,7 @@ async def run_flashscore_analysis(playwright: Playwright):
                     except Exception:
                         pass
 
-                # --- Save to DB & Filter ---
+                # --- Filter (schedules and teams were already batch-saved by the extractor) ---
                 valid_matches = []
                 now_time = dt.now(NIGERIA_TZ).time()
                 is_today = target_date.date() == dt.now(NIGERIA_TZ).date()
@@ -144,16 +159,6 @@ async def run_flashscore_analysis(playwright: Playwright):
 
                 for m in matches_data:
                     fixture_id = m.get('id')
-                    m['date'] = target_full
-                    save_schedule_entry({
-                        'fixture_id': fixture_id, 'date': m.get('date'), 'match_time': m.get('time'),
-                        'region_league': m.get('region_league'), 'home_team': m.get('home_team'),
-                        'away_team': m.get('away_team'), 'home_team_id': m.get('home_team_id'),
-                        'away_team_id': m.get('away_team_id'), 'match_status': 'scheduled',
-                        'match_link': m.get('match_link')
-                    })
-                    save_team_entry({'team_id': m.get('home_team_id'), 'team_name': m.get('home_team'), 'region_league': m.get('region_league'), 'team_url': m.get('home_team_url')})
-                    save_team_entry({'team_id': m.get('away_team_id'), 'team_name': m.get('away_team'), 'region_league': m.get('region_league'), 'team_url': m.get('away_team_url')})
 
                     # Robust Resume: Skip if already predicted
                     if fixture_id in existing_ids:
@@ -173,35 +178,40 @@ async def run_flashscore_analysis(playwright: Playwright):
                         valid_matches.append(m)
 
                 # --- Batch Processing With Dynamic Concurrency ---
+                failed_ids = set()
                 if valid_matches:
-                    # Dynamic scaling
-                    if len(valid_matches) > 100:
-                        max_concurrent = min(env_concurrency + 3, 10) # Aggressive
-                    elif len(valid_matches) < 20:
-                        max_concurrent = max(env_concurrency - 2, 2) # Conservative
-                    else:
-                        max_concurrent = env_concurrency             # Standard
-                    
-                    print(f"    [Batching] Processing {len(valid_matches)} matches concurrently (Scaling: {max_concurrent})...")
-                    processor = BatchProcessor(max_concurrent=max_concurrent)
+                    # Adaptive concurrency: starts at FLASHSCORE_CONCURRENCY, AIMD-resized while the batch runs
+                    controller = ConcurrencyController("analysis", initial=env_concurrency,
+                                                       max_limit=max(env_concurrency, MAX_CONCURRENCY))
+                    print(f"    [Batching] Processing {len(valid_matches)} matches concurrently (Starting at: {controller.limit})...")
+                    # Warm contexts are reused across matches instead of one new context per match
+                    page_pool = PagePool(browser, controller.max_limit, context_options=MATCH_CONTEXT_OPTIONS,
+                                         on_context=setup_match_context, on_page=PageMonitor.attach_listeners)
+                    processor = BatchProcessor(page_pool=page_pool, controller=controller)
+                    extraction_cache.refresh()
                     
-                    # Process in smaller chunks to trigger frequent syncs
-                    analysis_chunk_size = 10
-                    for i in range(0, len(valid_matches), analysis_chunk_size):
-                        chunk = valid_matches[i:i + analysis_chunk_size]
-                        chunk_results = await processor.run_batch(chunk, process_match_task, browser=browser)
-                        
-                        successful_in_chunk = sum(1 for r in chunk_results if r)
-                        total_cycle_predictions += successful_in_chunk
-                        
-                        if successful_in_chunk > 0:
-                            print(f"\n   [Analytics Sync] {total_cycle_predictions} predictions generated. Triggering micro-batch sync...")
-                            from Data.Access.sync_manager import run_full_sync
-                            await run_full_sync()
+                    try:
+                        # Extraction, prediction and persistence run as separate stages (see fs_pipeline)
+                        pipeline = AnalysisPipeline(processor)
+                        stats = await pipeline.run(valid_matches)
+                        total_cycle_predictions += stats["signals"]
+                        failed_ids = {m.get('fixture_id') for m in pipeline.failed}
+                    finally:
+                        print(f"    [Batching] Page pool recycled {page_pool.recycled} contexts.")
+                        print(f"    [Batching] Concurrency: {controller.summary()}")
+                        print(f"    [Batching] Extraction cache: {extraction_cache.summary()}")
+                        extraction_cache.save()
+                        await page_pool.close()
+                        await close_http_client()
                 else:
                     print("    [Info] No new matches to process.")
 
+                # Fixtures whose extraction or save failed stay "changed" and are offered again next cycle
+                schedule_digest.commit(target_full, [m for m in matches_data if m.get('fixture_id') not in failed_ids],
+                                       ledger="analysed")
+
     finally:
+        schedule_digest.save()
         if context is not None:
             await context.close()
         if 'browser' in locals():
@@ -224,12 +234,13 @@ async def run_flashscore_schedule_only(playwright: Playwright, refresh: bool = F
     )
 
     context = None
-    total_saved = 0
+    total_extracted = 0
     try:
         context = await browser.new_context(
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             timezone_id="Africa/Lagos"
         )
+        await apply_resource_policy(context, "fs_schedule")
         page = await context.new_page()
         PageMonitor.attach_listeners(page)
 
@@ -260,6 +271,7 @@ async def run_flashscore_schedule_only(playwright: Playwright, refresh: bool = F
                 return
         else:
             print("  [Schedule] Refresh mode — starting from today.")
+        schedule_digest.begin()
 
         for day_offset in range(7):
             target_date = dt.now(NIGERIA_TZ) + timedelta(days=day_offset)
@@ -277,16 +289,14 @@ async def run_flashscore_schedule_only(playwright: Playwright, refresh: bool = F
             print(f"\n--- EXTRACTING SCHEDULE: {target_full} ---")
             await fs_universal_popup_dismissal(page, "fs_home_page")
             # extract_matches_from_page handles expansion + extraction + batch save + sync
-            matches_data = await extract_matches_from_page(page)
-
-            # Stamp date on all matches for this day
-            for m in matches_data:
-                m['date'] = target_full
+            # (in incremental mode only for new/changed fixtures; analysis keeps its own ledger)
+            matches_data = await extract_matches_from_page(page, date=target_full)
 
-            total_saved += len(matches_data)
-            print(f"  [Schedule] {len(matches_data)} matches for {target_full}.")
+            total_extracted += len(matches_data)
+            print(f"  [Schedule] {len(matches_data)} matches extracted for {target_full}.")
 
     finally:
+        schedule_digest.save()
         if context is not None:
             await context.close()
         if 'browser' in locals():
@@ -295,4 +305,4 @@ async def run_flashscore_schedule_only(playwright: Playwright, refresh: bool = F
     # Cloud sync
     from Data.Access.sync_manager import run_full_sync
     await run_full_sync(session_name="Schedule Extraction")
-    print(f"\n--- Schedule Extraction Complete: {total_saved} total matches saved. ---")
+    print(f"\n--- Schedule Extraction Complete: {total_extracted} total matches extracted. ---")
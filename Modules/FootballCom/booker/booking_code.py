@@ -1,7 +1,7 @@
 # booking_code.py: booking_code.py: Module for Modules — Football.com Booking.
 # Part of LeoBook Modules — Football.com Booking
 #
-# Functions: ensure_bet_insights_collapsed(), check_match_start_time(), harvest_booking_codes(), find_and_click_outcome(), finalize_accumulator(), extract_booking_details(), save_booking_code()
+# Functions: ensure_bet_insights_collapsed(), check_match_start_time(), harvest_booking_codes(), _slip_grew(), find_and_click_outcome(), finalize_accumulator(), extract_booking_details(), save_booking_code()
 
 """
 Bet Placement Orchestration
@@ -14,6 +14,7 @@ from pathlib import Path
 from datetime import datetime as dt
 from playwright.async_api import Page
 from Core.Browser.site_helpers import get_main_frame
+from Core.Browser.waits import wait_until, wait_for_dom_quiet, wait_for_network_idle
 from Data.Access.db_helpers import (
     update_prediction_status, 
     update_site_match_status, 
@@ -145,7 +146,7 @@ async def harvest_booking_codes(page: Page, matched_urls: Dict[str, str], day_pr
         try:
             # 1. Navigation
             await page.goto(match_url, wait_until='domcontentloaded', timeout=30000)
-            await asyncio.sleep(3)
+            await wait_for_dom_quiet(page, quiet_ms=500)  # SPA finished rendering the markets
             await neo_popup_dismissal(page, "fb_match_page")
             await ensure_bet_insights_collapsed(page)
 
@@ -165,7 +166,9 @@ async def harvest_booking_codes(page: Page, matched_urls: Dict[str, str], day_pr
                     print(f"    [Booking] Clicking Book-a-Bet button...")
                     await page.locator(book_btn_sel).first.scroll_into_view_if_needed()
                     await page.locator(book_btn_sel).first.click(force=True)
-                    await asyncio.sleep(2)
+                    code_sel = await get_selector_auto(page, "fb_match_page", "booking_code_text")
+                    if code_sel:
+                        await wait_until(lambda: page.locator(code_sel).first.is_visible())
 
                     booking_code = await extract_booking_details(page)
                     if booking_code and booking_code != "N/A":
@@ -184,7 +187,7 @@ async def harvest_booking_codes(page: Page, matched_urls: Dict[str, str], day_pr
                 close_sel = await get_selector_auto(page, "fb_match_page", "modal_close_button")
                 if close_sel and await page.locator(close_sel).count() > 0:
                     await page.locator(close_sel).first.click()
-                    await asyncio.sleep(1)
+                    await wait_for_dom_quiet(page, quiet_ms=250, timeout_ms=2000)
 
                 # 5. Force Clear Slip (Crucial step in flowchart)
                 await force_clear_slip(page)
@@ -201,6 +204,9 @@ async def harvest_booking_codes(page: Page, matched_urls: Dict[str, str], day_pr
         print(f"\n    [Harvest Sync] Finalizing sync for {harvest_success_count} harvests...")
         await run_full_sync()
 
+async def _slip_grew(page: Page, count_before: int) -> bool:
+    return await get_bet_slip_count(page) > count_before
+
 async def find_and_click_outcome(page: Page, m_name: str, o_name: str) -> tuple:
     """Helper to search for and click the outcome button."""
     frame = await get_main_frame(page)
@@ -223,8 +229,11 @@ async def find_and_click_outcome(page: Page, m_name: str, o_name: str) -> tuple:
             await asyncio.sleep(0.5)
 
         await page.locator(input_sel).first.fill(m_name)
+        search_done = asyncio.create_task(wait_for_network_idle(page, idle_ms=400))
+        await asyncio.sleep(0)  # Let the waiter attach its listeners before the search fires
         await page.keyboard.press("Enter")
-        await asyncio.sleep(2)
+        await search_done
+        await wait_for_dom_quiet(page, quiet_ms=250, timeout_ms=2000)
 
         # Outcome discovery - using flexible text matching
         outcome_sel = f"button:has-text('{o_name}'), div[role='button']:has-text('{o_name}'), .m-outcome-item:has-text('{o_name}')"
@@ -245,9 +254,7 @@ async def find_and_click_outcome(page: Page, m_name: str, o_name: str) -> tuple:
              count_before = await get_bet_slip_count(page)
              await target_btn.scroll_into_view_if_needed()
              await target_btn.click(force=True)
-             await asyncio.sleep(1)
-             
-             success = await get_bet_slip_count(page) > count_before
+             success = await wait_until(lambda: _slip_grew(page, count_before), timeout_ms=3000)
              return success, odds
         else:
             print(f"    [Error] Outcome '{o_name}' not found for market '{m_name}'.")
@@ -8,16 +8,19 @@ Extractor Module
 Handles extraction of leagues and matches from Football.com schedule pages.
 """
 
-import asyncio
 from typing import List, Dict
 
 from playwright.async_api import Page
 
+from Core.Browser.waits import wait_until
 from Core.Intelligence.selector_manager import SelectorManager
 from Core.Intelligence.intelligence import get_selector
 from Core.Utils.constants import WAIT_FOR_LOAD_STATE_TIMEOUT
 from .navigator import hide_overlays
 
+# A league section is expanded once its own matches container holds match cards
+_SECTION_HAS_CARDS_JS = "(el, sel) => !!(el.nextElementSibling && el.nextElementSibling.querySelector(sel))"
+
 
 async def extract_league_matches(page: Page, target_date: str) -> List[Dict]:
     """Iterates through all league headers, expands them, and extracts matches for a specific date."""
@@ -63,10 +66,7 @@ async def extract_league_matches(page: Page, target_date: str) -> List[Dict]:
                     print(f"    -> {league_text}: Expanding...")
                     await header_locator.scroll_into_view_if_needed()
                     await header_locator.click(force=True, timeout=5000)
-                    try:
-                        await page.wait_for_selector(match_card_sel, state="visible", timeout=5000)
-                    except: pass
-                    await asyncio.sleep(1.5)
+                    await wait_until(lambda: header_locator.evaluate(_SECTION_HAS_CARDS_JS, match_card_sel), timeout_ms=5000)
                 else:
                     print(f"    -> {league_text}: Already expanded.")
 
@@ -119,7 +119,7 @@ async def extract_league_matches(page: Page, target_date: str) -> List[Dict]:
                                 print(f"    -> {league_text}: Title selector failed, trying text match...")
                                 await header_locator.get_by_text(league_text, exact=True).first.click(timeout=3000, force=True)
 
-                            await asyncio.sleep(2) # Wait for expansion
+                            await wait_until(lambda: header_locator.evaluate(_SECTION_HAS_CARDS_JS, match_card_sel), timeout_ms=3000)
                             
                             # Re-evaluate matches
                             matches_in_section_retry = await matches_container.evaluate("""(container, args) => {
@@ -1,7 +1,7 @@
 # fb_manager.py: fb_manager.py: Orchestration layer for Football.com booking process.
 # Part of LeoBook Modules — Football.com
 #
-# Functions: _create_session(), run_odds_harvesting(), run_automated_booking(), run_football_com_booking()
+# Functions: _open_session_page(), _create_session(), _recycle_if_needed(), run_odds_harvesting(), run_automated_booking(), run_football_com_booking()
 
 """
 Football.com Orchestrator — Decoupled v2.8
@@ -17,24 +17,43 @@ from .fb_setup import get_pending_predictions_by_date
 from .fb_session import launch_browser_with_retry
 from .fb_url_resolver import resolve_urls
 from .navigator import load_or_create_session, extract_balance
+from Core.Browser.supervisor import BrowserSupervisor
 from Core.Utils.utils import log_error_state
 from Core.Utils.monitor import PageMonitor
 from Core.System.lifecycle import log_state
 
 
+async def _open_session_page(context):
+    """Session page of a (re)launched context: login check (performs login if needed) + monitor."""
+    _, page = await load_or_create_session(context)
+    PageMonitor.attach_listeners(page)
+    return page
+
+
 async def _create_session(playwright: Playwright):
-    """Shared session setup: launch browser, login, extract balance. Returns (context, page, balance)."""
+    """
+    Shared session setup: launch browser, login, extract balance. Returns (supervisor, page, balance).
+    The supervisor owns the persistent context (supervisor.browser) and recycles it between dates.
+    """
     user_data_dir = Path("Data/Auth/ChromeData_v3").absolute()
     user_data_dir.mkdir(parents=True, exist_ok=True)
 
-    context = await launch_browser_with_retry(playwright, user_data_dir)
-    _, page = await load_or_create_session(context)
-    PageMonitor.attach_listeners(page)
+    supervisor = BrowserSupervisor("fb_session", lambda: launch_browser_with_retry(playwright, user_data_dir),
+                                   user_data_dir=user_data_dir)
+    page = await _open_session_page(await supervisor.start())
 
     current_balance = await extract_balance(page)
     print(f"  [Balance] Current: ₦{current_balance:.2f}")
 
-    return context, page, current_balance
+    return supervisor, page, current_balance
+
+
+async def _recycle_if_needed(supervisor: BrowserSupervisor, page, pages_served: int):
+    """Between dates: count the work done and recycle the context at its ceilings. Returns the page to use."""
+    supervisor.note_pages(pages_served)
+    if await supervisor.maybe_recycle():
+        return await _open_session_page(supervisor.browser)
+    return page
 
 
 async def run_odds_harvesting(playwright: Playwright):
@@ -53,10 +72,10 @@ async def run_odds_harvesting(playwright: Playwright):
     restarts = 0
 
     while restarts <= max_restarts:
-        context = None
+        supervisor = None
         try:
             print(f"  [System] Launching Harvest Session (Restart {restarts}/{max_restarts})...")
-            context, page, _ = await _create_session(playwright)
+            supervisor, page, _ = await _create_session(playwright)
             log_state(chapter="Chapter 1C", action="Harvesting odds")
 
             for target_date, day_preds in sorted(predictions_by_date.items()):
@@ -71,6 +90,7 @@ async def run_odds_harvesting(playwright: Playwright):
                 print(f"  [Chapter 1C] Starting odds discovery for {target_date}...")
                 from Modules.FootballCom.booker.booking_code import harvest_booking_codes
                 await harvest_booking_codes(page, matched_urls, day_preds, target_date)
+                page = await _recycle_if_needed(supervisor, page, len(matched_urls))
 
             break  # Success exit
 
@@ -79,8 +99,8 @@ async def run_odds_harvesting(playwright: Playwright):
             if is_fatal and restarts < max_restarts:
                 print(f"\n[!!!] FATAL SESSION ERROR: {e}")
                 restarts += 1
-                if context:
-                    await context.close()
+                if supervisor:
+                    await supervisor.close()
                 await asyncio.sleep(5)
                 continue
             else:
@@ -88,9 +108,8 @@ async def run_odds_harvesting(playwright: Playwright):
                 print(f"  [CRITICAL] Harvest failed: {e}")
                 break
         finally:
-            if context:
-                try: await context.close()
-                except: pass
+            if supervisor:
+                await supervisor.close()
 
 
 async def run_automated_booking(playwright: Playwright):
@@ -122,10 +141,10 @@ async def run_automated_booking(playwright: Playwright):
     restarts = 0
 
     while restarts <= max_restarts:
-        context = None
+        supervisor = None
         try:
             print(f"  [System] Launching Booking Session (Restart {restarts}/{max_restarts})...")
-            context, page, current_balance = await _create_session(playwright)
+            supervisor, page, current_balance = await _create_session(playwright)
             log_state(chapter="Chapter 2A", action="Placing bets")
 
             from Modules.FootballCom.booker.placement import place_multi_bet_from_codes
@@ -134,6 +153,7 @@ async def run_automated_booking(playwright: Playwright):
                 print(f"\n--- Booking Date: {target_date} ---")
                 await place_multi_bet_from_codes(page, harvested, current_balance)
                 log_state(chapter="Chapter 2A", action="Booking Complete", next_step=f"Processed {target_date}")
+                page = await _recycle_if_needed(supervisor, page, len(harvested))
 
             break  # Success exit
 
@@ -142,8 +162,8 @@ async def run_automated_booking(playwright: Playwright):
             if is_fatal and restarts < max_restarts:
                 print(f"\n[!!!] FATAL SESSION ERROR: {e}")
                 restarts += 1
-                if context:
-                    await context.close()
+                if supervisor:
+                    await supervisor.close()
                 await asyncio.sleep(5)
                 continue
             else:
@@ -151,9 +171,8 @@ async def run_automated_booking(playwright: Playwright):
                 print(f"  [CRITICAL] Booking failed: {e}")
                 break
         finally:
-            if context:
-                try: await context.close()
-                except: pass
+            if supervisor:
+                await supervisor.close()
 
 
 # Backward compat — keep old name pointing to harvesting for any legacy callers
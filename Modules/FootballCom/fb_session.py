@@ -1,25 +1,15 @@
 # fb_session.py: fb_session.py: Browser context and anti-detect management.
 # Part of LeoBook Modules — Football.com
 #
-# Functions: cleanup_chrome_processes(), launch_browser_with_retry()
+# Functions: launch_browser_with_retry()
+# Called by: fb_manager.py (through BrowserSupervisor, which also handles process cleanup)
 
 import asyncio
 import os
-import subprocess
 from pathlib import Path
 from playwright.async_api import Playwright, BrowserContext
 
-async def cleanup_chrome_processes():
-    """Automatically terminate conflicting Chrome processes before launch."""
-    try:
-        if os.name == 'nt':
-            subprocess.run(["taskkill", "/F", "/IM", "chrome.exe"], capture_output=True)
-            print("  [Cleanup] Cleaned up Chrome processes.")
-        else:
-            subprocess.run(["pkill", "-f", "chrome"], capture_output=True)
-            print("  [Cleanup] Cleaned up Chrome processes.")
-    except Exception as e:
-        print(f"  [Cleanup] Warning: Could not cleanup Chrome processes: {e}")
+from Core.Browser.resource_router import apply_resource_policy
 
 async def launch_browser_with_retry(playwright: Playwright, user_data_dir: Path, max_retries: int = 3) -> BrowserContext:
     """Launch browser with retry logic and exponential backoff."""
@@ -59,6 +49,8 @@ async def launch_browser_with_retry(playwright: Playwright, user_data_dir: Path,
             )
 
             print(f"  [Launch] Browser launched successfully on attempt {attempt + 1}!")
+            # Keeps images: AIGO selector healing works from screenshots
+            await apply_resource_policy(context, "fb_session")
             return context
 
         except Exception as e:
@@ -17,6 +17,7 @@ from typing import Tuple, Optional, cast
 from playwright.async_api import Browser, BrowserContext, Page
 
 from Core.Browser.site_helpers import fb_universal_popup_dismissal
+from Core.Browser.waits import wait_for_dom_quiet, wait_until
 from Core.Intelligence.intelligence import fb_universal_popup_dismissal as neo_popup_dismissal
 from Core.Intelligence.selector_manager import SelectorManager
 from Core.Utils.constants import NAVIGATION_TIMEOUT, WAIT_FOR_LOAD_STATE_TIMEOUT
@@ -85,7 +86,7 @@ async def perform_login(page: Page):
     # Go directly to main mobile page
     #await page.goto("https://www.football.com/ng", wait_until='domcontentloaded', timeout=NAVIGATION_TIMEOUT)
     #await log_page_title(page, "Login Entry")
-    await asyncio.sleep(2) # Reduced sleep
+    await wait_for_dom_quiet(page, quiet_ms=500, timeout_ms=3000)
 
     
     try:
@@ -123,7 +124,7 @@ async def perform_login(page: Page):
                     await page.locator(login_sel).first.click(force=True)
                     print(f"  [Login] Login button clicked using selector: {login_sel}")
                     login_clicked = True
-                    await asyncio.sleep(3)
+                    await wait_for_dom_quiet(page, quiet_ms=500, timeout_ms=3000)  # Login sheet animates in
             except Exception as e:
                 print(f"  [Login] Failed to click login with {login_sel}: {e}")
 
@@ -148,7 +149,7 @@ async def perform_login(page: Page):
                             await page.locator(selector).first.click(force=True)
                             print(f"  [Login] Found and clicked login element using predefined selector: {selector}")
                             login_clicked = True
-                            await asyncio.sleep(3)
+                            await wait_for_dom_quiet(page, quiet_ms=500, timeout_ms=3000)
                             break
                     except Exception as e:
                         continue
@@ -180,13 +181,12 @@ async def perform_login(page: Page):
              else:
                 raise e # Re-raise if fallback also fails
 
-        await asyncio.sleep(1)
-
         # Input Password
         print(f"  [Login] Filling password using: {password_selector}")
         await page.wait_for_selector(password_selector, state="visible", timeout=10000)
         await page.fill(password_selector, PASSWORD)
-        await asyncio.sleep(1)
+        # The submit button is enabled once the form validates both inputs
+        await wait_until(lambda: page.locator(login_btn_selector).first.is_enabled(), timeout_ms=3000)
 
         # Click Login
         print(f"  [Login] Clicking login button using: {login_btn_selector}")
@@ -194,7 +194,7 @@ async def perform_login(page: Page):
         await page.locator(login_btn_selector).first.click(force=True)
         
         await page.wait_for_load_state('networkidle', timeout=30000)
-        await asyncio.sleep(5)
+        await wait_for_dom_quiet(page, quiet_ms=500, timeout_ms=5000)
         print("[Login] Football.com Login Successful.")
         
     except Exception as e:
@@ -215,13 +215,15 @@ async def load_or_create_session(context: BrowserContext) -> Tuple[BrowserContex
     """
     print("  [Auth] Using Persistent Context. Verifying session...")
 
-    await asyncio.sleep(3)
-    
     # Ensure we have a page
     if not context.pages:
         page = await context.new_page()
     else:
         page = context.pages[0]
+        try:
+            await page.wait_for_load_state('domcontentloaded', timeout=WAIT_FOR_LOAD_STATE_TIMEOUT)
+        except Exception:
+            pass  # Restored tab still loading; the checks below wait on their own selectors
 
     # Navigate to check state if needed
     current_url = page.url
@@ -339,7 +341,7 @@ async def select_target_date(page: Page, target_date: str) -> bool:
                 await page.locator(dropdown_sel).first.click(force=True)
                 print(f"  [Filter] Clicked date dropdown with selector: {dropdown_sel}")
                 dropdown_found = True
-                await asyncio.sleep(1)
+                await wait_for_dom_quiet(page, quiet_ms=300, timeout_ms=3000)  # Day list opened
         except Exception as e:
             print(f"  [Filter] Dropdown selector failed: {dropdown_sel} - {e}")
             
@@ -382,7 +384,7 @@ async def select_target_date(page: Page, target_date: str) -> bool:
             continue
 
         await page.wait_for_load_state('networkidle', timeout=WAIT_FOR_LOAD_STATE_TIMEOUT)
-        await asyncio.sleep(1)
+        await wait_for_dom_quiet(page, quiet_ms=300, timeout_ms=3000)
 
         # Sort by League (Mandatory)
         try:
@@ -392,7 +394,6 @@ async def select_target_date(page: Page, target_date: str) -> bool:
                 if await page.locator(sort_sel).count() > 0:
                     await page.locator(sort_sel).first.scroll_into_view_if_needed()
                     await page.locator(sort_sel).first.click(force=True)
-                    await asyncio.sleep(1)
 
                     # Try to select "League" from dropdown options (Content filter)
                     target_sort = "League"
@@ -405,7 +406,7 @@ async def select_target_date(page: Page, target_date: str) -> bool:
                     await page.locator(f'{sort_sel} >> {item_sel}').first.click(force=True)
                     print("  [Filter] Successfully sorted by League")
                     league_sorted = True
-                    await asyncio.sleep(1)
+                    await wait_for_dom_quiet(page, quiet_ms=300, timeout_ms=3000)  # List re-grouped by league
                     break
                 else:
                         print("  [Filter] Sort dropdown not visible on page")
@@ -1,81 +1,326 @@
-# backtest_monitor.py: backtest_monitor.py: Module for Scripts — Pipeline.
+# backtest_monitor.py: Event-driven backtest job service.
 # Part of LeoBook Scripts — Pipeline
 #
-# Functions: run_backtest(), monitor()
+# Classes: BacktestService
+# Functions: load_backtest_config(), monitor()
+# Called by: Leo.py (TRIGGER_FILE, load_backtest_config), run standalone as a service
+
+"""
+Backtest Monitor
+Long-running job queue for backtests requested by the Flutter UI or scripts.
+- Triggers arrive via the trigger file (watchdog/inotify when installed, stat
+  polling otherwise) or a local JSON-lines socket (run / cancel / status).
+- Triggers for the same engine are deduplicated; bursts are coalesced.
+- One warm worker keeps schedules, their history index and the BacktestCache
+  loaded between jobs, rebuilding them only when schedules.csv changes on disk.
+- Progress is published to Data/Store/backtest_status.json.
+"""
 
 import os
 import sys
-import time
 import json
+import asyncio
 import traceback
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
 
 # Add project root to path
 # Assuming this script is in Scripts/ and project root is one level up
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(PROJECT_ROOT)
 
-from Modules.Flashscore.fs_offline import run_flashscore_offline_repredict
+from Modules.Flashscore.fs_offline import run_flashscore_offline_repredict, build_history_index
 from Core.Intelligence.rule_config import RuleConfig
+from Core.Intelligence.rule_engine_manager import RuleEngineManager
+from Core.Intelligence.backtest_cache import BacktestCache
+from Data.Access.db_helpers import SCHEDULES_CSV, get_all_schedules
 
-import asyncio
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
 
 STORE_PATH = os.path.join(PROJECT_ROOT, "Data", "Store")
 TRIGGER_FILE = os.path.join(STORE_PATH, "trigger_backtest.json")
 CONFIG_FILE = os.path.join(STORE_PATH, "rule_config.json")
+STATUS_FILE = os.path.join(STORE_PATH, "backtest_status.json")
 
-async def run_backtest(config):
-    # Pass None for playwright as it appears unused in offline mode
-    await run_flashscore_offline_repredict(playwright=None, custom_config=config)
+MONITOR_HOST = "127.0.0.1"
+MONITOR_PORT = int(os.getenv("BACKTEST_MONITOR_PORT", "8765"))
+COALESCE_SECONDS = float(os.getenv("BACKTEST_COALESCE_SECONDS", "1.5"))
+TRIGGER_POLL_INTERVAL = 1.0   # Fallback when watchdog is not installed
+TRIGGER_SETTLE_SECONDS = 0.2  # Let the writer finish before reading the trigger
+TRIGGER_WRITE_GRACE = 5.0     # An unparseable trigger older than this is corrupt, not half-written
 
-def monitor():
-    print(f"--- LeoBook Backtest Monitor Started ---")
-    print(f"Watching {TRIGGER_FILE}...")
-    
-    while True:
-        if os.path.exists(TRIGGER_FILE):
-            print("\n[Trigger Detected] Starting Backtest...")
+
+def load_backtest_config(engine_id: Optional[str] = None) -> Optional[RuleConfig]:
+    """Resolve the RuleConfig for a trigger: registered engine first, legacy rule_config.json second."""
+    if engine_id:
+        engine = RuleEngineManager.get_engine(engine_id)
+        if engine:
+            return RuleEngineManager.to_rule_config(engine)
+
+    if os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE, 'r') as f:
+            config_data = json.load(f)
+        valid_keys = RuleConfig.__annotations__.keys()
+        filtered_data = {k: v for k, v in config_data.items() if k in valid_keys}
+        return RuleConfig(**filtered_data)
+    return None
+
+
+class BacktestService:
+    """Deduplicating backtest job queue with a single warm worker."""
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._cancel = asyncio.Event()
+        self._settle_handle: Optional[asyncio.TimerHandle] = None
+        self.current: Optional[Dict[str, Any]] = None
+        self.last_job: Optional[Dict[str, Any]] = None
+        self.cache = BacktestCache()
+        self._schedules = None
+        self._history_index = None
+        self._schedules_mtime = None
+
+    # ── Queue ────────────────────────────────────────
+
+    @staticmethod
+    def _job_key(trigger: Dict[str, Any]) -> str:
+        return trigger.get("engine_id") or trigger.get("config_name") or "rule_config"
+
+    def submit(self, trigger: Dict[str, Any]) -> str:
+        """Queue a backtest. A trigger for an already-queued engine is merged into it."""
+        key = self._job_key(trigger)
+        if key in self._pending:
+            self._pending[key].update(trigger)
+            self._pending[key]["coalesced"] += 1
+            print(f"   [Backtest Monitor] Coalesced trigger for '{key}'.")
+        else:
+            self._pending[key] = {**trigger, "coalesced": 0, "queued_at": datetime.now().isoformat()}
+            print(f"   [Backtest Monitor] Queued '{key}' ({len(self._pending)} pending).")
+        self._wakeup.set()
+        self._write_status()
+        return key
+
+    def cancel(self, engine_id: Optional[str] = None) -> bool:
+        """Drop a queued job, or stop the running one (any job if engine_id is None)."""
+        cancelled = False
+        if engine_id and self._pending.pop(engine_id, None) is not None:
+            cancelled = True
+        if self.current and (engine_id is None or self.current["key"] == engine_id):
+            self._cancel.set()
+            cancelled = True
+        self._write_status()
+        return cancelled
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.current,
+            "pending": list(self._pending.keys()),
+            "last_job": self.last_job,
+            "cache": self.cache.summary(),
+        }
+
+    def _write_status(self):
+        try:
+            tmp = STATUS_FILE + ".tmp"
+            with open(tmp, 'w') as f:
+                json.dump({**self.status(), "updated_at": datetime.now().isoformat()}, f, indent=2)
+            os.replace(tmp, STATUS_FILE)
+        except OSError as e:
+            print(f"   [Backtest Monitor] Could not write status: {e}")
+
+    # ── Worker ───────────────────────────────────────
+
+    def _warm_schedules(self):
+        """Refresh schedules and the history index only when schedules.csv changed."""
+        try:
+            mtime = os.path.getmtime(SCHEDULES_CSV)
+        except OSError:
+            mtime = None
+        if self._schedules is None or mtime != self._schedules_mtime:
+            self._schedules = get_all_schedules()
+            self._history_index = build_history_index(self._schedules)
+            self._schedules_mtime = mtime
+            print(f"   [Backtest Monitor] Loaded and indexed {len(self._schedules)} schedules.")
+
+    async def _run_job(self, key: str, trigger: Dict[str, Any]):
+        self._cancel.clear()
+        self.current = {
+            "key": key,
+            "config_name": trigger.get("config_name"),
+            "state": "running",
+            "done": 0,
+            "total": 0,
+            "started_at": datetime.now().isoformat(),
+        }
+        self._write_status()
+
+        def progress(done: int, total: int):
+            self.current.update(done=done, total=total)
+            self._write_status()
+
+        try:
+            config = load_backtest_config(trigger.get("engine_id"))
+            if config is None:
+                print("Error: Config file not found at " + CONFIG_FILE)
+                self.current["state"] = "failed"
+            else:
+                print(f"Loaded Config: {config.name}")
+                self._warm_schedules()
+                await run_flashscore_offline_repredict(
+                    playwright=None,
+                    custom_config=config,
+                    schedules=self._schedules,
+                    history_index=self._history_index,
+                    cache=self.cache,
+                    progress_cb=progress,
+                    cancel_event=self._cancel,
+                )
+                self.current["state"] = "cancelled" if self._cancel.is_set() else "done"
+        except Exception as e:
+            print(f"Error during backtest: {e}")
+            traceback.print_exc()
+            self.current["state"] = "failed"
+        finally:
+            self.current["finished_at"] = datetime.now().isoformat()
+            self.last_job, self.current = self.current, None
+            print(f"   [Backtest Monitor] Job '{key}' {self.last_job['state']}.")
+            self._write_status()
+
+    async def _worker(self):
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(COALESCE_SECONDS)  # Let bursts of triggers merge
+            self._wakeup.clear()
+            while self._pending:
+                key, trigger = self._pending.popitem(last=False)
+                await self._run_job(key, trigger)
+
+    # ── Trigger sources ──────────────────────────────
+
+    def _on_trigger_event(self):
+        """Debounce trigger-file events (writers emit several) before reading it."""
+        if self._settle_handle:
+            self._settle_handle.cancel()
+        self._settle_handle = self.loop.call_later(TRIGGER_SETTLE_SECONDS, self._consume_trigger_file)
+
+    def _consume_trigger_file(self):
+        if not os.path.exists(TRIGGER_FILE):
+            return
+        try:
+            with open(TRIGGER_FILE, 'r') as f:
+                trigger_data = json.load(f)
+        except json.JSONDecodeError as e:
             try:
-                # Read trigger info
-                try:
-                     with open(TRIGGER_FILE, 'r') as f:
-                        trigger_data = json.load(f)
-                        print(f"Requested by: {trigger_data.get('config_name', 'Unknown')}")
-                except Exception as e:
-                    print(f"Error reading trigger file: {e}")
-
-                # Load Config
-                if os.path.exists(CONFIG_FILE):
-                     with open(CONFIG_FILE, 'r') as f:
-                        config_data = json.load(f)
-                        
-                        # Filter config_data
-                        valid_keys = RuleConfig.__annotations__.keys()
-                        filtered_data = {k: v for k, v in config_data.items() if k in valid_keys}
-                        
-                        config = RuleConfig(**filtered_data)
-                        
-                        print(f"Loaded Config: {config.name}")
-                        print("Running Repredict...")
-                        
-                        # Run Async
-                        asyncio.run(run_backtest(config))
-                        print("Backtest Complete.")
-                else:
-                    print("Error: Config file not found at " + CONFIG_FILE)
-
-            except Exception as e:
-                print(f"Error during backtest: {e}")
-                traceback.print_exc()
+                age = datetime.now().timestamp() - os.path.getmtime(TRIGGER_FILE)
+            except OSError:
+                return
+            if age < TRIGGER_WRITE_GRACE:
+                self._on_trigger_event()  # Still being written; try again shortly
+                return
+            print(f"Discarding malformed trigger file: {e}")
+            try:
+                os.replace(TRIGGER_FILE, TRIGGER_FILE + ".bad")
+            except OSError as err:
+                print(f"Error moving trigger file aside: {err}")
+            return
+        except OSError as e:
+            print(f"Error reading trigger file: {e}")
+            return
+        try:
+            os.remove(TRIGGER_FILE)
+        except OSError as e:
+            print(f"Error removing trigger file: {e}")
+        print(f"\n[Trigger Detected] Requested by: {trigger_data.get('config_name', 'Unknown')}")
+        self.submit(trigger_data)
+
+    async def _watch_trigger_file(self):
+        self._consume_trigger_file()
+
+        if HAS_WATCHDOG:
+            service = self
+            trigger_path = os.path.normcase(os.path.abspath(TRIGGER_FILE))
+
+            class _TriggerHandler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    paths = (getattr(event, "src_path", ""), getattr(event, "dest_path", ""))
+                    if any(p and os.path.normcase(os.path.abspath(p)) == trigger_path for p in paths):
+                        service.loop.call_soon_threadsafe(service._on_trigger_event)
+
+            observer = Observer()
+            observer.schedule(_TriggerHandler(), STORE_PATH, recursive=False)
+            observer.start()
+            print(f"Watching {TRIGGER_FILE} (filesystem events)...")
+            try:
+                await asyncio.Event().wait()
             finally:
-                # Remove trigger
-                if os.path.exists(TRIGGER_FILE):
-                    try:
-                        os.remove(TRIGGER_FILE)
-                        print("Trigger file removed.")
-                    except OSError as e:
-                        print(f"Error removing trigger file: {e}")
-                    
-        time.sleep(2)
+                observer.stop()
+                observer.join()
+        else:
+            print(f"Watching {TRIGGER_FILE} (polling every {TRIGGER_POLL_INTERVAL}s)...")
+            last_mtime = None
+            while True:
+                try:
+                    mtime = os.path.getmtime(TRIGGER_FILE)
+                except OSError:
+                    mtime = None
+                if mtime is not None and mtime != last_mtime:
+                    self._on_trigger_event()
+                last_mtime = mtime
+                await asyncio.sleep(TRIGGER_POLL_INTERVAL)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """JSON-lines control socket: {"action": "run"|"cancel"|"status", "engine_id": ...}."""
+        try:
+            while line := await reader.readline():
+                try:
+                    msg = json.loads(line)
+                    action = msg.get("action", "status")
+                    if action == "run":
+                        reply = {"ok": True, "queued": self.submit(msg)}
+                    elif action == "cancel":
+                        reply = {"ok": self.cancel(msg.get("engine_id"))}
+                    else:
+                        reply = {"ok": True, **self.status()}
+                except (json.JSONDecodeError, AttributeError) as e:
+                    reply = {"ok": False, "error": str(e)}
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        os.makedirs(STORE_PATH, exist_ok=True)
+        try:
+            server = await asyncio.start_server(self._handle_client, MONITOR_HOST, MONITOR_PORT)
+            print(f"Control socket on {MONITOR_HOST}:{MONITOR_PORT}")
+        except OSError as e:
+            server = None
+            print(f"   [Backtest Monitor] Control socket unavailable ({e}); trigger file only.")
+        self._write_status()
+        try:
+            await asyncio.gather(self._worker(), self._watch_trigger_file())
+        finally:
+            if server:
+                server.close()
+
+
+def monitor():
+    print(f"--- LeoBook Backtest Monitor Started ---")
+    try:
+        asyncio.run(BacktestService().serve())
+    except KeyboardInterrupt:
+        print("\n--- LeoBook Backtest Monitor Stopped ---")
 
 if __name__ == "__main__":
     monitor()
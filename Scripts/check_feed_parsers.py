@@ -0,0 +1,209 @@
+# check_feed_parsers.py: Checks the Flashscore feed parsers against captures of the live site.
+# Part of LeoBook Scripts — Diagnostics
+#
+# Functions: capture_h2h(), capture_live(), check_h2h_feed(), check_live_feed(), main()
+# Called by: run manually / CI after touching fs_http.py or fs_live_feed.py
+
+"""
+Feed Parser Checks
+Compares the pure-Python feed parsers with what the browser showed at the same moment.
+A capture (in Scripts/fixtures) pairs a recorded feed with the page's own extraction:
+  - df_hh_<mid>.txt / .json: the df_hh feed the match page loaded (trimmed to the
+    Overall tab group, the only one parse_h2h_feed reads) and extract_h2h_data()
+    of that page. The parsed sections must start with the rows the page showed.
+  - live_feed_<stamp>.jsonl / .json: the payloads attach_feed_capture() saw on the
+    streamer's page (trimmed to the last full list and the deltas after it) and
+    _extract_all_matches() of that page when recording stopped. Every fixture the
+    page listed must come out of the feed with the same teams, status and score.
+
+Record a capture (needs Playwright and network), then check without either:
+
+    python Scripts/check_feed_parsers.py capture-h2h <match url> <home> <away>
+    python Scripts/check_feed_parsers.py capture-live [seconds]
+    python Scripts/check_feed_parsers.py
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+from datetime import datetime as dt
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Modules.Flashscore.fs_http import K_GROUP, SECTION_TARGETS, match_id_of, parse_recorded as parse_h2h_recorded
+from Modules.Flashscore.fs_live_feed import LiveFeedParser, attach_feed_capture, parse_recorded as parse_live_recorded
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+H2H_FEED_MARKER = "/x/feed/df_hh_1_"
+ROW_FIELDS = ("date", "home", "away", "score")
+LIVE_FIELDS = ("home_team", "away_team", "status", "home_score", "away_score")
+
+
+def _trim_h2h(payload: str) -> str:
+    """Cut the payload before the second tab group (Home/Away repeat the Overall rows)."""
+    records = payload.split("~")
+    groups = [i for i, record in enumerate(records) if record.startswith(K_GROUP + "÷")]
+    return "~".join(records[:groups[1]]) + "~" if len(groups) > 1 else payload
+
+
+def _same_date(page_date: str, feed_date: str) -> bool:
+    """The page shows dd.mm.yy, the parser returns dd.mm.yyyy."""
+    return page_date in (feed_date, feed_date[:6] + feed_date[8:])
+
+
+async def capture_h2h(match_url: str, home: str, away: str):
+    """Load the match page's H2H tab and store the df_hh feed it fetched next to its DOM extraction."""
+    from playwright.async_api import async_playwright
+    from Core.Browser.Extractors.h2h_extractor import activate_h2h_tab, extract_h2h_data
+
+    mid = match_id_of({"match_link": match_url})
+    if not mid:
+        sys.exit(f"No match id in {match_url}")
+    payloads = []
+
+    async def on_response(response):
+        if H2H_FEED_MARKER in response.url:
+            payloads.append(await response.text())
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        context = await browser.new_context(**p.devices['iPhone 12'], timezone_id="Africa/Lagos")
+        page = await context.new_page()
+        page.on("response", on_response)
+        await page.goto(match_url, wait_until="domcontentloaded", timeout=60000)
+        if not await activate_h2h_tab(page):
+            sys.exit("H2H tab not available")
+        dom = await extract_h2h_data(page, home, away)
+        await browser.close()
+
+    if not payloads:
+        sys.exit(f"The page made no {H2H_FEED_MARKER}{mid} request")
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    base = os.path.join(FIXTURES_DIR, f"df_hh_{mid}")
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        f.write(_trim_h2h(payloads[-1]))
+    expected = {
+        "match_url": match_url, "home_team": home, "away_team": away,
+        "captured_at": dt.now().isoformat(timespec="seconds"),
+        "sections": {t: [{k: row.get(k) for k in ROW_FIELDS} for row in dom.get(t, [])] for t in SECTION_TARGETS},
+    }
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(expected, f, indent=2, ensure_ascii=False)
+    counts = {t: len(rows) for t, rows in expected["sections"].items()}
+    print(f"Saved {base}.txt/.json (page rows: {counts})")
+
+
+async def capture_live(seconds: int):
+    """Record the streamer page's feed for a while, then store it with a DOM scan of the same moment."""
+    from playwright.async_api import async_playwright
+    from Modules.Flashscore.fs_live_streamer import (
+        _click_tab, _extract_all_matches, _new_streamer_context, _open_flashscore, ensure_content_expanded,
+    )
+
+    items = []
+    recording = True
+
+    def on_payload(kind: str, payload: str):
+        if recording:
+            items.append({"kind": kind, "payload": payload})
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await (await _new_streamer_context(p, browser)).new_page()
+        attach_feed_capture(page, LiveFeedParser(), lambda rows, full_list: None, on_payload)
+        await _open_flashscore(page)
+        await _click_tab(page, "all")
+        await ensure_content_expanded(page)
+        await asyncio.sleep(seconds)
+        dom = await _extract_all_matches(page)
+        recording = False  # Payloads after the scan are not reflected in it
+        await browser.close()
+
+    full_lists = [i for i, item in enumerate(items) if item["kind"] == "f"]
+    if not full_lists or not dom:
+        sys.exit(f"Nothing to compare ({len(full_lists)} full lists, {len(dom)} DOM rows)")
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    base = os.path.join(FIXTURES_DIR, f"live_feed_{dt.now().strftime('%Y%m%d_%H%M')}")
+    with open(base + ".jsonl", "w", encoding="utf-8") as f:
+        for item in items[full_lists[-1]:]:  # Earlier payloads are superseded by the last full list
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+    expected = {
+        "captured_at": dt.now().isoformat(timespec="seconds"),
+        "fixtures": {m["fixture_id"]: {k: m.get(k, "") for k in LIVE_FIELDS} for m in dom},
+    }
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(expected, f, indent=2, ensure_ascii=False)
+    print(f"Saved {base}.jsonl/.json ({len(items) - full_lists[-1]} payloads, {len(dom)} page rows)")
+
+
+def check_h2h_feed() -> int:
+    """Check every df_hh capture. Returns the number of captures checked."""
+    print("Checking df_hh H2H feed parser...")
+    captures = sorted(glob.glob(os.path.join(FIXTURES_DIR, "df_hh_*.json")))
+    if not captures:
+        print("  [SKIP] No df_hh capture; record one with capture-h2h.")
+        return 0
+    for path in captures:
+        with open(path, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+        data = parse_h2h_recorded(path[:-len(".json")] + ".txt", expected["home_team"], expected["away_team"])
+        for target in SECTION_TARGETS:
+            page_rows, feed_rows = expected["sections"][target], data[target]
+            # The page shows the first rows of each section (more behind "show more")
+            assert len(feed_rows) >= len(page_rows), (path, target, len(feed_rows), len(page_rows))
+            for page_row, feed_row in zip(page_rows, feed_rows):
+                assert _same_date(page_row["date"], feed_row["date"]), (path, target, page_row, feed_row)
+                assert all(page_row[k] == feed_row[k] for k in ("home", "away", "score")), (path, target, page_row, feed_row)
+        print(f"  [OK] {os.path.basename(path)[:-5]}: " + ", ".join(f"{t} {len(data[t])}" for t in SECTION_TARGETS))
+    return len(captures)
+
+
+def check_live_feed() -> int:
+    """Check every live feed capture. Returns the number of captures checked."""
+    print("\nChecking live feed parser...")
+    captures = sorted(glob.glob(os.path.join(FIXTURES_DIR, "live_feed_*.json")))
+    if not captures:
+        print("  [SKIP] No live feed capture; record one with capture-live.")
+        return 0
+    for path in captures:
+        with open(path, "r", encoding="utf-8") as f:
+            expected = json.load(f)["fixtures"]
+        final = {m["fixture_id"]: m for m in parse_live_recorded(path[:-len(".json")] + ".jsonl")}
+        missing = sorted(set(expected) - set(final))
+        assert not missing, (path, f"{len(missing)} page fixtures not in the feed", missing[:10])
+        for fid, page_row in expected.items():
+            fields = LIVE_FIELDS if page_row["status"] != "scheduled" else LIVE_FIELDS[:3]  # No score before kickoff
+            feed_row = {k: final[fid][k] for k in fields}
+            assert feed_row == {k: page_row[k] for k in fields}, (path, fid, page_row, final[fid])
+        print(f"  [OK] {os.path.basename(path)[:-5]}: {len(expected)} fixtures match the page.")
+    return len(captures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the Flashscore feed parsers against captures")
+    sub = parser.add_subparsers(dest="command")
+    h2h = sub.add_parser("capture-h2h", help="record a df_hh feed and the page's H2H rows")
+    h2h.add_argument("match_url")
+    h2h.add_argument("home")
+    h2h.add_argument("away")
+    live = sub.add_parser("capture-live", help="record the live feed and the page's match rows")
+    live.add_argument("seconds", type=int, nargs="?", default=120)
+    args = parser.parse_args()
+
+    if args.command == "capture-h2h":
+        asyncio.run(capture_h2h(args.match_url, args.home, args.away))
+        return
+    if args.command == "capture-live":
+        asyncio.run(capture_live(args.seconds))
+        return
+    if not check_h2h_feed() + check_live_feed():
+        print("\nNo captures to check.")
+        return
+    print("\nAll feed parser checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 # enrich_all_schedules.py: enrich_all_schedules.py: Module for Scripts — Pipeline.
 # Part of LeoBook Scripts — Pipeline
 #
-# Functions: load_selectors(), _raw_safe_attr(), _raw_safe_text(), _smart_attr(), _smart_text(), _id_from_href(), _standardize_url(), strip_league_stage() (+6 more)
+# Functions: load_selectors(), _raw_safe_attr(), _raw_safe_text(), _smart_attr(), _smart_text(), _id_from_href(), _standardize_url(), strip_league_stage() (+7 more)
 
 """
 Match Enrichment Pipeline: Process ALL schedules to extract missing data
@@ -47,7 +47,11 @@ from Data.Access.outcome_reviewer import smart_parse_datetime
 from Core.Browser.Extractors.standings_extractor import extract_standings_data, activate_standings_tab
 from Core.Browser.Extractors.league_page_extractor import extract_league_match_urls
 from Modules.Flashscore.fs_utils import retry_extraction
+from Core.Browser.resource_router import apply_resource_policy
+from Core.Browser.supervisor import BrowserSupervisor
 from Core.Utils.constants import NAVIGATION_TIMEOUT, WAIT_FOR_LOAD_STATE_TIMEOUT
+from Core.Utils.utils import BatchProcessor, PagePool
+from Core.Utils.concurrency import ConcurrencyController, report_outcome
 
 # Configuration
 _IS_CODESPACE = bool(os.getenv('CODESPACES') or os.getenv('CODESPACE_NAME'))
@@ -327,81 +331,115 @@ async def extract_match_enrichment(page, match_url: str, sel: Dict[str, str],
         return None
 
 
-async def process_match_task_isolated(browser: Browser, match: Dict, sel: Dict[str, str], extract_standings: bool) -> Dict:
-    """Worker to enrich a single match within its own context with failure diagnostics."""
+ENRICH_CONTEXT_OPTIONS = {
+    "viewport": {'width': 1280, 'height': 720},
+    "user_agent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    "ignore_https_errors": True,
+}
+ENRICH_BROWSER_ARGS = ['--disable-gpu', '--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
+
+
+async def _setup_enrich_context(context):
+    await apply_resource_policy(context, "enrichment")
+
+
+async def process_match_task_isolated(browser: Browser, match: Dict, sel: Dict[str, str], extract_standings: bool,
+                                      page=None) -> Dict:
+    """
+    Worker to enrich a single match with failure diagnostics.
+    Uses the pooled page handed out by BatchProcessor, or its own context when called without one.
+    """
     fixture_id = match.get('fixture_id', 'unknown')
-    try:
-        context = await browser.new_context(
-            viewport={'width': 1280, 'height': 720},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            ignore_https_errors=True
-        )
+    context = None
+    if page is None:
         try:
+            context = await browser.new_context(**ENRICH_CONTEXT_OPTIONS)
+            await _setup_enrich_context(context)
             page = await context.new_page()
-            needs = match.get('_enrich_needs', [])
-            enriched = await extract_match_enrichment(page, match['match_link'], sel, extract_standings, needs)
-            if enriched:
-                match.update(enriched)
-            else:
-                # I1: Pre-capture validation — only save diagnostics if page actually loaded
+        except Exception as e:
+            print(f"      [ISOLATION CRITICAL] Context creation failed for {fixture_id}: {e}")
+            if context is not None:
+                await context.close()
+            return match
+
+    try:
+        needs = match.get('_enrich_needs', [])
+        enriched = await extract_match_enrichment(page, match['match_link'], sel, extract_standings, needs)
+        if enriched:
+            match.update(enriched)
+        else:
+            # I1: Pre-capture validation — only save diagnostics if page actually loaded
+            page_html = ""
+            try:
+                page_html = await page.content()
+            except Exception:
                 page_html = ""
-                try:
-                    page_html = await page.content()
-                except Exception:
-                    page_html = ""
+            
+            is_blank_page = len(page_html.strip()) < 60 or page_html.strip() == "<html><head></head><body></body></html>"
+            
+            if is_blank_page:
+                # Page never loaded — browser crash or navigation failure
+                print(f"      [BROWSER_CRASH] Page blank for {fixture_id}. Skipping diagnostic save (no useful data).")
+                report_outcome("error")
+            else:
+                # Real page content exists — save diagnostics for AIGO analysis
+                log_dir = Path("Data/Logs/EnrichmentFailures") / fixture_id
+                log_dir.mkdir(parents=True, exist_ok=True)
                 
-                is_blank_page = len(page_html.strip()) < 60 or page_html.strip() == "<html><head></head><body></body></html>"
+                screenshot_path = log_dir / "failure.png"
+                html_path = log_dir / "source.html"
                 
-                if is_blank_page:
-                    # Page never loaded — browser crash or navigation failure
-                    print(f"      [BROWSER_CRASH] Page blank for {fixture_id}. Skipping diagnostic save (no useful data).")
-                else:
-                    # Real page content exists — save diagnostics for AIGO analysis
-                    log_dir = Path("Data/Logs/EnrichmentFailures") / fixture_id
-                    log_dir.mkdir(parents=True, exist_ok=True)
-                    
-                    screenshot_path = log_dir / "failure.png"
-                    html_path = log_dir / "source.html"
-                    
-                    await page.screenshot(path=str(screenshot_path))
-                    with open(html_path, "w", encoding='utf-8') as f:
-                        f.write(page_html)
-                    
-                    print(f"      [AIGO Fallback] Extraction failed for {fixture_id}. Diagnostics saved to {log_dir}")
+                await page.screenshot(path=str(screenshot_path))
+                with open(html_path, "w", encoding='utf-8') as f:
+                    f.write(page_html)
                 
-        except Exception as e:
-            print(f"      [ISOLATION INFO] Failed to enrich {fixture_id}: {str(e)[:100]}")
-        finally:
-            await context.close()
+                print(f"      [AIGO Fallback] Extraction failed for {fixture_id}. Diagnostics saved to {log_dir}")
+            
     except Exception as e:
-        print(f"      [ISOLATION CRITICAL] Context creation failed for {fixture_id}: {e}")
+        print(f"      [ISOLATION INFO] Failed to enrich {fixture_id}: {str(e)[:100]}")
+        report_outcome(e)
+    finally:
+        if context is not None:
+            await context.close()
     
     return match
 
 
 async def enrich_batch(playwright: Playwright, matches: List[Dict], batch_num: int,
                        sel: Dict[str, str], extract_standings: bool = False,
-                       concurrency: int = 5) -> List[Dict]:
-    """Process a batch of matches with isolated contexts and throttled concurrency."""
-    browser = await playwright.chromium.launch(
-        headless=True,
-        args=['--disable-gpu', '--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
-    )
-    
-    semaphore = asyncio.Semaphore(concurrency)
-
-    async def worker(match):
-        async with semaphore:
-            # Enhanced Jitter: random delay between 0.5 and 2.5 seconds
-            import random
-            jitter = 0.5 + random.random() * 2.0
-            await asyncio.sleep(jitter)
-            return await process_match_task_isolated(browser, match, sel, extract_standings)
+                       concurrency: int = 5, controller: Optional[ConcurrencyController] = None,
+                       supervisor: Optional[BrowserSupervisor] = None) -> List[Dict]:
+    """
+    Process a batch of matches over a pool of warm contexts with throttled concurrency.
+    Pass the run's controller so the adapted limit carries over from batch to batch, and
+    its supervisor to reuse one browser across batches (recycled on its RSS / page
+    ceilings by the caller); without one the batch launches and closes its own browser.
+    """
+    controller = controller or ConcurrencyController("enrichment", initial=concurrency)
+    if supervisor is not None:
+        browser = supervisor.browser
+    else:
+        browser = await playwright.chromium.launch(headless=True, args=ENRICH_BROWSER_ARGS)
+    page_pool = PagePool(browser, controller.max_limit, context_options=ENRICH_CONTEXT_OPTIONS,
+                         on_context=_setup_enrich_context)
+    processor = BatchProcessor(page_pool=page_pool, controller=controller)
+
+    async def worker(match, page):
+        # Enhanced Jitter: random delay between 0.5 and 2.5 seconds
+        import random
+        jitter = 0.5 + random.random() * 2.0
+        await asyncio.sleep(jitter)
+        return await process_match_task_isolated(browser, match, sel, extract_standings, page=page)
 
     # Gather results for all matches in the batch
-    results = await asyncio.gather(*(worker(m) for m in matches))
-    
-    await browser.close()
+    try:
+        results = await processor.run_batch(matches, worker)
+    finally:
+        await page_pool.close()
+        if supervisor is not None:
+            supervisor.note_pages(len(matches))
+        else:
+            await browser.close()
     return list(results)
 
 
@@ -565,14 +603,15 @@ async def enrich_all_schedules(limit: Optional[int] = None, dry_run: bool = Fals
                 print("[INFO] All leagues recently harvested. Phase 0 skipped.")
             else:
                 new_match_urls = set()
-                sem = asyncio.Semaphore(MAX_CONCURRENT_LEAGUES)
+                harvest_limit = ConcurrencyController("harvest", initial=MAX_CONCURRENT_LEAGUES,
+                                                      max_limit=MAX_CONCURRENT_LEAGUES * 2)
                 # Track which league indices got updated for batch saving
                 _updated_indices = []
                 _lock = asyncio.Lock()
 
                 async def _harvest_league(p_browser, league, idx, total):
                     nonlocal new_match_urls
-                    async with sem:
+                    async with harvest_limit.slot():
                         # Check global timeout
                         elapsed = _time.monotonic() - phase0_start
                         if elapsed > PHASE0_TIMEOUT:
@@ -583,6 +622,7 @@ async def enrich_all_schedules(limit: Optional[int] = None, dry_run: bool = Fals
                         
                         try:
                             page = await p_browser.new_page()
+                            await apply_resource_policy(page, "enrichment")
                             try:
                                 found_urls = await asyncio.wait_for(
                                     extract_league_match_urls(page, l_url, mode="results"),
@@ -609,12 +649,15 @@ async def enrich_all_schedules(limit: Optional[int] = None, dry_run: bool = Fals
                                 print(f"   [{idx}/{total}] ✓ {l_name}: {len(found_urls)} URLs")
                             except asyncio.TimeoutError:
                                 print(f"   [{idx}/{total}] ⚠ {l_name}: TIMEOUT ({PER_LEAGUE_TIMEOUT}s)")
+                                report_outcome("timeout")
                             except Exception as e:
                                 print(f"   [{idx}/{total}] ✗ {l_name}: {e}")
+                                report_outcome(e)
                             finally:
                                 await page.close()
                         except Exception as e:
                             print(f"   [{idx}/{total}] ✗ {l_name}: Browser error: {e}")
+                            report_outcome(e)
 
                 async with async_playwright() as p:
                     browser = await p.chromium.launch(headless=True)
@@ -628,6 +671,7 @@ async def enrich_all_schedules(limit: Optional[int] = None, dry_run: bool = Fals
                 
                 elapsed_total = _time.monotonic() - phase0_start
                 print(f"[INFO] Phase 0 completed in {elapsed_total:.1f}s ({len(_updated_indices)} leagues updated)")
+                print(f"[INFO] Harvest concurrency: {harvest_limit.summary()}")
 
                 # --- Crash-safe save: write back last_harvested + metadata to CSV ---
                 if _updated_indices:
@@ -773,7 +817,9 @@ async def enrich_all_schedules(limit: Optional[int] = None, dry_run: bool = Fals
     max_concurrency = 2 if _IS_CODESPACE else 5
     calc_concurrency = max(1, min(max_concurrency, len(to_enrich) // 20))
     env_label = "Codespace" if _IS_CODESPACE else "Local"
-    print(f"  [AUTO-SCALE] Concurrency set to: {calc_concurrency} ({env_label} mode, max={max_concurrency})")
+    # Starting point only: the controller halves/grows it from memory, CPU, timeouts and latency
+    enrich_controller = ConcurrencyController("enrichment", initial=calc_concurrency, max_limit=max_concurrency * 2)
+    print(f"  [AUTO-SCALE] Concurrency starts at: {calc_concurrency} ({env_label} mode, max={enrich_controller.max_limit})")
 
     if limit:
         to_enrich = to_enrich[:limit]
@@ -799,14 +845,21 @@ async def enrich_all_schedules(limit: Optional[int] = None, dry_run: bool = Fals
     sync_buffer_standings = []
 
     async with async_playwright() as playwright:
+        # One browser for every batch, relaunched only when it hits its RSS / page ceilings
+        enrich_supervisor = BrowserSupervisor(
+            "enrichment", lambda: playwright.chromium.launch(headless=True, args=ENRICH_BROWSER_ARGS))
         try:
+            await enrich_supervisor.start()
             for batch_idx in range(0, len(to_enrich), BATCH_SIZE):
                 batch = to_enrich[batch_idx:batch_idx + BATCH_SIZE]
                 batch_num = (batch_idx // BATCH_SIZE) + 1
 
                 print(f"\n[BATCH {batch_num}/{total_batches}] Processing {len(batch)} matches...")
 
-                enriched_batch = await enrich_batch(playwright, batch, batch_num, sel, extract_standings, calc_concurrency)
+                enriched_batch = await enrich_batch(playwright, batch, batch_num, sel, extract_standings,
+                                                    controller=enrich_controller, supervisor=enrich_supervisor)
+                # Between batches no page is open: safe point to recycle
+                await enrich_supervisor.maybe_recycle()
 
                 if not dry_run:
                     # Save enriched data
@@ -921,6 +974,8 @@ async def enrich_all_schedules(limit: Optional[int] = None, dry_run: bool = Fals
                 print(f"   [+] Teams: {len(teams_added)}, Leagues: {len(leagues_added)}")
 
         finally:
+            await enrich_supervisor.close()
+            print(f"   [Browser] {enrich_supervisor.summary()}")
             # --- FINAL PROLOGUE SYNC (Chapter 0 Closure) ---
             if not dry_run:
                 print(f"\n   [PROLOGUE] Initiating Final Global Sync...")
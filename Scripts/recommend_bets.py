@@ -27,7 +27,7 @@ project_root = os.path.dirname(script_dir)
 sys.path.append(project_root)
 
 from Data.Access.db_helpers import PREDICTIONS_CSV
-from Data.Access.prediction_accuracy import get_market_option
+from Data.Access.prediction_accuracy import get_market_option, AccuracyAggregator
 
 def load_data():
     if not os.path.exists(PREDICTIONS_CSV):
@@ -37,38 +37,18 @@ def load_data():
 
 def calculate_market_reliability(predictions):
     """Calculates accuracy for each market type based on historical results."""
-    market_stats = {} # {market_name: {total: 0, correct: 0, recent_total: 0, recent_correct: 0}}
-    
-    now = datetime.now()
-    seven_days_ago = now - timedelta(days=7)
-    
-    for p in predictions:
-        outcome = p.get('outcome_correct')
-        if outcome not in ['True', 'False']:
-            continue
-            
-        try:
-            p_date = datetime.strptime(p.get('date', ''), "%d.%m.%Y")
-        except:
-            continue
+    seven_days_ago = datetime.now() - timedelta(days=7)
+
+    # Single aggregation pass shared with the accuracy report (resumes from its checkpoint)
+    aggregator = AccuracyAggregator.from_checkpoint(predictions)
+    recent_stats = aggregator.by_market(since=seven_days_ago)
 
-        market = get_market_option(p.get('prediction', ''), p.get('home_team', ''), p.get('away_team', ''))
-        if market not in market_stats:
-            market_stats[market] = {'total': 0, 'correct': 0, 'recent_total': 0, 'recent_correct': 0}
-            
-        market_stats[market]['total'] += 1
-        if outcome == 'True':
-            market_stats[market]['correct'] += 1
-            
-        if p_date >= seven_days_ago:
-            market_stats[market]['recent_total'] += 1
-            if outcome == 'True':
-                market_stats[market]['recent_correct'] += 1
-            
     reliability = {}
-    for m, stats in market_stats.items():
+    for m, stats in aggregator.by_market().items():
+        recent_total = recent_stats.get(m, {}).get('total', 0)
+        recent_correct = recent_stats.get(m, {}).get('correct', 0)
         overall = stats['correct'] / stats['total'] if stats['total'] >= 3 else 0.5
-        recent = stats['recent_correct'] / stats['recent_total'] if stats['recent_total'] >= 2 else overall
+        recent = recent_correct / recent_total if recent_total >= 2 else overall
         reliability[m] = {
             'overall': overall,
             'recent': recent,